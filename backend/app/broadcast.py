@@ -0,0 +1,375 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import uuid
+from collections import OrderedDict, defaultdict, deque
+from typing import Any
+
+import psycopg
+
+from .config import Settings
+
+logger = logging.getLogger(__name__)
+
+# Single Postgres NOTIFY channel carrying every SSE channel; receivers filter locally.
+_PG_NOTIFY_CHANNEL = "jarvis_sse"
+# NOTIFY payloads must stay under 8000 bytes; leave room for the envelope.
+_PG_NOTIFY_MAX_PAYLOAD = 7900
+_PG_RECONNECT_DELAY_SECONDS = 2.0
+
+# Sent in place of a slow subscriber's dropped backlog: refetch everything.
+RESYNC = "resync"
+
+
+class SubscriptionClosed(Exception):
+    """Raised by Subscription.get() once a slow consumer has been evicted."""
+
+
+# (channel, sequence number, payload)
+Frame = tuple[str, int, str]
+
+
+class Subscription:
+    """Bounded per-connection message buffer, fed on the event loop.
+
+    A message identical to one still pending is dropped when *coalesce* is
+    set: for "something changed" signals one pending copy says it all. When
+    the buffer is full the slow-consumer policy applies: "resync" replaces
+    the backlog with a single RESYNC message per subscribed channel (the
+    client refetches), and "disconnect" closes the subscription so the
+    client reconnects.
+    """
+
+    def __init__(self, channels: tuple[str, ...], max_size: int, slow_consumer_policy: str) -> None:
+        self.channels = channels
+        self._items: deque[Frame] = deque()
+        self._max_size = max_size
+        self._policy = slow_consumer_policy
+        self._waiter: asyncio.Future[None] | None = None
+        self.closed = False
+        # None: fresh subscription; True: missed frames were replayed;
+        # False: a channel's gap could not be replayed and a RESYNC is queued for it.
+        self.resumed: bool | None = None
+
+    def qsize(self) -> int:
+        return len(self._items)
+
+    def offer(self, channel: str, seq: int, data: str, coalesce: bool = True) -> bool:
+        """Queue a frame; returns False if the consumer overflowed. Loop thread only."""
+        if self.closed:
+            return True
+        if coalesce and any(pending == data and on == channel for on, _, pending in self._items):
+            return True
+        overflowed = len(self._items) >= self._max_size
+        if overflowed:
+            if self._policy == "disconnect":
+                self.closed = True
+            else:
+                self._items.clear()
+                self._items.extend((on, seq, RESYNC) for on in self.channels)
+        else:
+            self._items.append((channel, seq, data))
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+        return not overflowed
+
+    async def get(self) -> Frame:
+        while not self._items:
+            if self.closed:
+                raise SubscriptionClosed
+            self._waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+        return self._items.popleft()
+
+
+class _ChannelLog:
+    """Recent frames of one channel, for resumption.
+
+    *floor* is the newest sequence number that can no longer be replayed:
+    a client whose last id is below it may have missed evicted frames.
+    """
+
+    __slots__ = ("floor", "frames")
+
+    def __init__(self, floor: int, size: int) -> None:
+        self.floor = floor
+        self.frames: deque[tuple[int, str]] = deque(maxlen=size)
+
+    def append(self, seq: int, data: str) -> None:
+        if self.frames.maxlen is not None and len(self.frames) == self.frames.maxlen:
+            self.floor = self.frames[0][0]
+        self.frames.append((seq, data))
+
+
+class Broadcaster:
+    """In-process SSE fan-out: channel name → per-connection Subscriptions.
+
+    Sync request handlers call publish() from the threadpool; async SSE
+    generators and long-polls subscribe() and await subscription.get() on
+    the loop. Each publish schedules a single loop callback, which fans out
+    to every subscriber of the channel.
+
+    Frames are numbered from one process-wide counter, so ids increase
+    monotonically within every channel, and are exposed as SSE ids of the
+    form "<epoch>-<seq>". The epoch is random per process, so an id from
+    another worker or an earlier run never resumes into the wrong stream.
+    The last *replay_size* frames of each channel are kept (for up to
+    *max_replay_channels* channels, least recently published evicted) so a
+    reconnecting client can be sent what it missed.
+    Only reaches subscribers in this process, which is fine for single-worker dev.
+    """
+
+    def __init__(
+        self,
+        max_queue_size: int = 256,
+        slow_consumer_policy: str = "resync",
+        replay_size: int = 100,
+        max_replay_channels: int = 10000,
+    ) -> None:
+        self.queues: dict[str, list[Subscription]] = defaultdict(list)
+        self.overflows = 0
+        self.epoch = uuid.uuid4().hex[:8]
+        self._max_queue_size = max_queue_size
+        self._slow_consumer_policy = slow_consumer_policy
+        self._replay_size = replay_size
+        self._max_replay_channels = max_replay_channels
+        self._logs: OrderedDict[str, _ChannelLog] = OrderedDict()
+        self._seq = 0
+        # Newest sequence number held by any evicted channel log.
+        self._evicted_through = 0
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+
+    async def stop(self) -> None:
+        self._loop = None
+
+    def event_id(self, seq: int) -> str:
+        return f"{self.epoch}-{seq}"
+
+    def subscribe(self, channel: str, last_event_id: str | None = None) -> Subscription:
+        """Subscribe on the loop; with *last_event_id*, first queue the frames missed since."""
+        return self.subscribe_many((channel,), last_event_id)
+
+    def subscribe_many(self, channels: tuple[str, ...], last_event_id: str | None = None) -> Subscription:
+        """One Subscription fed by several channels; frames arrive in publish order.
+
+        Sequence numbers are shared by all channels, so the last id seen on
+        the combined stream resumes every one of them.
+        """
+        q = Subscription(channels, self._max_queue_size, self._slow_consumer_policy)
+        if last_event_id:
+            self._replay(last_event_id, q)
+        for channel in channels:
+            self.queues[channel].append(q)
+        return q
+
+    def unsubscribe(self, q: Subscription) -> None:
+        for channel in q.channels:
+            subscribers = self.queues.get(channel)
+            if not subscribers:
+                continue
+            try:
+                subscribers.remove(q)
+            except ValueError:
+                pass
+            if not subscribers:
+                self.queues.pop(channel, None)
+
+    def publish(self, channel: str, data: str = "update", coalesce: bool = True) -> None:
+        """Notify all listeners on *channel*. Safe to call from any thread.
+
+        Pass coalesce=False for payloads that carry content (stream chunks)
+        rather than a change signal.
+        """
+        if self._loop is None:
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._dispatch, channel, data, coalesce)
+        except RuntimeError:
+            pass  # loop already closed during shutdown
+
+    def _dispatch(self, channel: str, data: str, coalesce: bool) -> None:
+        self._deliver_local(channel, data, coalesce)
+
+    def _deliver_local(self, channel: str, data: str, coalesce: bool) -> None:
+        self._seq += 1
+        log = self._logs.get(channel)
+        if log is None:
+            log = self._logs[channel] = _ChannelLog(self._evicted_through, self._replay_size)
+            while len(self._logs) > self._max_replay_channels:
+                self._logs.popitem(last=False)
+                self._evicted_through = self._seq - 1
+        else:
+            self._logs.move_to_end(channel)
+        log.append(self._seq, data)
+        for q in self.queues.get(channel, ()):
+            if not q.offer(channel, self._seq, data, coalesce):
+                self.overflows += 1
+                logger.debug("SSE subscriber on %s overflowed (%s).", channel, self._slow_consumer_policy)
+
+    def _replay(self, last_event_id: str, q: Subscription) -> None:
+        epoch, _, seq_text = last_event_id.partition("-")
+        try:
+            last_seq = int(seq_text)
+        except ValueError:
+            last_seq = -1
+        valid = epoch == self.epoch and 0 <= last_seq <= self._seq
+        missed: list[Frame] = []
+        stale: list[str] = []
+        for channel in q.channels:
+            log = self._logs.get(channel)
+            floor = log.floor if log is not None else self._evicted_through
+            if not valid or last_seq < floor:
+                stale.append(channel)
+            elif log is not None:
+                missed.extend((channel, seq, data) for seq, data in log.frames if seq > last_seq)
+        q.resumed = not stale
+        missed.sort(key=lambda frame: frame[1])
+        for channel, seq, data in missed:
+            q.offer(channel, seq, data, coalesce=False)
+        for channel in stale:
+            q.offer(channel, self._seq, RESYNC, coalesce=False)
+
+
+class PostgresBroadcaster(Broadcaster):
+    """Cross-process fan-out over Postgres LISTEN/NOTIFY.
+
+    Each process keeps one dedicated LISTEN connection that feeds its local
+    queues, and one dedicated connection that sends pg_notify() so request
+    threads never block on (or borrow a pool connection for) a publish.
+    Local subscribers are notified immediately; the process skips its own
+    notifications when they echo back.
+    """
+
+    def __init__(self, database_url: str, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._database_url = database_url
+        self._origin = uuid.uuid4().hex
+        self._outbox: asyncio.Queue[tuple[str, str, bool]] | None = None
+        # Coalescible (channel, data) pairs already waiting in the outbox.
+        self._outbox_pending: set[tuple[str, str]] = set()
+        self._tasks: list[asyncio.Task[None]] = []
+
+    async def start(self) -> None:
+        await super().start()
+        self._outbox = asyncio.Queue()
+        self._tasks = [
+            asyncio.create_task(self._listen_forever(), name="sse-pg-listen"),
+            asyncio.create_task(self._notify_forever(), name="sse-pg-notify"),
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        self._outbox = None
+        self._outbox_pending.clear()
+        await super().stop()
+
+    def _dispatch(self, channel: str, data: str, coalesce: bool) -> None:
+        self._deliver_local(channel, data, coalesce)
+        if self._outbox is None:
+            return
+        if coalesce:
+            if (channel, data) in self._outbox_pending:
+                return
+            self._outbox_pending.add((channel, data))
+        self._outbox.put_nowait((channel, data, coalesce))
+
+    async def _listen_forever(self) -> None:
+        reconnecting = False
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(
+                    self._database_url, autocommit=True
+                ) as conn:
+                    await conn.execute(f"listen {_PG_NOTIFY_CHANNEL}")
+                    if reconnecting:
+                        self._resync_all()
+                    reconnecting = True
+                    async for notify in conn.notifies():
+                        self._handle_notify(notify.payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning("SSE LISTEN connection lost (%s); reconnecting.", exc)
+                await asyncio.sleep(_PG_RECONNECT_DELAY_SECONDS)
+
+    def _resync_all(self) -> None:
+        """NOTIFYs sent while LISTEN was down are gone: tell every channel to refetch.
+
+        Channels with only a replay log get the RESYNC too, so a client
+        resuming from before the gap is not replayed a stream with a hole.
+        """
+        channels = set(self.queues) | set(self._logs)
+        logger.info("SSE LISTEN reconnected; resyncing %d channel(s).", len(channels))
+        for channel in channels:
+            self._deliver_local(channel, RESYNC, True)
+
+    async def _notify_forever(self) -> None:
+        assert self._outbox is not None
+        outbox = self._outbox
+        pending: tuple[str, str] | None = None
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(
+                    self._database_url, autocommit=True
+                ) as conn:
+                    while True:
+                        if pending is None:
+                            pending = await outbox.get()
+                        channel, data, coalesce = pending
+                        if coalesce:
+                            # Publishes from here on need a NOTIFY of their own.
+                            self._outbox_pending.discard((channel, data))
+                        envelope = json.dumps({"o": self._origin, "c": channel, "d": data, "x": coalesce})
+                        if len(envelope.encode("utf-8")) > _PG_NOTIFY_MAX_PAYLOAD:
+                            # Too large for NOTIFY: other processes' subscribers refetch instead.
+                            logger.debug("SSE payload on %s too large for NOTIFY; sending resync.", channel)
+                            envelope = json.dumps({"o": self._origin, "c": channel, "d": RESYNC, "x": True})
+                        await conn.execute(
+                            "select pg_notify(%s, %s)", (_PG_NOTIFY_CHANNEL, envelope)
+                        )
+                        pending = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning("SSE NOTIFY connection lost (%s); reconnecting.", exc)
+                await asyncio.sleep(_PG_RECONNECT_DELAY_SECONDS)
+
+    def _handle_notify(self, payload: str) -> None:
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            return
+        if message.get("o") == self._origin:
+            return
+        channel = message.get("c")
+        data = message.get("d")
+        if not isinstance(channel, str) or not isinstance(data, str):
+            return
+        self._deliver_local(channel, data, bool(message.get("x", True)))
+
+
+def create_broadcaster(settings: Settings) -> Broadcaster:
+    options: dict[str, Any] = {
+        "max_queue_size": settings.sse_queue_max_size,
+        "slow_consumer_policy": settings.sse_slow_consumer_policy,
+        "replay_size": settings.sse_replay_buffer_size,
+        "max_replay_channels": settings.sse_replay_max_channels,
+    }
+    if settings.sse_broadcaster == "postgres":
+        return PostgresBroadcaster(settings.database_url, **options)
+    return Broadcaster(**options)
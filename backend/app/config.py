@@ -38,6 +38,13 @@ def _build_database_url() -> str:
     )
 
 
+def _choice_env(name: str, default: str, choices: tuple[str, ...]) -> str:
+    value = os.getenv(name, default).strip().lower()
+    if value in choices:
+        return value
+    raise RuntimeError(f"{name} must be one of: {', '.join(choices)} (got {value!r}).")
+
+
 def _require_env(name: str) -> str:
     value = os.getenv(name)
     if value:
@@ -54,11 +61,39 @@ class Settings:
     db_pool_max_size: int
     db_pool_timeout_seconds: float
     db_pool_max_idle_seconds: float
+    db_async_pool_min_size: int
+    db_async_pool_max_size: int
+    database_read_url: str | None  # Optional read replica for dashboard reads. None = everything on the primary.
+    db_read_pool_max_size: int
+    db_read_max_lag_seconds: float  # Reads fall back to the primary while replica replay lag exceeds this.
+    db_read_your_writes_seconds: float  # After a write, that caller reads from the primary for this long.
+    db_prepared_statements: bool  # False behind PgBouncer transaction pooling (no server-side prepared statements).
+    db_slow_query_ms: float  # Statements at least this slow are logged with their route. 0 disables.
     cors_origins: list[str]
     cors_origin_regex: str
     control_plane_token: str
     supabase_jwt_secret: str
     vault_encryption_key: str | None  # Fernet key (url-safe base64, 32 bytes). None = vault disabled.
+    agent_token_cache_ttl_seconds: float  # 0 disables the agent token cache.
+    agent_token_cache_max_size: int
+    user_auth_cache_ttl_seconds: float  # 0 disables the verified-JWT cache. Entries never outlive the token's exp.
+    user_auth_cache_max_size: int
+    sse_broadcaster: str  # "memory" (single process) or "postgres" (LISTEN/NOTIFY across workers).
+    sse_queue_max_size: int  # Pending messages per SSE/long-poll subscriber before the slow-consumer policy applies.
+    sse_slow_consumer_policy: str  # "resync" (collapse the backlog into one resync message) or "disconnect".
+    sse_replay_buffer_size: int  # Recent frames kept per SSE channel for Last-Event-ID resumption.
+    sse_replay_max_channels: int  # Channels with a replay buffer; least recently published are dropped first.
+    events_maintenance_interval_seconds: float  # 0 disables the in-process partition job (e.g. when pg_cron runs it).
+    events_retention_months: int  # Months of events kept before the current one. 0 keeps everything.
+    events_retention_mode: str  # "detach" (move to the events_archive schema) or "drop".
+    ingest_mode: str  # "sync" (insert per request) or "queued" (write-behind group commit).
+    ingest_queue_max_size: int
+    ingest_flush_interval_ms: float
+    ingest_flush_max_rows: int
+    ingest_synchronous_commit: str  # synchronous_commit for queued-ingest transactions.
+    ingest_drain_timeout_seconds: float
+    budget_cache_ttl_seconds: float  # How stale the queued-ingest budget counters may get. 0 reads every time.
+    metrics_token: str | None  # Bearer token required by /metrics. None = unauthenticated (keep it off the public internet).
 
 
 @lru_cache(maxsize=1)
@@ -71,6 +106,14 @@ def get_settings() -> Settings:
         db_pool_max_size=int(os.getenv("DB_POOL_MAX_SIZE", "10")),
         db_pool_timeout_seconds=float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "10")),
         db_pool_max_idle_seconds=float(os.getenv("DB_POOL_MAX_IDLE_SECONDS", "30")),
+        db_async_pool_min_size=int(os.getenv("DB_ASYNC_POOL_MIN_SIZE", "1")),
+        db_async_pool_max_size=int(os.getenv("DB_ASYNC_POOL_MAX_SIZE", "5")),
+        database_read_url=os.getenv("DATABASE_READ_URL") or None,
+        db_read_pool_max_size=int(os.getenv("DB_READ_POOL_MAX_SIZE", "10")),
+        db_read_max_lag_seconds=float(os.getenv("DB_READ_MAX_LAG_SECONDS", "5")),
+        db_read_your_writes_seconds=float(os.getenv("DB_READ_YOUR_WRITES_SECONDS", "10")),
+        db_prepared_statements=_choice_env("DB_PREPARED_STATEMENTS", "on", ("on", "off")) == "on",
+        db_slow_query_ms=float(os.getenv("DB_SLOW_QUERY_MS", "500")),
         cors_origins=_csv_to_list(os.getenv("CORS_ORIGINS", "http://localhost:5173")),
         cors_origin_regex=os.getenv(
             "CORS_ORIGIN_REGEX",
@@ -79,4 +122,30 @@ def get_settings() -> Settings:
         control_plane_token=_require_env("CONTROL_PLANE_TOKEN"),
         supabase_jwt_secret=_require_env("SUPABASE_JWT_SECRET"),
         vault_encryption_key=os.getenv("VAULT_ENCRYPTION_KEY"),
+        agent_token_cache_ttl_seconds=float(os.getenv("AGENT_TOKEN_CACHE_TTL_SECONDS", "60")),
+        agent_token_cache_max_size=int(os.getenv("AGENT_TOKEN_CACHE_MAX_SIZE", "10000")),
+        user_auth_cache_ttl_seconds=float(os.getenv("USER_AUTH_CACHE_TTL_SECONDS", "60")),
+        user_auth_cache_max_size=int(os.getenv("USER_AUTH_CACHE_MAX_SIZE", "10000")),
+        sse_broadcaster=_choice_env("SSE_BROADCASTER", "memory", ("memory", "postgres")),
+        sse_queue_max_size=int(os.getenv("SSE_QUEUE_MAX_SIZE", "256")),
+        sse_slow_consumer_policy=_choice_env("SSE_SLOW_CONSUMER_POLICY", "resync", ("resync", "disconnect")),
+        sse_replay_buffer_size=int(os.getenv("SSE_REPLAY_BUFFER_SIZE", "100")),
+        sse_replay_max_channels=int(os.getenv("SSE_REPLAY_MAX_CHANNELS", "10000")),
+        events_maintenance_interval_seconds=float(
+            os.getenv("EVENTS_MAINTENANCE_INTERVAL_SECONDS", "21600")
+        ),
+        events_retention_months=int(os.getenv("EVENTS_RETENTION_MONTHS", "0")),
+        events_retention_mode=_choice_env("EVENTS_RETENTION_MODE", "detach", ("detach", "drop")),
+        ingest_mode=_choice_env("INGEST_MODE", "sync", ("sync", "queued")),
+        ingest_queue_max_size=int(os.getenv("INGEST_QUEUE_MAX_SIZE", "10000")),
+        ingest_flush_interval_ms=float(os.getenv("INGEST_FLUSH_INTERVAL_MS", "20")),
+        ingest_flush_max_rows=int(os.getenv("INGEST_FLUSH_MAX_ROWS", "500")),
+        ingest_synchronous_commit=_choice_env(
+            "INGEST_SYNCHRONOUS_COMMIT",
+            "on",
+            ("on", "off", "local", "remote_write", "remote_apply"),
+        ),
+        ingest_drain_timeout_seconds=float(os.getenv("INGEST_DRAIN_TIMEOUT_SECONDS", "10")),
+        budget_cache_ttl_seconds=float(os.getenv("BUDGET_CACHE_TTL_SECONDS", "5")),
+        metrics_token=os.getenv("METRICS_TOKEN") or None,
     )
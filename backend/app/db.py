@@ -1,38 +1,208 @@
 from __future__ import annotations
 
-from collections.abc import Iterator
+import hashlib
+import logging
+import re
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterator, Sequence
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
 from typing import Any
 
-from fastapi import HTTPException, status
-from psycopg import Connection
-from psycopg.rows import dict_row
-from psycopg_pool import ConnectionPool
+import psycopg
+from fastapi import Header, HTTPException, status
+from psycopg import AsyncConnection, AsyncCursor, Connection, Cursor, sql
+from psycopg.rows import Row, dict_row
+from psycopg_pool import AsyncConnectionPool, ConnectionPool, PoolTimeout
 
+from .cache import TTLCache
 from .config import Settings, get_settings
 
+logger = logging.getLogger(__name__)
+
+
+# ── Per-request query accounting ─────────────────────────────────────────────
+
+@dataclass
+class QueryStats:
+    """Statements run and DB time spent on behalf of one HTTP request.
+
+    One instance is bound to the request context by the metrics middleware;
+    threadpool workers run sync routes in a copy of that context, so they
+    update the same object.
+    """
+
+    scope: dict[str, Any] = field(default_factory=dict, repr=False)
+    queries: int = 0
+    seconds: float = 0.0
+    slow_queries: int = 0
+
+    @property
+    def route(self) -> str:
+        # The router fills in scope["route"] after the middleware bound us.
+        template = getattr(self.scope.get("route"), "path", None) or self.scope.get("path", "-")
+        return f"{self.scope.get('method', '')} {template}".strip()
+
+
+query_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+# Statements slower than this are logged. Set from settings when a pool opens.
+_slow_query_seconds: float = 0.0
+
+_SQL_WHITESPACE = re.compile(r"\s+")
+_SQL_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SQL_MAX_LOGGED_CHARS = 2000
+
+
+def normalize_sql(query: Any, context: Any = None) -> str:
+    """Single-line SQL with string and numeric literals replaced by ``?``."""
+    if isinstance(query, sql.Composable):
+        query = query.as_string(context)
+    elif isinstance(query, (bytes, bytearray, memoryview)):
+        query = bytes(query).decode("utf-8", "replace")
+    text = _SQL_LITERALS.sub("?", _SQL_WHITESPACE.sub(" ", str(query)).strip())
+    return text[:_SQL_MAX_LOGGED_CHARS]
+
+
+def _record_query(query: Any, context: Any, elapsed: float) -> None:
+    stats = query_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.seconds += elapsed
+    if _slow_query_seconds and elapsed >= _slow_query_seconds:
+        route = "-"
+        if stats is not None:
+            stats.slow_queries += 1
+            route = stats.route
+        logger.warning("Slow query (%.1f ms) on %s: %s", elapsed * 1000, route, normalize_sql(query, context))
+
+
+class TimedCursor(Cursor[Row]):
+    """Cursor that reports each statement to the current request's QueryStats."""
+
+    def execute(
+        self, query: Any, params: Any = None, *, prepare: bool | None = None, binary: bool | None = None
+    ) -> TimedCursor[Row]:
+        started = time.perf_counter()
+        try:
+            return super().execute(query, params, prepare=prepare, binary=binary)
+        finally:
+            _record_query(query, self, time.perf_counter() - started)
+
+    def executemany(self, query: Any, params_seq: Any, *, returning: bool = False) -> None:
+        started = time.perf_counter()
+        try:
+            super().executemany(query, params_seq, returning=returning)
+        finally:
+            _record_query(query, self, time.perf_counter() - started)
+
+
+class AsyncTimedCursor(AsyncCursor[Row]):
+    """Async counterpart of TimedCursor."""
+
+    async def execute(
+        self, query: Any, params: Any = None, *, prepare: bool | None = None, binary: bool | None = None
+    ) -> AsyncTimedCursor[Row]:
+        started = time.perf_counter()
+        try:
+            return await super().execute(query, params, prepare=prepare, binary=binary)
+        finally:
+            _record_query(query, self, time.perf_counter() - started)
+
+    async def executemany(self, query: Any, params_seq: Any, *, returning: bool = False) -> None:
+        started = time.perf_counter()
+        try:
+            await super().executemany(query, params_seq, returning=returning)
+        finally:
+            _record_query(query, self, time.perf_counter() - started)
+
+
+def _configure_query_logging(settings: Settings) -> None:
+    global _slow_query_seconds
+    _slow_query_seconds = settings.db_slow_query_ms / 1000
+
+
+# ── Prepared statements ──────────────────────────────────────────────────────
+
+# (sql, sample params) pairs. The sample params only need the same Python
+# types the callers pass: psycopg keys its prepared-statement cache on the
+# query text plus parameter types.
+PreparedStatements = Sequence[tuple[str, tuple[Any, ...]]]
+
+
+def _connection_kwargs(settings: Settings, cursor_factory: type) -> dict[str, Any]:
+    kwargs: dict[str, Any] = {"row_factory": dict_row, "autocommit": True, "cursor_factory": cursor_factory}
+    if not settings.db_prepared_statements:
+        # PgBouncer in transaction mode hands each transaction to an arbitrary
+        # server connection, where our named statements do not exist.
+        kwargs["prepare_threshold"] = None
+    return kwargs
+
+
+def _prepare_on_connect(
+    settings: Settings, statements: PreparedStatements
+) -> Callable[[Connection[Any]], None] | None:
+    if not settings.db_prepared_statements or not statements:
+        return None
+
+    def configure(connection: Connection[Any]) -> None:
+        for query, params in statements:
+            connection.execute(query, params, prepare=True)
+
+    return configure
+
+
+def _prepare_on_connect_async(
+    settings: Settings, statements: PreparedStatements
+) -> Callable[[AsyncConnection[Any]], Awaitable[None]] | None:
+    if not settings.db_prepared_statements or not statements:
+        return None
+
+    async def configure(connection: AsyncConnection[Any]) -> None:
+        for query, params in statements:
+            await connection.execute(query, params, prepare=True)
+
+    return configure
+
+
+# ── Pools ────────────────────────────────────────────────────────────────────
+
 _pool: ConnectionPool[Connection[dict[str, Any]]] | None = None
+# Optional pool on DATABASE_READ_URL for read-only dashboard queries.
+_read_pool: ConnectionPool[Connection[dict[str, Any]]] | None = None
+# Separate pool for async def routes so they never block the event loop on
+# the sync pool's socket I/O.
+_async_pool: AsyncConnectionPool[AsyncConnection[dict[str, Any]]] | None = None
 
 
-def init_db_pool(settings: Settings | None = None) -> None:
+def init_db_pool(settings: Settings | None = None, prepared: PreparedStatements = ()) -> None:
+    """Open the sync pool; *prepared* statements are prepared on every new connection."""
     global _pool
     if _pool is not None:
         return
 
     active_settings = settings or get_settings()
+    _configure_query_logging(active_settings)
     _pool = ConnectionPool(
         conninfo=active_settings.database_url,
         min_size=active_settings.db_pool_min_size,
         max_size=active_settings.db_pool_max_size,
         timeout=active_settings.db_pool_timeout_seconds,
         max_idle=active_settings.db_pool_max_idle_seconds,
-        kwargs={"row_factory": dict_row, "autocommit": True},
+        kwargs=_connection_kwargs(active_settings, TimedCursor),
+        configure=_prepare_on_connect(active_settings, prepared),
         open=False,
     )
     _pool.open(wait=True)
+    _init_read_db_pool(active_settings, prepared)
 
 
 def close_db_pool() -> None:
-    global _pool
+    global _pool, _read_pool
+    if _read_pool is not None:
+        _read_pool.close()
+        _read_pool = None
     if _pool is None:
         return
     _pool.close()
@@ -53,3 +223,171 @@ def get_db() -> Iterator[Connection[dict[str, Any]]]:
         )
     with _pool.connection() as connection:
         yield connection
+
+
+@contextmanager
+def db_connection() -> Iterator[Connection[dict[str, Any]]]:
+    """Primary connection for code that needs one only some of the time."""
+    yield from get_db()
+
+
+# ── Read replica ─────────────────────────────────────────────────────────────
+
+_REPLICA_LAG_SQL = """
+    select coalesce(
+      case
+        when not pg_is_in_recovery() then 0
+        when pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() then 0
+        else extract(epoch from now() - pg_last_xact_replay_timestamp())
+      end,
+      0
+    )::float8 as lag
+"""
+_REPLICA_CHECK_INTERVAL_SECONDS = 1.0
+
+_read_max_lag_seconds = 0.0
+# Callers (by hashed Authorization header) that wrote recently and must read
+# from the primary. Per process: another worker only has the lag bound.
+_recent_writers: TTLCache[str, bool] = TTLCache(max_size=0, ttl_seconds=0)
+_replica_checked_at = float("-inf")
+_replica_usable = False
+
+
+def _init_read_db_pool(settings: Settings, prepared: PreparedStatements) -> None:
+    global _read_pool, _read_max_lag_seconds, _recent_writers
+    if _read_pool is not None or not settings.database_read_url:
+        return
+
+    _read_max_lag_seconds = settings.db_read_max_lag_seconds
+    _recent_writers = TTLCache(max_size=10000, ttl_seconds=settings.db_read_your_writes_seconds)
+    _read_pool = ConnectionPool(
+        conninfo=settings.database_read_url,
+        min_size=settings.db_pool_min_size,
+        max_size=settings.db_read_pool_max_size,
+        timeout=settings.db_pool_timeout_seconds,
+        max_idle=settings.db_pool_max_idle_seconds,
+        kwargs=_connection_kwargs(settings, TimedCursor),
+        configure=_prepare_on_connect(settings, prepared),
+        open=False,
+    )
+    # Don't hold up startup on the replica; reads use the primary until it answers.
+    _read_pool.open(wait=False)
+
+
+def get_read_db_pool() -> ConnectionPool[Connection[dict[str, Any]]]:
+    if _read_pool is None:
+        raise RuntimeError("Read database pool is not configured.")
+    return _read_pool
+
+
+def _caller_key(authorization: str | None) -> str | None:
+    if not authorization:
+        return None
+    return hashlib.sha256(authorization.encode("utf-8")).hexdigest()
+
+
+def note_primary_write(authorization: str | None) -> None:
+    """Send this caller's reads to the primary for DB_READ_YOUR_WRITES_SECONDS."""
+    key = _caller_key(authorization)
+    if key is not None:
+        _recent_writers.set(key, True)
+
+
+def _check_replica(connection: Connection[dict[str, Any]]) -> bool:
+    global _replica_checked_at, _replica_usable
+    row = connection.execute(_REPLICA_LAG_SQL).fetchone()
+    lag = float(row["lag"]) if row else 0.0
+    usable = lag <= _read_max_lag_seconds
+    if usable and not _replica_usable:
+        logger.info("Read replica in use (lag %.1f s).", lag)
+    elif not usable and _replica_usable:
+        logger.warning("Read replica lagging %.1f s, reading from primary.", lag)
+    _replica_checked_at, _replica_usable = time.monotonic(), usable
+    return usable
+
+
+def _mark_replica_unusable() -> None:
+    global _replica_checked_at, _replica_usable
+    _replica_checked_at, _replica_usable = time.monotonic(), False
+
+
+def get_read_db(
+    authorization: str | None = Header(default=None, alias="Authorization"),
+) -> Iterator[Connection[dict[str, Any]]]:
+    """Connection for read-only endpoints: the replica when configured and fresh.
+
+    Falls back to the primary when no replica is configured, when its replay
+    lag exceeds DB_READ_MAX_LAG_SECONDS (checked at most once a second), when
+    it is unreachable, and for callers that wrote within the read-your-writes
+    window.
+    """
+    key = _caller_key(authorization)
+    if _read_pool is None or (key is not None and _recent_writers.get(key)):
+        yield from get_db()
+        return
+
+    check_due = time.monotonic() - _replica_checked_at >= _REPLICA_CHECK_INTERVAL_SECONDS
+    if check_due or _replica_usable:
+        with ExitStack() as stack:
+            try:
+                connection = stack.enter_context(_read_pool.connection(timeout=1.0))
+                usable = _check_replica(connection) if check_due else True
+            except (PoolTimeout, psycopg.OperationalError) as exc:
+                logger.warning("Read replica unavailable, reading from primary: %s", exc)
+                _mark_replica_unusable()
+                usable = False
+            if usable:
+                yield connection
+                return
+    yield from get_db()
+
+
+@contextmanager
+def read_db_connection(authorization: str | None = None) -> Iterator[Connection[dict[str, Any]]]:
+    """get_read_db for code outside request dependencies, e.g. a streaming body."""
+    yield from get_read_db(authorization)
+
+
+async def init_async_db_pool(settings: Settings | None = None, prepared: PreparedStatements = ()) -> None:
+    """Open the async pool; *prepared* statements are prepared on every new connection."""
+    global _async_pool
+    if _async_pool is not None:
+        return
+
+    active_settings = settings or get_settings()
+    _configure_query_logging(active_settings)
+    _async_pool = AsyncConnectionPool(
+        conninfo=active_settings.database_url,
+        min_size=active_settings.db_async_pool_min_size,
+        max_size=active_settings.db_async_pool_max_size,
+        timeout=active_settings.db_pool_timeout_seconds,
+        max_idle=active_settings.db_pool_max_idle_seconds,
+        kwargs=_connection_kwargs(active_settings, AsyncTimedCursor),
+        configure=_prepare_on_connect_async(active_settings, prepared),
+        open=False,
+    )
+    await _async_pool.open(wait=True)
+
+
+async def close_async_db_pool() -> None:
+    global _async_pool
+    if _async_pool is None:
+        return
+    await _async_pool.close()
+    _async_pool = None
+
+
+def get_async_db_pool() -> AsyncConnectionPool[AsyncConnection[dict[str, Any]]]:
+    if _async_pool is None:
+        raise RuntimeError("Async database pool is not initialized.")
+    return _async_pool
+
+
+async def get_async_db() -> AsyncIterator[AsyncConnection[dict[str, Any]]]:
+    if _async_pool is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Database pool is not initialized.",
+        )
+    async with _async_pool.connection() as connection:
+        yield connection
@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+
+import psycopg
+from psycopg import Connection
+from psycopg.types.json import Jsonb
+
+from .config import Settings
+from .db import get_db_pool
+
+logger = logging.getLogger(__name__)
+
+_MAX_FLUSH_ATTEMPTS = 3
+_RETRY_DELAY_SECONDS = 0.5
+
+
+class IngestQueueFull(Exception):
+    """Raised by IngestQueue.put() when the buffer is at capacity."""
+
+
+@dataclass(frozen=True)
+class QueuedEvent:
+    id: UUID
+    agent_id: UUID
+    workspace_id: UUID
+    type: str
+    message: str
+    cost: float
+    completed_actions: list[str]
+    created_at: datetime
+
+
+class IngestQueue:
+    """Write-behind buffer for POST /v1/events (INGEST_MODE=queued).
+
+    Request threads put() events with a server-assigned id and created_at and
+    return immediately; one writer thread drains the buffer and inserts up to
+    ``flush_max_rows`` events per transaction, waiting at most
+    ``flush_interval_ms`` for a group to fill, so a burst costs one commit
+    instead of one per event. Events still buffered when the process dies are
+    lost; close() drains whatever is left on graceful shutdown.
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        after_flush: Callable[[Connection[dict[str, Any]], list[QueuedEvent]], None],
+    ) -> None:
+        self._buffer: queue.Queue[QueuedEvent] = queue.Queue(maxsize=settings.ingest_queue_max_size)
+        self._flush_interval = settings.ingest_flush_interval_ms / 1000
+        self._flush_max_rows = settings.ingest_flush_max_rows
+        self._synchronous_commit = settings.ingest_synchronous_commit
+        self._drain_timeout = settings.ingest_drain_timeout_seconds
+        self._after_flush = after_flush
+        # Cost of events put() but not yet committed (or dropped), per workspace.
+        self._pending_cost: dict[UUID, float] = {}
+        self._pending_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def __len__(self) -> int:
+        return self._buffer.qsize()
+
+    def start(self) -> None:
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="ingest-writer", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        """Stop accepting work and flush the buffer, waiting up to the drain timeout."""
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._thread.join(self._drain_timeout)
+        if self._thread.is_alive():
+            logger.error(
+                "Ingest writer did not drain within %.1fs; %d buffered event(s) lost.",
+                self._drain_timeout,
+                self._buffer.qsize(),
+            )
+        self._thread = None
+
+    def put(self, event: QueuedEvent) -> None:
+        if self._stopping.is_set():
+            raise IngestQueueFull("Ingest queue is shutting down.")
+        # Counted before the writer can see the event, so it is never settled first.
+        self._add_pending_cost([event], 1)
+        try:
+            self._buffer.put_nowait(event)
+        except queue.Full:
+            self._add_pending_cost([event], -1)
+            raise IngestQueueFull("Ingest queue is full.") from None
+
+    def pending_cost(self, workspace_id: UUID) -> float:
+        """Cost of this workspace's events accepted here but not yet in the database."""
+        with self._pending_lock:
+            return self._pending_cost.get(workspace_id, 0.0)
+
+    def _add_pending_cost(self, events: list[QueuedEvent], sign: int) -> None:
+        with self._pending_lock:
+            for event in events:
+                if event.cost <= 0:
+                    continue
+                total = self._pending_cost.get(event.workspace_id, 0.0) + sign * event.cost
+                if total > 1e-9:
+                    self._pending_cost[event.workspace_id] = total
+                else:
+                    self._pending_cost.pop(event.workspace_id, None)
+
+    def _run(self) -> None:
+        while True:
+            group = self._next_group()
+            if group:
+                self._flush(group)
+            elif self._stopping.is_set():
+                return
+
+    def _next_group(self) -> list[QueuedEvent]:
+        """Block for the first event, then gather more until the group is full or the window closes."""
+        try:
+            first = self._buffer.get(timeout=self._flush_interval)
+        except queue.Empty:
+            return []
+        group = [first]
+        deadline = time.monotonic() + self._flush_interval
+        while len(group) < self._flush_max_rows:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                group.append(self._buffer.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return group
+
+    def _flush(self, group: list[QueuedEvent]) -> None:
+        try:
+            written = self._commit(group)
+        finally:
+            self._add_pending_cost(group, -1)
+        if not written:
+            return
+        try:
+            with get_db_pool().connection() as connection:
+                self._after_flush(connection, written)
+        except Exception:
+            logger.exception("Post-flush hook failed for %d event(s).", len(written))
+
+    def _commit(self, group: list[QueuedEvent]) -> list[QueuedEvent]:
+        """Insert *group*, retrying transient failures; returns the events written."""
+        for attempt in range(1, _MAX_FLUSH_ATTEMPTS + 1):
+            try:
+                with get_db_pool().connection() as connection:
+                    try:
+                        with connection.transaction():
+                            self._write(connection, group)
+                    except (psycopg.IntegrityError, psycopg.DataError):
+                        # One bad row (e.g. its agent was deleted meanwhile) must
+                        # not sink the rest of the group: retry row by row.
+                        return self._write_individually(connection, group)
+                return group
+            except psycopg.Error as exc:
+                if attempt == _MAX_FLUSH_ATTEMPTS:
+                    logger.error("Dropping %d queued event(s) after %d attempts: %s", len(group), attempt, exc)
+                    return []
+                logger.warning("Ingest flush failed (%s); retrying.", exc)
+                time.sleep(_RETRY_DELAY_SECONDS * attempt)
+        return []
+
+    def _write_individually(
+        self,
+        connection: Connection[dict[str, Any]],
+        group: list[QueuedEvent],
+    ) -> list[QueuedEvent]:
+        written: list[QueuedEvent] = []
+        for event in group:
+            try:
+                with connection.transaction():
+                    self._write(connection, [event])
+            except (psycopg.IntegrityError, psycopg.DataError) as exc:
+                logger.warning("Dropping queued event %s: %s", event.id, exc)
+            else:
+                written.append(event)
+        return written
+
+    def _write(self, connection: Connection[dict[str, Any]], group: list[QueuedEvent]) -> None:
+        connection.execute(
+            "select set_config('synchronous_commit', %s, true)",
+            (self._synchronous_commit,),
+        )
+        connection.execute(
+            """
+            insert into events (
+              id,
+              agent_id,
+              workspace_id,
+              type,
+              message,
+              cost,
+              completed_actions,
+              created_at
+            )
+            values """
+            + ", ".join(["(%s::uuid, %s::uuid, %s::uuid, %s, %s, %s, %s, %s)"] * len(group)),
+            [
+                value
+                for event in group
+                for value in (
+                    event.id,
+                    event.agent_id,
+                    event.workspace_id,
+                    event.type,
+                    event.message,
+                    event.cost,
+                    Jsonb(event.completed_actions),
+                    event.created_at,
+                )
+            ],
+        )
+        connection.execute(
+            """
+            update agents
+            set last_seen_at = now()
+            where id = any(%s::uuid[])
+            """,
+            (sorted({event.agent_id for event in group}),),
+        )
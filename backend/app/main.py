@@ -1,33 +1,61 @@
 from __future__ import annotations
 
 import asyncio
+import base64
+import binascii
+import csv
+import hashlib
+import io
+import itertools
+import json
 import secrets
 import ssl
 import threading
 import time
-from collections import defaultdict
+from collections.abc import Callable
 from contextlib import asynccontextmanager
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from decimal import Decimal
 import logging
-from typing import Any
+from typing import Any, Literal
 from urllib.parse import urlparse
-from uuid import UUID
+from uuid import UUID, uuid4
 
 import certifi
 
 import jwt
 import psycopg
-from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, Response, status
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, StreamingResponse
 from jwt import PyJWKClient, PyJWKClientError
-from psycopg import Connection
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from psycopg import AsyncConnection, Connection
 from psycopg.types.json import Jsonb
+from pydantic import BaseModel, ValidationError
+from starlette.concurrency import run_in_threadpool
 
+from .broadcast import Subscription, SubscriptionClosed, create_broadcaster
+from .cache import TTLCache
 from .config import get_settings
-from .db import close_db_pool, get_db, get_db_pool, init_db_pool
+from .db import (
+    close_async_db_pool,
+    close_db_pool,
+    db_connection,
+    get_async_db_pool,
+    get_db,
+    get_db_pool,
+    get_read_db,
+    get_read_db_pool,
+    init_async_db_pool,
+    init_db_pool,
+    note_primary_write,
+    read_db_connection,
+)
+from .ingest import IngestQueue, IngestQueueFull, QueuedEvent
+from .maintenance import EventsPartitionMaintainer
+from .metrics import MetricsMiddleware, StateCollector, registry as metrics_registry
 from .schemas import (
     AgentCreateRequest,
     AgentCreateResponse,
@@ -44,6 +72,8 @@ from .schemas import (
     CommsSendRequest,
     CommsStreamChunkRequest,
     CommsTypingRequest,
+    EventBatchIngestRequest,
+    EventBatchIngestResponse,
     EventIngestRequest,
     EventIngestResponse,
     InboxDecisionRequest,
@@ -76,10 +106,13 @@ logger = logging.getLogger(__name__)
 _warned_missing_cryptography = False
 
 # ── SSE broadcaster ───────────────────────────────────────────────────────────
-# Maps channel name → list of per-connection queues.
-# Sync request handlers call _sse_publish(); async SSE generators await queue.get().
-_sse_queues: dict[str, list[asyncio.Queue[str]]] = defaultdict(list)
-_sse_loop: asyncio.AbstractEventLoop | None = None
+# Maps channel name → list of per-connection bounded Subscriptions (see app/broadcast.py).
+# Sync request handlers call _sse_publish(); async SSE generators await subscription.get().
+# SSE_BROADCASTER=postgres fans out across workers/replicas via LISTEN/NOTIFY.
+_broadcaster = create_broadcaster(settings)
+
+# Pre-creates monthly events partitions and applies EVENTS_RETENTION_MONTHS.
+_partition_maintainer = EventsPartitionMaintainer(settings)
 
 # ── SSE short-lived token store ───────────────────────────────────────────────
 # Maps opaque token → (user_id, workspace_id, expiry_epoch_seconds).
@@ -88,15 +121,114 @@ _SSE_TOKEN_TTL = 30
 _sse_tokens: dict[str, tuple[UUID, UUID, float]] = {}
 
 
-def _sse_publish(channel: str, data: str = "update") -> None:
-    """Notify all SSE listeners on *channel* from a sync request handler."""
-    if _sse_loop is None:
+def _sse_publish(channel: str, data: str = "update", coalesce: bool = True) -> None:
+    """Notify all SSE listeners on *channel* from a sync request handler.
+
+    Identical pending notifications are coalesced; pass coalesce=False when
+    every message carries content the client must see.
+    """
+    _broadcaster.publish(channel, data, coalesce)
+
+
+def _sse_payload(kind: str, **fields: Any) -> str:
+    """JSON SSE payload, serialized once per publish and shared by every subscriber."""
+    body: dict[str, Any] = {"type": kind}
+    for key, value in fields.items():
+        if isinstance(value, list):
+            value = [item.model_dump(mode="json") if isinstance(item, BaseModel) else item for item in value]
+        elif isinstance(value, BaseModel):
+            value = value.model_dump(mode="json")
+        body[key] = value
+    return json.dumps(body, separators=(",", ":"), default=str)
+
+
+def _publish_events(workspace_id: UUID, events: list[AgentEventResponse]) -> None:
+    """Push new events to workspace subscribers and to per-agent subscribers."""
+    if not events:
         return
-    for q in list(_sse_queues.get(channel, [])):
-        try:
-            _sse_loop.call_soon_threadsafe(q.put_nowait, data)
-        except Exception:
-            pass
+    payload = _sse_payload("events", events=events)
+    _sse_publish(f"events:{workspace_id}", payload, coalesce=False)
+    by_agent: dict[UUID, list[AgentEventResponse]] = {}
+    for event in events:
+        by_agent.setdefault(event.agentId, []).append(event)
+    for agent_id, agent_events in by_agent.items():
+        agent_payload = payload if len(by_agent) == 1 else _sse_payload("events", events=agent_events)
+        _sse_publish(f"events:{workspace_id}:{agent_id}", agent_payload, coalesce=False)
+
+
+# Current day and month totals plus the month spend of the given agents, read
+# from workspace_spend_rollup after the new spend has committed.
+_SPEND_TOTALS_SQL = """
+    select
+      coalesce(sum(total_cost) filter (where bucket = 'day'), 0)::float8 as daily,
+      coalesce(sum(total_cost) filter (where bucket = 'month'), 0)::float8 as monthly,
+      coalesce(
+        jsonb_object_agg(agent_id, total_cost::float8)
+          filter (where bucket = 'month' and agent_id = any(%s::uuid[])),
+        '{}'::jsonb
+      ) as agents
+    from workspace_spend_rollup
+    where workspace_id = %s::uuid
+      and (
+        (bucket = 'day' and bucket_start = date_trunc('day', now())::date)
+        or (bucket = 'month' and bucket_start = date_trunc('month', now())::date)
+      )
+"""
+
+
+def _spend_payload(row: dict[str, Any] | None, agent_ids: list[UUID]) -> str:
+    agents = (row or {}).get("agents") or {}
+    return _sse_payload(
+        "spend",
+        daily=_to_float((row or {}).get("daily", 0)),
+        monthly=_to_float((row or {}).get("monthly", 0)),
+        agents=[
+            {"agentId": str(agent_id), "spend": _to_float(agents.get(str(agent_id), 0))}
+            for agent_id in agent_ids
+        ],
+    )
+
+
+def _publish_spend(
+    connection: Connection[dict[str, Any]],
+    workspace_id: UUID,
+    costs: dict[UUID, float],
+) -> None:
+    """Push the new spend totals; clients replace daily, monthly and the agents' breakdown rows.
+
+    Totals rather than increments, so a frame racing a refetch cannot count
+    the same event twice and the daily figure follows the day boundary.
+    """
+    agent_ids = [agent_id for agent_id, cost in costs.items() if cost > 0]
+    if not agent_ids:
+        return
+    row = connection.execute(_SPEND_TOTALS_SQL, (agent_ids, workspace_id), prepare=True).fetchone()
+    _sse_publish(f"spend:{workspace_id}", _spend_payload(row, agent_ids), coalesce=False)
+
+
+async def _publish_spend_async(
+    connection: AsyncConnection[dict[str, Any]],
+    workspace_id: UUID,
+    costs: dict[UUID, float],
+) -> None:
+    agent_ids = [agent_id for agent_id, cost in costs.items() if cost > 0]
+    if not agent_ids:
+        return
+    cursor = await connection.execute(_SPEND_TOTALS_SQL, (agent_ids, workspace_id), prepare=True)
+    _sse_publish(f"spend:{workspace_id}", _spend_payload(await cursor.fetchone(), agent_ids), coalesce=False)
+
+
+def _publish_inbox_items(workspace_id: UUID, items: list[InboxItemResponse]) -> None:
+    if items:
+        _sse_publish(f"inbox:{workspace_id}", _sse_payload("inbox", items=items), coalesce=False)
+
+
+def _sse_subscribe(channel: str) -> Subscription:
+    return _broadcaster.subscribe(channel)
+
+
+def _sse_unsubscribe(q: Subscription) -> None:
+    _broadcaster.unsubscribe(q)
 
 
 try:
@@ -112,6 +244,38 @@ class AuthenticatedUser:
     workspace_id: UUID
 
 
+@dataclass(frozen=True)
+class AgentIdentity:
+    agent_id: UUID
+    workspace_id: UUID
+
+
+# ── Agent token cache ─────────────────────────────────────────────────────────
+# Maps sha256 token hash → AgentIdentity so agent-facing calls skip the
+# agent_tokens + agents lookups. Revoke/delete invalidate explicitly on this
+# worker; other workers converge within AGENT_TOKEN_CACHE_TTL_SECONDS.
+_agent_token_cache: TTLCache[str, AgentIdentity] = TTLCache(
+    max_size=settings.agent_token_cache_max_size,
+    ttl_seconds=settings.agent_token_cache_ttl_seconds,
+)
+
+
+@dataclass(frozen=True)
+class _VerifiedUserToken:
+    claims: dict[str, Any]
+    user: AuthenticatedUser
+
+
+# ── Verified user JWT cache ───────────────────────────────────────────────────
+# Maps sha256(JWT) → decoded claims + resolved user, so dashboard polling skips
+# signature verification and the users lookup. Entries expire at the earlier of
+# USER_AUTH_CACHE_TTL_SECONDS and the token's own exp claim.
+_user_auth_cache: TTLCache[str, _VerifiedUserToken] = TTLCache(
+    max_size=settings.user_auth_cache_max_size,
+    ttl_seconds=settings.user_auth_cache_ttl_seconds,
+)
+
+
 def _to_float(value: Decimal | float | int | None) -> float:
     if value is None:
         return 0.0
@@ -196,10 +360,172 @@ def _check_and_fire_budget_alert(
     threading.Thread(
         target=_fire_budget_alert,
         args=(url, threshold, monthly_spend, monthly_budget, str(workspace_id)),
+        name="budget-alert",
         daemon=True,
     ).start()
 
 
+# RETURNING list that yields a full inbox row (see _inbox_from_row) from a tasks insert.
+_TASK_INBOX_RETURNING = """
+    returning id, agent_id, proposed_action, completed_actions, status, comment, created_at,
+      (select a.name from agents a where a.id = tasks.agent_id) as agent_name
+"""
+
+_MONTHLY_BUDGET_SQL = "select monthly_budget from users where workspace_id = %s::uuid limit 1"
+
+_MONTHLY_SPEND_SQL = """
+    select coalesce(sum(total_cost), 0)::float8 as monthly
+    from workspace_spend_rollup
+    where workspace_id = %s::uuid
+      and bucket = 'month'
+      and bucket_start = date_trunc('month', now())::date
+"""
+
+
+def _fetch_monthly_budget(
+    connection: Connection[dict[str, Any]],
+    workspace_id: UUID,
+) -> float | None:
+    row = connection.execute(_MONTHLY_BUDGET_SQL, (workspace_id,), prepare=True).fetchone()
+    if row is None:
+        return None
+    return _to_float(row["monthly_budget"])
+
+
+def _fetch_monthly_spend(
+    connection: Connection[dict[str, Any]],
+    workspace_id: UUID,
+) -> float:
+    row = connection.execute(_MONTHLY_SPEND_SQL, (workspace_id,), prepare=True).fetchone()
+    return _to_float((row or {}).get("monthly", 0))
+
+
+def _enforce_budget_cap(
+    connection: Connection[dict[str, Any]],
+    workspace_id: UUID,
+) -> None:
+    """Reject new spend with 402 if the workspace is at or over its monthly budget."""
+    monthly_budget = _fetch_monthly_budget(connection, workspace_id)
+    if not monthly_budget or monthly_budget <= 0:
+        return
+    if _fetch_monthly_spend(connection, workspace_id) >= monthly_budget:
+        raise HTTPException(
+            status_code=status.HTTP_402_PAYMENT_REQUIRED,
+            detail="Budget cap reached. No further spend is permitted until the workspace owner resets the budget.",
+        )
+
+
+def _check_budget_alert_after_spend(
+    connection: Connection[dict[str, Any]],
+    workspace_id: UUID,
+) -> None:
+    """Recompute month-to-date spend after new costed events and fire a budget alert if due."""
+    monthly_budget = _fetch_monthly_budget(connection, workspace_id)
+    if not monthly_budget or monthly_budget <= 0:
+        return
+    _check_and_fire_budget_alert(
+        connection,
+        workspace_id,
+        _fetch_monthly_spend(connection, workspace_id),
+        monthly_budget,
+    )
+
+
+# ── Queued ingest ─────────────────────────────────────────────────────────────
+# With INGEST_MODE=queued, POST /v1/events enqueues to the write-behind
+# IngestQueue (app/ingest.py) and checks the budget against per-workspace
+# counters refreshed every BUDGET_CACHE_TTL_SECONDS from the rollup plus this
+# worker's still-queued spend. Spend accepted by this worker on any path is
+# added locally, so the cap can only overshoot by what other workers accept
+# within one refresh window. Budget changes drop the counter.
+
+
+class _SpendCounter:
+    def __init__(self, budget: float | None, spend: float) -> None:
+        self.budget = budget
+        self.spend = spend
+        self._lock = threading.Lock()
+
+    def try_add(self, cost: float) -> bool:
+        with self._lock:
+            if self.budget and self.budget > 0 and self.spend >= self.budget:
+                return False
+            self.spend += cost
+            return True
+
+    def add(self, cost: float) -> None:
+        with self._lock:
+            self.spend += cost
+
+
+_budget_counters: TTLCache[UUID, _SpendCounter] = TTLCache(
+    max_size=10_000,
+    ttl_seconds=settings.budget_cache_ttl_seconds,
+)
+
+
+def _enforce_budget_cap_cached(
+    connection: Connection[dict[str, Any]],
+    workspace_id: UUID,
+    cost: float,
+) -> None:
+    counter = _budget_counters.get(workspace_id)
+    if counter is None:
+        # Queued events are not in the rollup yet. Read them first: an event
+        # committing in between is then counted twice rather than not at all.
+        queued = _ingest_queue.pending_cost(workspace_id) if _ingest_queue is not None else 0.0
+        counter = _budget_counters.setdefault(
+            workspace_id,
+            _SpendCounter(
+                _fetch_monthly_budget(connection, workspace_id),
+                queued + _fetch_monthly_spend(connection, workspace_id),
+            ),
+        )
+    if not counter.try_add(cost):
+        raise HTTPException(
+            status_code=status.HTTP_402_PAYMENT_REQUIRED,
+            detail="Budget cap reached. No further spend is permitted until the workspace owner resets the budget.",
+        )
+
+
+def _count_spend(workspace_id: UUID, cost: float) -> None:
+    """Add spend committed outside the queue to this worker's budget counter, if it has one."""
+    if cost > 0:
+        counter = _budget_counters.get(workspace_id)
+        if counter is not None:
+            counter.add(cost)
+
+
+def _after_ingest_flush(connection: Connection[dict[str, Any]], events: list[QueuedEvent]) -> None:
+    """Budget alerts and SSE fan-out for a committed group, once per workspace."""
+    events_by_workspace: dict[UUID, list[AgentEventResponse]] = {}
+    costs_by_workspace: dict[UUID, dict[UUID, float]] = {}
+    for event in events:
+        events_by_workspace.setdefault(event.workspace_id, []).append(
+            AgentEventResponse(
+                id=event.id,
+                agentId=event.agent_id,
+                type=event.type,
+                message=event.message,
+                cost=event.cost,
+                createdAt=event.created_at,
+            )
+        )
+        if event.cost > 0:
+            costs = costs_by_workspace.setdefault(event.workspace_id, {})
+            costs[event.agent_id] = costs.get(event.agent_id, 0.0) + event.cost
+    for workspace_id in costs_by_workspace:
+        _check_budget_alert_after_spend(connection, workspace_id)
+    for workspace_id, workspace_events in events_by_workspace.items():
+        _publish_events(workspace_id, workspace_events)
+        _publish_spend(connection, workspace_id, costs_by_workspace.get(workspace_id, {}))
+
+
+_ingest_queue: IngestQueue | None = (
+    IngestQueue(settings, _after_ingest_flush) if settings.ingest_mode == "queued" else None
+)
+
+
 def _compute_agent_status(last_seen: datetime | None) -> str:
     if last_seen is None:
         return "offline"
@@ -287,31 +613,166 @@ def _comms_message_from_row(row: dict[str, Any]) -> CommsMessageResponse:
     )
 
 
-def _require_agent_id(
+_AGENT_IN_WORKSPACE_SQL = "select 1 from agents where id = %s::uuid and workspace_id = %s::uuid"
+
+_AGENT_IDENTITY_SQL = """
+    select t.agent_id, a.workspace_id
+    from agent_tokens t
+    join agents a on a.id = t.agent_id
+    where t.token_hash = %s and t.revoked_at is null
+"""
+
+
+def _cache_agent_identity(token_hash: str, row: dict[str, Any] | None) -> AgentIdentity | None:
+    if row is None:
+        return None
+    identity = AgentIdentity(agent_id=row["agent_id"], workspace_id=row["workspace_id"])
+    _agent_token_cache.set(token_hash, identity)
+    return identity
+
+
+# ── Keyset pagination ─────────────────────────────────────────────────────────
+# List endpoints page on (created_at, id) and return the cursor for the next
+# page in the X-Next-Cursor response header, so list bodies stay plain arrays.
+
+_NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+@dataclass(frozen=True)
+class PageCursor:
+    created_at: datetime
+    id: UUID
+    rank: int | None = None  # leading sort bucket, e.g. pending-first inbox ordering
+
+
+def _encode_cursor(created_at: datetime, row_id: UUID, rank: int | None = None) -> str:
+    parts = [created_at.isoformat(), str(row_id)]
+    if rank is not None:
+        parts.append(str(rank))
+    return base64.urlsafe_b64encode("|".join(parts).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str | None) -> PageCursor | None:
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        parts = raw.split("|")
+        if len(parts) not in (2, 3):
+            raise ValueError("unexpected cursor shape")
+        return PageCursor(
+            created_at=datetime.fromisoformat(parts[0]),
+            id=UUID(parts[1]),
+            rank=int(parts[2]) if len(parts) == 3 else None,
+        )
+    except (ValueError, UnicodeDecodeError, binascii.Error):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor.")
+
+
+def _keyset_clause(alias: str, cursor: PageCursor | None) -> tuple[str, tuple[Any, ...]]:
+    """SQL fragment selecting rows strictly after *cursor* in (created_at desc, id desc) order.
+
+    The plain created_at bound lets Postgres use the (…, created_at DESC)
+    indexes as a range scan; the row comparison breaks ties on id.
+    """
+    if cursor is None:
+        return "", ()
+    return (
+        f"and {alias}.created_at <= %s and ({alias}.created_at, {alias}.id) < (%s, %s::uuid)",
+        (cursor.created_at, cursor.created_at, cursor.id),
+    )
+
+
+def _paginate(
+    response: Response,
+    rows: list[dict[str, Any]],
+    limit: int,
+    rank_of: Callable[[dict[str, Any]], int] | None = None,
+) -> list[dict[str, Any]]:
+    """Trim a limit+1 fetch to *limit* rows and set X-Next-Cursor when more remain."""
+    if len(rows) <= limit:
+        return rows
+    page = rows[:limit]
+    last = page[-1]
+    response.headers[_NEXT_CURSOR_HEADER] = _encode_cursor(
+        last["created_at"],
+        last["id"],
+        rank_of(last) if rank_of is not None else None,
+    )
+    return page
+
+
+def _lookup_agent_identity(
+    connection: Connection[dict[str, Any]],
+    token: str,
+) -> AgentIdentity | None:
+    token_hash = hash_agent_token(token)
+    cached = _agent_token_cache.get(token_hash)
+    if cached is not None:
+        return cached
+    row = connection.execute(_AGENT_IDENTITY_SQL, (token_hash,), prepare=True).fetchone()
+    return _cache_agent_identity(token_hash, row)
+
+
+async def _lookup_agent_identity_async(
+    connection: AsyncConnection[dict[str, Any]],
+    token: str,
+) -> AgentIdentity | None:
+    token_hash = hash_agent_token(token)
+    cached = _agent_token_cache.get(token_hash)
+    if cached is not None:
+        return cached
+    cursor = await connection.execute(_AGENT_IDENTITY_SQL, (token_hash,), prepare=True)
+    return _cache_agent_identity(token_hash, await cursor.fetchone())
+
+
+def _invalidate_agent_token_cache(agent_id: UUID) -> None:
+    _agent_token_cache.discard_where(lambda identity: identity.agent_id == agent_id)
+
+
+def _require_agent(
     connection: Connection[dict[str, Any]],
     x_agent_token: str | None,
-) -> UUID:
+) -> AgentIdentity:
     if not x_agent_token:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Missing X-Agent-Token header.",
         )
 
-    token_hash = hash_agent_token(x_agent_token)
-    row = connection.execute(
-        """
-        select agent_id
-        from agent_tokens
-        where token_hash = %s and revoked_at is null
-        """,
-        (token_hash,),
-    ).fetchone()
-    if row is None:
+    identity = _lookup_agent_identity(connection, x_agent_token)
+    if identity is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or revoked agent token.",
+        )
+    return identity
+
+
+async def _require_agent_async(
+    connection: AsyncConnection[dict[str, Any]],
+    x_agent_token: str | None,
+) -> AgentIdentity:
+    if not x_agent_token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Missing X-Agent-Token header.",
+        )
+
+    identity = await _lookup_agent_identity_async(connection, x_agent_token)
+    if identity is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or revoked agent token.",
         )
-    return row["agent_id"]
+    return identity
+
+
+def _require_agent_id(
+    connection: Connection[dict[str, Any]],
+    x_agent_token: str | None,
+) -> UUID:
+    return _require_agent(connection, x_agent_token).agent_id
 
 
 def _extract_bearer_token(authorization: str | None) -> str:
@@ -400,31 +861,39 @@ def _decode_with_supabase_jwks(token: str) -> dict[str, Any] | None:
 
 
 def _decode_user_token(token: str) -> dict[str, Any]:
-    try:
-        return jwt.decode(
-            token,
-            settings.supabase_jwt_secret,
-            algorithms=["HS256"],
-            options={"verify_aud": False},
-        )
-    except jwt.ExpiredSignatureError:
-        raise
-    except jwt.InvalidTokenError as hs_error:
+    # Route on the header alg: an HS256 attempt against an asymmetric token can
+    # never succeed, so only symmetric tokens go through the shared secret.
+    algorithm = jwt.get_unverified_header(token).get("alg")
+    if isinstance(algorithm, str) and not algorithm.upper().startswith("HS"):
         try:
             jwks_payload = _decode_with_supabase_jwks(token)
         except (jwt.InvalidTokenError, PyJWKClientError) as jwks_error:
-            logger.warning("JWKS fallback failed: %s: %s", jwks_error.__class__.__name__, jwks_error)
+            logger.warning("JWKS verification failed: %s: %s", jwks_error.__class__.__name__, jwks_error)
             jwks_payload = None
-        if jwks_payload is not None:
-            return jwks_payload
-        raise hs_error
+        if jwks_payload is None:
+            raise jwt.InvalidTokenError(f"Unable to verify {algorithm} token via JWKS.")
+        return jwks_payload
+
+    return jwt.decode(
+        token,
+        settings.supabase_jwt_secret,
+        algorithms=["HS256"],
+        options={"verify_aud": False},
+    )
 
 
 def _require_user_auth(
+    request: Request,
     authorization: str | None = Header(default=None, alias="Authorization"),
-    connection: Connection[dict[str, Any]] = Depends(get_db),
 ) -> AuthenticatedUser:
     token = _extract_bearer_token(authorization)
+    if request.method not in ("GET", "HEAD", "OPTIONS"):
+        note_primary_write(authorization)
+    cache_key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    cached = _user_auth_cache.get(cache_key)
+    if cached is not None:
+        return cached.user
+
     try:
         payload = _decode_user_token(token)
     except (jwt.ExpiredSignatureError, jwt.InvalidTokenError) as error:
@@ -480,14 +949,17 @@ def _require_user_auth(
             detail="Invalid or expired token.",
         )
 
-    row = connection.execute(
-        """
-        select id, email, workspace_id
-        from users
-        where id = %s::uuid
-        """,
-        (user_id,),
-    ).fetchone()
+    # Borrow a connection only on a cache miss, so read routes served by the
+    # replica do not also pin a primary connection for the whole request.
+    with db_connection() as connection:
+        row = connection.execute(
+            """
+            select id, email, workspace_id
+            from users
+            where id = %s::uuid
+            """,
+            (user_id,),
+        ).fetchone()
     if row is None:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -499,11 +971,18 @@ def _require_user_auth(
             detail="User is not assigned to a workspace.",
         )
 
-    return AuthenticatedUser(
+    user = AuthenticatedUser(
         id=row["id"],
         email=row["email"],
         workspace_id=row["workspace_id"],
     )
+    exp = payload.get("exp")
+    _user_auth_cache.set(
+        cache_key,
+        _VerifiedUserToken(claims=payload, user=user),
+        ttl_seconds=float(exp) - time.time() if isinstance(exp, (int, float)) else None,
+    )
+    return user
 
 
 def _require_user_auth_sse(
@@ -559,19 +1038,13 @@ def _fetch_agent(
           a.status,
           a.description,
           a.created_at,
-          coalesce(sum(e.cost), 0)::float8 as total_spend,
-          greatest(
-            max(e.created_at),
-            (select max(created_at) from commands where agent_id = a.id),
-            (select max(created_at) from comms_messages where agent_id = a.id)
-          ) as last_seen,
-          count(e.id)::int as events_count,
+          a.total_spend::float8 as total_spend,
+          a.last_activity_at as last_seen,
+          a.events_count,
           t.token_hash
         from agents a
-        left join events e on e.agent_id = a.id
         left join agent_tokens t on t.agent_id = a.id and t.revoked_at is null
         where a.id = %s::uuid and a.workspace_id = %s::uuid
-        group by a.id, a.name, a.status, a.description, a.created_at, t.token_hash
         """,
         (agent_id, workspace_id),
     ).fetchone()
@@ -582,14 +1055,22 @@ def _fetch_agent(
 
 @asynccontextmanager
 async def lifespan(_: FastAPI):
-    global _sse_loop
-    _sse_loop = asyncio.get_running_loop()
-    init_db_pool(settings)
+    init_db_pool(settings, prepared=_PREPARED_STATEMENTS)
+    await init_async_db_pool(settings, prepared=_PREPARED_STATEMENTS)
+    await _broadcaster.start()
+    await _partition_maintainer.start()
+    if _ingest_queue is not None:
+        _ingest_queue.start()
     try:
         yield
     finally:
+        if _ingest_queue is not None:
+            # Drain before the broadcaster and pools go away; the writer needs both.
+            await asyncio.to_thread(_ingest_queue.close)
+        await _partition_maintainer.stop()
+        await _broadcaster.stop()
+        await close_async_db_pool()
         close_db_pool()
-        _sse_loop = None
 
 
 app = FastAPI(title="Jarvis Mission Control API", version="1.0.0", lifespan=lifespan)
@@ -600,6 +1081,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[_NEXT_CURSOR_HEADER],
+)
+app.add_middleware(MetricsMiddleware)
+
+metrics_registry.register(
+    StateCollector(
+        pools={"sync": get_db_pool, "async": get_async_db_pool, "read": get_read_db_pool},
+        sse_channels=lambda: {channel: len(queues) for channel, queues in list(_broadcaster.queues.items())},
+        sse_tokens=lambda: len(_sse_tokens),
+        sse_overflows=lambda: _broadcaster.overflows,
+        ingest_queue_depth=lambda: len(_ingest_queue) if _ingest_queue is not None else None,
+    )
 )
 
 
@@ -624,6 +1117,19 @@ def healthz() -> dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics(authorization: str | None = Header(default=None)) -> Response:
+    """Prometheus exposition for this worker process."""
+    if settings.metrics_token is not None:
+        scheme, _, token = (authorization or "").partition(" ")
+        if scheme.lower() != "bearer" or not verify_control_plane_token(token, settings.metrics_token):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid or missing metrics bearer token.",
+            )
+    return Response(generate_latest(metrics_registry), media_type=CONTENT_TYPE_LATEST)
+
+
 @app.post("/v1/sse-token")
 def issue_sse_token(
     auth_user: AuthenticatedUser = Depends(_require_user_auth),
@@ -641,7 +1147,7 @@ def issue_sse_token(
 @app.get("/v1/agents", response_model=list[AgentResponse])
 def list_agents(
     auth_user: AuthenticatedUser = Depends(_require_user_auth),
-    connection: Connection[dict[str, Any]] = Depends(get_db),
+    connection: Connection[dict[str, Any]] = Depends(get_read_db),
 ) -> list[AgentResponse]:
     rows = connection.execute(
         """
@@ -651,19 +1157,13 @@ def list_agents(
           a.status,
           a.description,
           a.created_at,
-          coalesce(sum(e.cost), 0)::float8 as total_spend,
-          greatest(
-            max(e.created_at),
-            (select max(created_at) from commands where agent_id = a.id),
-            (select max(created_at) from comms_messages where agent_id = a.id)
-          ) as last_seen,
-          count(e.id)::int as events_count,
+          a.total_spend::float8 as total_spend,
+          a.last_activity_at as last_seen,
+          a.events_count,
           t.token_hash
         from agents a
-        left join events e on e.agent_id = a.id
         left join agent_tokens t on t.agent_id = a.id and t.revoked_at is null
         where a.workspace_id = %s::uuid
-        group by a.id, a.name, a.status, a.description, a.created_at, t.token_hash
         order by a.created_at desc
         """,
         (auth_user.workspace_id,),
@@ -761,6 +1261,7 @@ def delete_agent(
     ).fetchone()
     if deleted is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Agent not found.")
+    _invalidate_agent_token_cache(agent_id)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
@@ -793,6 +1294,7 @@ def revoke_agent_token(
         """,
         (agent_id,),
     )
+    _invalidate_agent_token_cache(agent_id)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
@@ -832,12 +1334,15 @@ def reveal_agent_token(
 @app.get("/v1/agents/{agent_id}/events", response_model=list[AgentEventResponse])
 def get_agent_events(
     agent_id: UUID,
+    response: Response,
     limit: int = Query(default=100, ge=1, le=500),
+    cursor: str | None = Query(default=None),
     auth_user: AuthenticatedUser = Depends(_require_user_auth),
-    connection: Connection[dict[str, Any]] = Depends(get_db),
+    connection: Connection[dict[str, Any]] = Depends(get_read_db),
 ) -> list[AgentEventResponse]:
+    keyset_sql, keyset_params = _keyset_clause("e", _decode_cursor(cursor))
     rows = connection.execute(
-        """
+        f"""
         select
           e.id,
           e.agent_id,
@@ -846,107 +1351,219 @@ def get_agent_events(
           e.cost,
           e.created_at
         from events e
-        join agents a on a.id = e.agent_id
         where e.agent_id = %s::uuid
-          and a.workspace_id = %s::uuid
-        order by e.created_at desc
+          and e.workspace_id = %s::uuid
+          {keyset_sql}
+        order by e.created_at desc, e.id desc
         limit %s
         """,
-        (agent_id, auth_user.workspace_id, limit),
+        (agent_id, auth_user.workspace_id, *keyset_params, limit + 1),
     ).fetchall()
-    return [_event_from_row(row) for row in rows]
+    return [_event_from_row(row) for row in _paginate(response, rows, limit)]
 
 
 @app.get("/v1/events", response_model=list[AgentEventResponse])
 def list_events(
+    response: Response,
     limit: int = Query(default=50, ge=1, le=500),
     agentId: UUID | None = Query(default=None),
+    cursor: str | None = Query(default=None),
     auth_user: AuthenticatedUser = Depends(_require_user_auth),
-    connection: Connection[dict[str, Any]] = Depends(get_db),
+    connection: Connection[dict[str, Any]] = Depends(get_read_db),
 ) -> list[AgentEventResponse]:
     if agentId:
-        rows = connection.execute(
-            """
-            select
-              e.id,
-              e.agent_id,
-              e.type,
-              e.message,
-              e.cost,
-              e.created_at
-            from events e
-            join agents a on a.id = e.agent_id
-            where e.agent_id = %s::uuid
-              and a.workspace_id = %s::uuid
-            order by e.created_at desc
-            limit %s
-            """,
-            (agentId, auth_user.workspace_id, limit),
-        ).fetchall()
-    else:
-        rows = connection.execute(
-            """
-            select
-              e.id,
-              e.agent_id,
-              e.type,
-              e.message,
-              e.cost,
-              e.created_at
-            from events e
-            join agents a on a.id = e.agent_id
-            where a.workspace_id = %s::uuid
-            order by e.created_at desc
-            limit %s
-            """,
-            (auth_user.workspace_id, limit),
-        ).fetchall()
+        return get_agent_events(
+            agent_id=agentId,
+            response=response,
+            limit=limit,
+            cursor=cursor,
+            auth_user=auth_user,
+            connection=connection,
+        )
 
-    return [_event_from_row(row) for row in rows]
+    keyset_sql, keyset_params = _keyset_clause("e", _decode_cursor(cursor))
+    rows = connection.execute(
+        f"""
+        select
+          e.id,
+          e.agent_id,
+          e.type,
+          e.message,
+          e.cost,
+          e.created_at
+        from events e
+        where e.workspace_id = %s::uuid
+          {keyset_sql}
+        order by e.created_at desc, e.id desc
+        limit %s
+        """,
+        (auth_user.workspace_id, *keyset_params, limit + 1),
+    ).fetchall()
+
+    return [_event_from_row(row) for row in _paginate(response, rows, limit)]
+
+
+_EVENT_EXPORT_COLUMNS = (
+    "id",
+    "agentId",
+    "agentName",
+    "type",
+    "message",
+    "cost",
+    "requiresApproval",
+    "proposedAction",
+    "createdAt",
+)
+_EVENT_EXPORT_BATCH_ROWS = 2000
+# Longest a stalled download may hold its export transaction open.
+_EVENT_EXPORT_IDLE_TIMEOUT = "60s"
+
+
+def _export_event_record(row: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "id": str(row["id"]),
+        "agentId": str(row["agent_id"]),
+        "agentName": row["agent_name"],
+        "type": row["type"],
+        "message": row["message"],
+        "cost": _to_float(row["cost"]),
+        "requiresApproval": row["requires_approval"],
+        "proposedAction": row["proposed_action"],
+        "createdAt": row["created_at"].isoformat(),
+    }
+
+
+def _stream_event_export(
+    workspace_id: UUID,
+    from_ts: datetime,
+    to_ts: datetime,
+    export_format: str,
+    authorization: str | None,
+):
+    """Yield export chunks straight from a server-side cursor.
+
+    Runs on its own connection, chosen like get_read_db (replica when usable,
+    else primary): request-scoped dependencies are torn down before a
+    StreamingResponse body is sent. The first chunk is produced only after
+    the first batch is fetched, so export_events can surface connection
+    errors before the response starts.
+
+    The cursor holds one transaction for the whole download. On a hot
+    standby a long one can be cancelled by recovery conflicts (see
+    max_standby_streaming_delay / hot_standby_feedback), which cuts the file
+    short; and a client that stops reading would pin it indefinitely, so
+    the transaction is ended after _EVENT_EXPORT_IDLE_TIMEOUT of no fetches.
+    """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=_EVENT_EXPORT_COLUMNS) if export_format == "csv" else None
+    if writer is not None:
+        writer.writeheader()
+
+    with read_db_connection(authorization) as conn:
+        # Named (server-side) cursors need a transaction; autocommit is the pool default.
+        with conn.transaction():
+            conn.execute(f"set local idle_in_transaction_session_timeout = '{_EVENT_EXPORT_IDLE_TIMEOUT}'")
+            with conn.cursor(name="events_export") as cur:
+                cur.itersize = _EVENT_EXPORT_BATCH_ROWS
+                cur.execute(
+                    """
+                    select
+                      e.id,
+                      e.agent_id,
+                      a.name as agent_name,
+                      e.type,
+                      e.message,
+                      e.cost,
+                      e.requires_approval,
+                      e.proposed_action,
+                      e.created_at
+                    from events e
+                    join agents a on a.id = e.agent_id
+                    where e.workspace_id = %s::uuid
+                      and e.created_at >= %s
+                      and e.created_at < %s
+                    order by e.created_at asc, e.id asc
+                    """,
+                    (workspace_id, from_ts, to_ts),
+                )
+                while True:
+                    rows = cur.fetchmany(_EVENT_EXPORT_BATCH_ROWS)
+                    for row in rows:
+                        record = _export_event_record(row)
+                        if writer is not None:
+                            writer.writerow(record)
+                        else:
+                            buffer.write(json.dumps(record))
+                            buffer.write("\n")
+                    yield buffer.getvalue()
+                    if len(rows) < _EVENT_EXPORT_BATCH_ROWS:
+                        return
+                    buffer.seek(0)
+                    buffer.truncate()
+
+
+@app.get("/v1/events/export")
+def export_events(
+    from_ts: datetime = Query(alias="from"),
+    to_ts: datetime | None = Query(default=None, alias="to"),
+    export_format: Literal["ndjson", "csv"] = Query(default="ndjson", alias="format"),
+    authorization: str | None = Header(default=None, alias="Authorization"),
+    auth_user: AuthenticatedUser = Depends(_require_user_auth),
+) -> StreamingResponse:
+    """Stream every event in [from, to) as NDJSON or CSV with flat memory use.
+
+    Bounds without a UTC offset (e.g. ?from=2026-10-01) are taken as UTC.
+    """
+    if from_ts.tzinfo is None:
+        from_ts = from_ts.replace(tzinfo=timezone.utc)
+    if to_ts is not None and to_ts.tzinfo is None:
+        to_ts = to_ts.replace(tzinfo=timezone.utc)
+    end = to_ts or datetime.now(timezone.utc)
+    if end <= from_ts:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'to' must be later than 'from'.",
+        )
+    media_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    filename = f"events-{from_ts:%Y%m%d}-{end:%Y%m%d}.{export_format}"
+    chunks = _stream_event_export(auth_user.workspace_id, from_ts, end, export_format, authorization)
+    # Connect and fetch the first batch now: a database error is then a
+    # proper error response, not a 200 with a truncated body.
+    first = next(chunks)
+    return StreamingResponse(
+        itertools.chain((first,), chunks),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
 
 @app.post("/v1/events", response_model=EventIngestResponse, status_code=status.HTTP_201_CREATED)
 def ingest_event(
     payload: EventIngestRequest,
+    response: Response,
     x_agent_token: str | None = Header(default=None, alias="X-Agent-Token"),
     connection: Connection[dict[str, Any]] = Depends(get_db),
 ) -> EventIngestResponse:
-    agent_id = _require_agent_id(connection, x_agent_token)
-    
-    # Fetch agent's workspace_id
-    agent_row = connection.execute(
-        "select workspace_id from agents where id = %s::uuid",
-        (agent_id,),
-    ).fetchone()
-    if agent_row is None:
-        raise HTTPException(status_code=404, detail="Agent not found.")
-    agent_workspace_id = agent_row["workspace_id"]
+    agent = _require_agent(connection, x_agent_token)
+    return _ingest_event(connection, agent, payload, response)
+
+
+def _ingest_event(
+    connection: Connection[dict[str, Any]],
+    agent: AgentIdentity,
+    payload: EventIngestRequest,
+    response: Response,
+) -> EventIngestResponse:
+    agent_id = agent.agent_id
+    agent_workspace_id = agent.workspace_id
+
+    # Approval requests need their task id in the response, so they always take the sync path.
+    if _ingest_queue is not None and not payload.requiresApproval:
+        return _enqueue_event(connection, agent, payload, response)
 
     # Enforce budget cap: reject events with cost if workspace is at or over budget
     if payload.cost and payload.cost > 0:
-        budget_row = connection.execute(
-            "select monthly_budget from users where workspace_id = %s::uuid limit 1",
-            (agent_workspace_id,),
-        ).fetchone()
-        if budget_row is not None:
-            monthly_budget = float(budget_row["monthly_budget"] or 0)
-            if monthly_budget > 0:
-                monthly_spend_row = connection.execute(
-                    """
-                    select coalesce(sum(e.cost), 0)::float8 as monthly
-                    from events e
-                    join agents a on a.id = e.agent_id
-                    where a.workspace_id = %s::uuid
-                      and e.created_at >= date_trunc('month', now())
-                    """,
-                    (agent_workspace_id,),
-                ).fetchone()
-                monthly_spend = float((monthly_spend_row or {}).get("monthly") or 0)
-                if monthly_spend >= monthly_budget:
-                    raise HTTPException(
-                        status_code=status.HTTP_402_PAYMENT_REQUIRED,
-                        detail="Budget cap reached. No further spend is permitted until the workspace owner resets the budget.",
-                    )
+        _enforce_budget_cap(connection, agent_workspace_id)
 
     proposed_action = payload.proposedAction if payload.requiresApproval else None
 
@@ -995,6 +1612,7 @@ def ingest_event(
     )
 
     task_id: UUID | None = None
+    task_row: dict[str, Any] | None = None
     if payload.requiresApproval:
         if not payload.proposedAction:
             raise HTTPException(
@@ -1005,8 +1623,8 @@ def ingest_event(
             """
             insert into tasks (agent_id, workspace_id, proposed_action, completed_actions, status)
             values (%s::uuid, %s::uuid, %s, %s, 'pending')
-            returning id
-            """,
+            """
+            + _TASK_INBOX_RETURNING,
             (agent_id, agent_workspace_id, payload.proposedAction, Jsonb(payload.completedActions)),
         ).fetchone()
         if task_row is None:
@@ -1015,41 +1633,213 @@ def ingest_event(
         connection.execute(
             """
             update agents
-            set status = 'waiting_approval'
+            set status = 'waiting_approval'
+            where id = %s::uuid
+            """,
+            (agent_id,),
+        )
+
+    if payload.cost and payload.cost > 0:
+        _count_spend(agent_workspace_id, payload.cost)
+        _check_budget_alert_after_spend(connection, agent_workspace_id)
+
+    event = _event_from_row(event_row)
+    _publish_events(agent_workspace_id, [event])
+    _publish_spend(connection, agent_workspace_id, {agent_id: event.cost})
+    if task_row is not None:
+        _publish_inbox_items(agent_workspace_id, [_inbox_from_row(task_row)])
+
+    return EventIngestResponse(event=event, taskId=task_id)
+
+
+def _enqueue_event(
+    connection: Connection[dict[str, Any]],
+    agent: AgentIdentity,
+    payload: EventIngestRequest,
+    response: Response,
+) -> EventIngestResponse:
+    if payload.cost > 0:
+        _enforce_budget_cap_cached(connection, agent.workspace_id, payload.cost)
+    event = QueuedEvent(
+        id=uuid4(),
+        agent_id=agent.agent_id,
+        workspace_id=agent.workspace_id,
+        type=payload.type,
+        message=payload.message,
+        cost=payload.cost,
+        completed_actions=payload.completedActions,
+        created_at=datetime.now(timezone.utc),
+    )
+    assert _ingest_queue is not None
+    try:
+        _ingest_queue.put(event)
+    except IngestQueueFull as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"{exc} Retry shortly.",
+            headers={"Retry-After": "1"},
+        ) from None
+    response.status_code = status.HTTP_202_ACCEPTED
+    return EventIngestResponse(
+        event=AgentEventResponse(
+            id=event.id,
+            agentId=event.agent_id,
+            type=event.type,
+            message=event.message,
+            cost=event.cost,
+            createdAt=event.created_at,
+        ),
+    )
+
+
+@app.post(
+    "/v1/events/batch",
+    response_model=EventBatchIngestResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+def ingest_event_batch(
+    payload: EventBatchIngestRequest,
+    x_agent_token: str | None = Header(default=None, alias="X-Agent-Token"),
+    connection: Connection[dict[str, Any]] = Depends(get_db),
+) -> EventBatchIngestResponse:
+    """Ingest many events for one agent in a single transaction.
+
+    Budget enforcement, the last_seen_at bump and SSE notifications run once
+    per batch rather than once per event. The batch is all-or-nothing.
+    """
+    agent = _require_agent(connection, x_agent_token)
+    agent_id = agent.agent_id
+    agent_workspace_id = agent.workspace_id
+
+    items = payload.events
+    for index, item in enumerate(items):
+        if item.requiresApproval and not item.proposedAction:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"events[{index}]: proposedAction is required when requiresApproval is true.",
+            )
+    has_cost = any(item.cost > 0 for item in items)
+    approval_items = [item for item in items if item.requiresApproval]
+
+    with connection.transaction():
+        if has_cost:
+            _enforce_budget_cap(connection, agent_workspace_id)
+
+        # Ids are assigned here so the RETURNING rows (which come back in no
+        # guaranteed order) can be paired with the request items. Rows are
+        # inserted in ordinality order and clock_timestamp() is read per row,
+        # so created_at never decreases through the batch; at microsecond
+        # resolution neighbouring events can still share a timestamp.
+        event_ids = [uuid4() for _ in items]
+        inserted = connection.execute(
+            """
+            insert into events (
+              id,
+              agent_id,
+              workspace_id,
+              type,
+              message,
+              cost,
+              requires_approval,
+              proposed_action,
+              completed_actions,
+              created_at
+            )
+            select
+              i.id,
+              %s::uuid,
+              %s::uuid,
+              i.type,
+              i.message,
+              i.cost,
+              i.requires_approval,
+              i.proposed_action,
+              i.completed_actions,
+              clock_timestamp()
+            from unnest(
+              %s::uuid[], %s::text[], %s::text[], %s::numeric[], %s::boolean[], %s::text[], %s::jsonb[]
+            ) with ordinality as i(
+              id, type, message, cost, requires_approval, proposed_action, completed_actions, ordinal
+            )
+            order by i.ordinal
+            returning
+              id,
+              agent_id,
+              type,
+              message,
+              cost,
+              created_at
+            """,
+            (
+                agent_id,
+                agent_workspace_id,
+                event_ids,
+                [item.type for item in items],
+                [item.message for item in items],
+                [item.cost for item in items],
+                [item.requiresApproval for item in items],
+                [item.proposedAction if item.requiresApproval else None for item in items],
+                [Jsonb(item.completedActions) for item in items],
+            ),
+        ).fetchall()
+        if len(inserted) != len(items):
+            raise HTTPException(status_code=500, detail="Failed to ingest events.")
+        rows_by_id = {row["id"]: row for row in inserted}
+        event_rows = [rows_by_id[event_id] for event_id in event_ids]
+
+        task_ids = [uuid4() for _ in approval_items]
+        task_rows: list[dict[str, Any]] = []
+        if approval_items:
+            inserted = connection.execute(
+                """
+                insert into tasks (id, agent_id, workspace_id, proposed_action, completed_actions, status, created_at)
+                select t.id, %s::uuid, %s::uuid, t.proposed_action, t.completed_actions, 'pending', clock_timestamp()
+                from unnest(%s::uuid[], %s::text[], %s::jsonb[])
+                  with ordinality as t(id, proposed_action, completed_actions, ordinal)
+                order by t.ordinal
+                """
+                + _TASK_INBOX_RETURNING,
+                (
+                    agent_id,
+                    agent_workspace_id,
+                    task_ids,
+                    [item.proposedAction for item in approval_items],
+                    [Jsonb(item.completedActions) for item in approval_items],
+                ),
+            ).fetchall()
+            if len(inserted) != len(approval_items):
+                raise HTTPException(status_code=500, detail="Failed to create approval tasks.")
+            task_rows_by_id = {row["id"]: row for row in inserted}
+            task_rows = [task_rows_by_id[task_id] for task_id in task_ids]
+
+        connection.execute(
+            """
+            update agents
+            set last_seen_at = now(),
+                status = case when %s then 'waiting_approval' else status end
             where id = %s::uuid
             """,
-            (agent_id,),
+            (bool(approval_items), agent_id),
         )
 
-    if payload.cost and payload.cost > 0:
-        monthly_row = connection.execute(
-            """
-            select coalesce(sum(e.cost), 0)::float8 as monthly
-            from events e
-            join agents a on a.id = e.agent_id
-            where a.workspace_id = %s::uuid
-              and e.created_at >= date_trunc('month', now())
-            """,
-            (agent_workspace_id,),
-        ).fetchone()
-        budget_row = connection.execute(
-            "select monthly_budget from users where workspace_id = %s::uuid limit 1",
-            (agent_workspace_id,),
-        ).fetchone()
-        if monthly_row is not None and budget_row is not None:
-            _check_and_fire_budget_alert(
-                connection,
-                agent_workspace_id,
-                _to_float((monthly_row or {}).get("monthly", 0)),
-                _to_float(budget_row.get("monthly_budget", 0)),
-            )
+        if has_cost:
+            _check_budget_alert_after_spend(connection, agent_workspace_id)
 
-    _sse_publish(f"events:{agent_workspace_id}", str(agent_id))
-    _sse_publish(f"spend:{agent_workspace_id}")
-    if payload.requiresApproval:
-        _sse_publish(f"inbox:{agent_workspace_id}")
+    pending_task_ids = iter(task_ids)
+    results = [
+        EventIngestResponse(
+            event=_event_from_row(row),
+            taskId=next(pending_task_ids) if item.requiresApproval else None,
+        )
+        for item, row in zip(items, event_rows)
+    ]
 
-    return EventIngestResponse(event=_event_from_row(event_row), taskId=task_id)
+    _count_spend(agent_workspace_id, sum(item.cost for item in items))
+    _publish_events(agent_workspace_id, [result.event for result in results])
+    _publish_spend(connection, agent_workspace_id, {agent_id: sum(result.event.cost for result in results)})
+    _publish_inbox_items(agent_workspace_id, [_inbox_from_row(row) for row in task_rows])
+
+    return EventBatchIngestResponse(events=results)
 
 
 @app.post("/v1/webhook/{agent_token}", include_in_schema=False)
@@ -1070,14 +1860,8 @@ def webhook_ingest_event(
     x_agent_token: str | None = Header(default=None, alias="X-Agent-Token"),
     connection: Connection[dict[str, Any]] = Depends(get_db),
 ) -> WebhookEventResponse:
-    agent_id = _require_agent_id(connection, x_agent_token)
-
-    agent_row = connection.execute(
-        "select workspace_id from agents where id = %s::uuid",
-        (agent_id,),
-    ).fetchone()
-    if agent_row is None:
-        raise HTTPException(status_code=404, detail="Agent not found.")
+    agent = _require_agent(connection, x_agent_token)
+    agent_id = agent.agent_id
 
     event_row = connection.execute(
         """
@@ -1096,7 +1880,7 @@ def webhook_ingest_event(
         """,
         (
             agent_id,
-            agent_row["workspace_id"],
+            agent.workspace_id,
             payload.type,
             payload.message,
             payload.cost,
@@ -1112,41 +1896,26 @@ def webhook_ingest_event(
     )
 
     if payload.cost and payload.cost > 0:
-        monthly_row = connection.execute(
-            """
-            select coalesce(sum(e.cost), 0)::float8 as monthly
-            from events e
-            join agents a on a.id = e.agent_id
-            where a.workspace_id = %s::uuid
-              and e.created_at >= date_trunc('month', now())
-            """,
-            (agent_row["workspace_id"],),
-        ).fetchone()
-        budget_row = connection.execute(
-            "select monthly_budget from users where workspace_id = %s::uuid limit 1",
-            (agent_row["workspace_id"],),
-        ).fetchone()
-        if monthly_row is not None and budget_row is not None:
-            _check_and_fire_budget_alert(
-                connection,
-                agent_row["workspace_id"],
-                _to_float((monthly_row or {}).get("monthly", 0)),
-                _to_float(budget_row.get("monthly_budget", 0)),
-            )
+        _count_spend(agent.workspace_id, payload.cost)
+        _check_budget_alert_after_spend(connection, agent.workspace_id)
 
     return WebhookEventResponse(ok=True, eventId=event_row["id"])
 
 
 @app.get("/v1/inbox", response_model=list[InboxItemResponse])
 def list_inbox(
+    response: Response,
     status_filter: InboxStatus | None = Query(default=None, alias="status"),
     limit: int = Query(default=100, ge=1, le=500),
+    cursor: str | None = Query(default=None),
     auth_user: AuthenticatedUser = Depends(_require_user_auth),
-    connection: Connection[dict[str, Any]] = Depends(get_db),
+    connection: Connection[dict[str, Any]] = Depends(get_read_db),
 ) -> list[InboxItemResponse]:
+    page_cursor = _decode_cursor(cursor)
     if status_filter:
+        keyset_sql, keyset_params = _keyset_clause("t", page_cursor)
         rows = connection.execute(
-            """
+            f"""
             select
               t.id,
               t.agent_id,
@@ -1159,36 +1928,61 @@ def list_inbox(
             from tasks t
             join agents a on a.id = t.agent_id
             where t.status = %s
-              and a.workspace_id = %s::uuid
-            order by t.created_at desc
-            limit %s
-            """,
-            (status_filter, auth_user.workspace_id, limit),
-        ).fetchall()
-    else:
-        rows = connection.execute(
-            """
-            select
-              t.id,
-              t.agent_id,
-              a.name as agent_name,
-              t.proposed_action,
-              t.completed_actions,
-              t.status,
-              t.comment,
-              t.created_at
-            from tasks t
-            join agents a on a.id = t.agent_id
-            where a.workspace_id = %s::uuid
-            order by
-              case when t.status = 'pending' then 0 else 1 end,
-              t.created_at desc
+              and t.workspace_id = %s::uuid
+              {keyset_sql}
+            order by t.created_at desc, t.id desc
             limit %s
             """,
-            (auth_user.workspace_id, limit),
+            (status_filter, auth_user.workspace_id, *keyset_params, limit + 1),
         ).fetchall()
+        return [_inbox_from_row(row) for row in _paginate(response, rows, limit)]
+
+    # Pending items first, so the cursor carries the status bucket as a leading key.
+    keyset_sql = ""
+    keyset_params: tuple[Any, ...] = ()
+    if page_cursor is not None:
+        keyset_sql = """
+              and (
+                case when t.status = 'pending' then 0 else 1 end > %s
+                or (
+                  case when t.status = 'pending' then 0 else 1 end = %s
+                  and (t.created_at, t.id) < (%s, %s::uuid)
+                )
+              )
+        """
+        rank = page_cursor.rank or 0
+        keyset_params = (rank, rank, page_cursor.created_at, page_cursor.id)
+    rows = connection.execute(
+        f"""
+        select
+          t.id,
+          t.agent_id,
+          a.name as agent_name,
+          t.proposed_action,
+          t.completed_actions,
+          t.status,
+          t.comment,
+          t.created_at
+        from tasks t
+        join agents a on a.id = t.agent_id
+        where t.workspace_id = %s::uuid
+          {keyset_sql}
+        order by
+          case when t.status = 'pending' then 0 else 1 end,
+          t.created_at desc,
+          t.id desc
+        limit %s
+        """,
+        (auth_user.workspace_id, *keyset_params, limit + 1),
+    ).fetchall()
 
-    return [_inbox_from_row(row) for row in rows]
+    page = _paginate(
+        response,
+        rows,
+        limit,
+        rank_of=lambda row: 0 if row["status"] == "pending" else 1,
+    )
+    return [_inbox_from_row(row) for row in page]
 
 
 @app.post("/v1/inbox/{item_id}/decision", response_model=InboxItemResponse)
@@ -1261,8 +2055,6 @@ def decide_inbox_item(
                 detail="A decision command already exists for this inbox item.",
             )
 
-        _sse_publish(f"commands:{task_row['agent_id']}")
-
         pending_count_row = connection.execute(
             """
             select count(*)::int as pending_count
@@ -1282,6 +2074,9 @@ def decide_inbox_item(
             ("waiting_approval" if pending_count > 0 else "running", task_row["agent_id"]),
         )
 
+    # Publish after commit so a listener on another worker can already see the command.
+    _sse_publish(f"commands:{task_row['agent_id']}")
+
     updated_row = connection.execute(
         """
         select
@@ -1308,7 +2103,7 @@ def decide_inbox_item(
 @app.get("/v1/spend", response_model=SpendResponse)
 def get_spend(
     auth_user: AuthenticatedUser = Depends(_require_user_auth),
-    connection: Connection[dict[str, Any]] = Depends(get_db),
+    connection: Connection[dict[str, Any]] = Depends(get_read_db),
 ) -> SpendResponse:
     user = connection.execute(
         """
@@ -1321,23 +2116,21 @@ def get_spend(
     if user is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found.")
 
-    daily_row = connection.execute(
-        """
-        select coalesce(sum(e.cost), 0)::float8 as daily
-        from events e
-        join agents a on a.id = e.agent_id
-        where a.workspace_id = %s::uuid
-          and e.created_at >= date_trunc('day', now())
-        """,
-        (auth_user.workspace_id,),
-    ).fetchone()
-    monthly_row = connection.execute(
+    totals_row = connection.execute(
         """
-        select coalesce(sum(e.cost), 0)::float8 as monthly
-        from events e
-        join agents a on a.id = e.agent_id
-        where a.workspace_id = %s::uuid
-          and e.created_at >= date_trunc('month', now())
+        select
+          coalesce(sum(total_cost) filter (
+            where bucket = 'day' and bucket_start = date_trunc('day', now())::date
+          ), 0)::float8 as daily,
+          coalesce(sum(total_cost) filter (
+            where bucket = 'month' and bucket_start = date_trunc('month', now())::date
+          ), 0)::float8 as monthly
+        from workspace_spend_rollup
+        where workspace_id = %s::uuid
+          and (
+            (bucket = 'day' and bucket_start = date_trunc('day', now())::date)
+            or (bucket = 'month' and bucket_start = date_trunc('month', now())::date)
+          )
         """,
         (auth_user.workspace_id,),
     ).fetchone()
@@ -1346,20 +2139,22 @@ def get_spend(
         select
           a.id as agent_id,
           a.name as agent_name,
-          coalesce(sum(e.cost), 0)::float8 as spend
+          coalesce(r.total_cost, 0)::float8 as spend
         from agents a
-        left join events e on e.agent_id = a.id
-          and e.created_at >= date_trunc('month', now())
+        left join workspace_spend_rollup r
+          on r.workspace_id = a.workspace_id
+          and r.agent_id = a.id
+          and r.bucket = 'month'
+          and r.bucket_start = date_trunc('month', now())::date
         where a.workspace_id = %s::uuid
-        group by a.id, a.name
         order by spend desc, a.name asc
         """,
         (auth_user.workspace_id,),
     ).fetchall()
 
     return SpendResponse(
-        daily=_to_float((daily_row or {}).get("daily", 0)),
-        monthly=_to_float((monthly_row or {}).get("monthly", 0)),
+        daily=_to_float((totals_row or {}).get("daily", 0)),
+        monthly=_to_float((totals_row or {}).get("monthly", 0)),
         budget=_to_float(user["monthly_budget"]),
         alertWebhookUrl=user["budget_alert_webhook_url"],
         agentBreakdown=[
@@ -1390,7 +2185,10 @@ def update_budget(
     ).fetchone()
     if updated is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found.")
-    _sse_publish(f"spend:{auth_user.workspace_id}")
+    _budget_counters.pop(auth_user.workspace_id)
+    _sse_publish(
+        f"spend:{auth_user.workspace_id}", _sse_payload("budget", budget=payload.budget), coalesce=False
+    )
     return get_spend(auth_user=auth_user, connection=connection)
 
 
@@ -1465,6 +2263,28 @@ def get_commands(
     return [_command_from_row(row) for row in rows]
 
 
+_PENDING_COMMANDS_SQL = """
+    select id, agent_id, kind, payload, status, created_at,
+           source_task_id, source_message_id
+    from commands
+    where agent_id = %s::uuid and status = 'pending'
+    order by created_at asc
+"""
+
+_NIL_UUID = UUID(int=0)
+
+# Hot constant statements, prepared on every pooled connection as it opens.
+# Callers pass prepare=True so a connection that was opened before a
+# statement was added still prepares it on first use.
+_PREPARED_STATEMENTS = (
+    (_AGENT_IDENTITY_SQL, ("",)),
+    (_AGENT_IN_WORKSPACE_SQL, (_NIL_UUID, _NIL_UUID)),
+    (_MONTHLY_BUDGET_SQL, (_NIL_UUID,)),
+    (_MONTHLY_SPEND_SQL, (_NIL_UUID,)),
+    (_PENDING_COMMANDS_SQL, (_NIL_UUID,)),
+)
+
+
 @app.get("/v1/commands/listen", response_model=list[CommandResponse])
 async def listen_for_commands(
     timeout: int = Query(default=30, ge=1, le=60),
@@ -1472,51 +2292,34 @@ async def listen_for_commands(
 ) -> list[CommandResponse]:
     """Long-poll: holds the connection until a command arrives or timeout expires.
     The DB connection is released while waiting — zero idle DB cost."""
-    pool = get_db_pool()
-
-    # Phase 1: auth + check for already-pending commands, then release connection
-    with pool.connection() as conn:
-        agent_id = _require_agent_id(conn, x_agent_token)
-        rows = conn.execute(
-            """
-            select id, agent_id, kind, payload, status, created_at,
-                   source_task_id, source_message_id
-            from commands
-            where agent_id = %s::uuid and status = 'pending'
-            order by created_at asc
-            """,
-            (agent_id,),
-        ).fetchall()
+    pool = get_async_db_pool()
 
-    if rows:
-        return [_command_from_row(row) for row in rows]
+    async with pool.connection() as conn:
+        agent_id = (await _require_agent_async(conn, x_agent_token)).agent_id
 
-    # Phase 2: wait for a signal — no DB connection held during the wait
+    # Subscribe before the first fetch so a command created in between still wakes us.
     channel = f"commands:{agent_id}"
-    q: asyncio.Queue[str] = asyncio.Queue()
-    _sse_queues[channel].append(q)
+    q = _sse_subscribe(channel)
     try:
-        await asyncio.wait_for(q.get(), timeout=float(timeout))
-    except asyncio.TimeoutError:
-        pass
-    finally:
+        # Phase 1: check for already-pending commands, then release connection
+        async with pool.connection() as conn:
+            cursor = await conn.execute(_PENDING_COMMANDS_SQL, (agent_id,), prepare=True)
+            rows = await cursor.fetchall()
+        if rows:
+            return [_command_from_row(row) for row in rows]
+
+        # Phase 2: wait for a signal — no DB connection held during the wait
         try:
-            _sse_queues[channel].remove(q)
-        except ValueError:
+            await asyncio.wait_for(q.get(), timeout=float(timeout))
+        except asyncio.TimeoutError:
             pass
+    finally:
+        _sse_unsubscribe(q)
 
     # Phase 3: fetch after signal (or timeout) — new short-lived connection
-    with pool.connection() as conn:
-        rows = conn.execute(
-            """
-            select id, agent_id, kind, payload, status, created_at,
-                   source_task_id, source_message_id
-            from commands
-            where agent_id = %s::uuid and status = 'pending'
-            order by created_at asc
-            """,
-            (agent_id,),
-        ).fetchall()
+    async with pool.connection() as conn:
+        cursor = await conn.execute(_PENDING_COMMANDS_SQL, (agent_id,), prepare=True)
+        rows = await cursor.fetchall()
     return [_command_from_row(row) for row in rows]
 
 
@@ -1527,6 +2330,14 @@ def acknowledge_command(
     connection: Connection[dict[str, Any]] = Depends(get_db),
 ) -> CommandResponse:
     agent_id = _require_agent_id(connection, x_agent_token)
+    return _ack_command(connection, agent_id, command_id)
+
+
+def _ack_command(
+    connection: Connection[dict[str, Any]],
+    agent_id: UUID,
+    command_id: UUID,
+) -> CommandResponse:
     row = connection.execute(
         """
         update commands
@@ -1568,7 +2379,7 @@ def acknowledge_command(
 @app.get("/v1/comms/agents", response_model=list[CommsAgentSummary])
 def list_comms_agents(
     auth_user: AuthenticatedUser = Depends(_require_user_auth),
-    connection: Connection[dict[str, Any]] = Depends(get_db),
+    connection: Connection[dict[str, Any]] = Depends(get_read_db),
 ) -> list[CommsAgentSummary]:
     rows = connection.execute(
         """
@@ -1621,47 +2432,46 @@ def list_comms_agents(
 @app.get("/v1/comms/agents/{agent_id}/messages", response_model=list[CommsMessageResponse])
 def get_comms_messages(
     agent_id: UUID,
+    response: Response,
     limit: int = Query(default=100, ge=1, le=500),
     before: datetime | None = Query(default=None),
+    cursor: str | None = Query(default=None),
     auth_user: AuthenticatedUser = Depends(_require_user_auth),
     connection: Connection[dict[str, Any]] = Depends(get_db),
 ) -> list[CommsMessageResponse]:
+    """Return the newest page of messages (oldest → newest) older than *cursor* or *before*.
+
+    X-Next-Cursor points at the page just before this one for scrolling back.
+    """
     # Verify agent belongs to workspace
     agent_check = connection.execute(
-        "select 1 from agents where id = %s::uuid and workspace_id = %s::uuid",
+        _AGENT_IN_WORKSPACE_SQL,
         (agent_id, auth_user.workspace_id),
+        prepare=True,
     ).fetchone()
     if agent_check is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Agent not found.")
 
-    if before:
-        rows = connection.execute(
-            """
-            select
-              id, agent_id, sender, content, message_status,
-              reply_to_message_id, metadata, created_at, delivered_at, responded_at
-            from comms_messages
-            where agent_id = %s::uuid and workspace_id = %s::uuid and created_at < %s
-            order by created_at asc
-            limit %s
-            """,
-            (agent_id, auth_user.workspace_id, before, limit),
-        ).fetchall()
-    else:
-        rows = connection.execute(
-            """
-            select
-              id, agent_id, sender, content, message_status,
-              reply_to_message_id, metadata, created_at, delivered_at, responded_at
-            from comms_messages
-            where agent_id = %s::uuid and workspace_id = %s::uuid
-            order by created_at asc
-            limit %s
-            """,
-            (agent_id, auth_user.workspace_id, limit),
-        ).fetchall()
+    keyset_sql, keyset_params = _keyset_clause("m", _decode_cursor(cursor))
+    if before and not keyset_sql:
+        keyset_sql, keyset_params = "and m.created_at < %s", (before,)
+
+    rows = connection.execute(
+        f"""
+        select
+          m.id, m.agent_id, m.sender, m.content, m.message_status,
+          m.reply_to_message_id, m.metadata, m.created_at, m.delivered_at, m.responded_at
+        from comms_messages m
+        where m.workspace_id = %s::uuid and m.agent_id = %s::uuid
+          {keyset_sql}
+        order by m.created_at desc, m.id desc
+        limit %s
+        """,
+        (auth_user.workspace_id, agent_id, *keyset_params, limit + 1),
+    ).fetchall()
 
-    return [_comms_message_from_row(row) for row in rows]
+    page = _paginate(response, rows, limit)
+    return [_comms_message_from_row(row) for row in reversed(page)]
 
 
 @app.post(
@@ -1677,8 +2487,9 @@ def send_comms_message(
 ) -> CommsMessageResponse:
     # Verify agent belongs to workspace
     agent_check = connection.execute(
-        "select 1 from agents where id = %s::uuid and workspace_id = %s::uuid",
+        _AGENT_IN_WORKSPACE_SQL,
         (agent_id, auth_user.workspace_id),
+        prepare=True,
     ).fetchone()
     if agent_check is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Agent not found.")
@@ -1733,15 +2544,9 @@ def post_comms_reply(
     x_agent_token: str | None = Header(default=None, alias="X-Agent-Token"),
     connection: Connection[dict[str, Any]] = Depends(get_db),
 ) -> CommsMessageResponse:
-    agent_id = _require_agent_id(connection, x_agent_token)
-
-    agent_row = connection.execute(
-        "select workspace_id from agents where id = %s::uuid",
-        (agent_id,),
-    ).fetchone()
-    if agent_row is None:
-        raise HTTPException(status_code=404, detail="Agent not found.")
-    workspace_id = agent_row["workspace_id"]
+    agent = _require_agent(connection, x_agent_token)
+    agent_id = agent.agent_id
+    workspace_id = agent.workspace_id
 
     # Validate reply_to_message belongs to this agent
     if payload.replyToMessageId:
@@ -1796,6 +2601,22 @@ def post_comms_reply(
     return _comms_message_from_row(msg_row)
 
 
+def _publish_comms_typing(agent: AgentIdentity, is_typing: bool) -> None:
+    _sse_publish(
+        f"comms:{agent.workspace_id}",
+        _sse_payload("typing", agentId=str(agent.agent_id), isTyping=is_typing),
+        coalesce=False,
+    )
+
+
+def _publish_comms_chunk(agent: AgentIdentity, content: str) -> None:
+    _sse_publish(
+        f"comms:{agent.workspace_id}",
+        _sse_payload("chunk", agentId=str(agent.agent_id), content=content),
+        coalesce=False,
+    )
+
+
 @app.post("/v1/comms/typing", status_code=status.HTTP_204_NO_CONTENT, response_class=Response)
 def post_comms_typing(
     payload: CommsTypingRequest,
@@ -1803,17 +2624,8 @@ def post_comms_typing(
     connection: Connection[dict[str, Any]] = Depends(get_db),
 ) -> Response:
     """Agent signals typing status to the dashboard. No DB write — ephemeral SSE signal only."""
-    agent_id = _require_agent_id(connection, x_agent_token)
-    workspace_row = connection.execute(
-        "select workspace_id from agents where id = %s::uuid", (agent_id,)
-    ).fetchone()
-    if workspace_row is None:
-        raise HTTPException(status_code=404, detail="Agent not found.")
-    import json as _json
-    _sse_publish(
-        f"comms:{workspace_row['workspace_id']}",
-        _json.dumps({"type": "typing", "agentId": str(agent_id), "isTyping": payload.isTyping}),
-    )
+    agent = _require_agent(connection, x_agent_token)
+    _publish_comms_typing(agent, payload.isTyping)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
@@ -1824,17 +2636,8 @@ def post_comms_stream_chunk(
     connection: Connection[dict[str, Any]] = Depends(get_db),
 ) -> Response:
     """Agent streams a token chunk to the dashboard. No DB write — ephemeral SSE only."""
-    agent_id = _require_agent_id(connection, x_agent_token)
-    workspace_row = connection.execute(
-        "select workspace_id from agents where id = %s::uuid", (agent_id,)
-    ).fetchone()
-    if workspace_row is None:
-        raise HTTPException(status_code=404, detail="Agent not found.")
-    import json as _json
-    _sse_publish(
-        f"comms:{workspace_row['workspace_id']}",
-        _json.dumps({"type": "chunk", "agentId": str(agent_id), "content": payload.content}),
-    )
+    agent = _require_agent(connection, x_agent_token)
+    _publish_comms_chunk(agent, payload.content)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
@@ -1849,33 +2652,99 @@ _SSE_HEADERS = {
 }
 
 
-async def _sse_generator(channel: str, filter_data: str | None = None):
-    """Yield SSE frames for *channel*; sends a keepalive comment every 30 s."""
-    q: asyncio.Queue[str] = asyncio.Queue()
-    _sse_queues[channel].append(q)
+def _sse_last_event_id(
+    last_event_id_header: str | None = Header(default=None, alias="Last-Event-ID"),
+    last_event_id: str | None = Query(default=None, max_length=64),
+) -> str | None:
+    # EventSource resends the header on its own reconnects; clients that open
+    # a new stream (new single-use token) pass the id in the query instead.
+    return last_event_id_header or last_event_id
+
+
+async def _sse_generator(channels: dict[str, str | None], last_event_id: str | None = None):
+    """Yield SSE frames for *channels*; sends a keepalive comment every 30 s.
+
+    *channels* maps broadcaster channels to the SSE event type their frames
+    are tagged with; None sends untagged ("message") frames.
+
+    Data-carrying channels send JSON deltas the client applies in place:
+    {"type": "events", "events": [...]}, {"type": "spend", "daily": n, "monthly": n, "agents": [...]},
+    {"type": "budget", "budget": n} and {"type": "inbox", "items": [...]}.
+    "connected", "resync" and any other payload mean "refetch".
+
+    A subscriber that falls SSE_QUEUE_MAX_SIZE messages behind gets a single
+    "resync" message (clients refetch on it) or, with
+    SSE_SLOW_CONSUMER_POLICY=disconnect, the stream ends and the client
+    reconnects.
+
+    Every frame after "connected" carries an id. Reconnecting with
+    *last_event_id* replays the frames missed since instead of "connected",
+    or sends a single "resync" when they have left the replay buffer.
+    """
+    q = _broadcaster.subscribe_many(tuple(channels), last_event_id)
     try:
-        yield "data: connected\n\n"
+        if q.resumed is None:
+            yield "data: connected\n\n"
         while True:
             try:
-                data = await asyncio.wait_for(q.get(), timeout=30.0)
-                if filter_data is None or data == filter_data:
-                    yield f"data: {data}\n\n"
+                channel, seq, data = await asyncio.wait_for(q.get(), timeout=30.0)
+                event = channels[channel]
+                tag = f"event: {event}\n" if event else ""
+                yield f"{tag}id: {_broadcaster.event_id(seq)}\ndata: {data}\n\n"
             except asyncio.TimeoutError:
                 yield ": keepalive\n\n"
+            except SubscriptionClosed:
+                return
     finally:
-        try:
-            _sse_queues[channel].remove(q)
-        except ValueError:
-            pass
+        _sse_unsubscribe(q)
+
+
+_STREAM_CHANNELS = ("events", "comms", "inbox", "spend")
+
+
+@app.get("/v1/stream")
+async def stream(
+    channels: str = Query(default=",".join(_STREAM_CHANNELS), max_length=64),
+    agent_id: UUID | None = Query(default=None),
+    last_event_id: str | None = Depends(_sse_last_event_id),
+    auth_user: AuthenticatedUser = Depends(_require_user_auth_sse),
+) -> StreamingResponse:
+    """One SSE connection for several dashboard channels.
+
+    *channels* is a comma-separated subset of events, comms, inbox and
+    spend; each frame's SSE event type names the channel it came from.
+    "connected" is sent untagged. *agent_id* narrows events to one agent.
+    """
+    names = list(dict.fromkeys(name.strip() for name in channels.split(",") if name.strip()))
+    if not names or any(name not in _STREAM_CHANNELS for name in names):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"channels must be a comma-separated subset of: {', '.join(_STREAM_CHANNELS)}.",
+        )
+    topics: dict[str, str | None] = {}
+    for name in names:
+        topic = f"{name}:{auth_user.workspace_id}"
+        if name == "events" and agent_id:
+            topic = f"{topic}:{agent_id}"
+        topics[topic] = name
+    return StreamingResponse(
+        _sse_generator(topics, last_event_id),
+        media_type="text/event-stream",
+        headers=_SSE_HEADERS,
+    )
 
 
 @app.get("/v1/stream/events")
 async def stream_events(
-    agent_id: str | None = Query(default=None),
+    agent_id: UUID | None = Query(default=None),
+    last_event_id: str | None = Depends(_sse_last_event_id),
     auth_user: AuthenticatedUser = Depends(_require_user_auth_sse),
 ) -> StreamingResponse:
+    channel = f"events:{auth_user.workspace_id}"
+    if agent_id:
+        channel = f"{channel}:{agent_id}"
     return StreamingResponse(
-        _sse_generator(f"events:{auth_user.workspace_id}", filter_data=agent_id),
+        _sse_generator({channel: None}, last_event_id),
         media_type="text/event-stream",
         headers=_SSE_HEADERS,
     )
@@ -1883,10 +2752,11 @@ async def stream_events(
 
 @app.get("/v1/stream/comms")
 async def stream_comms(
+    last_event_id: str | None = Depends(_sse_last_event_id),
     auth_user: AuthenticatedUser = Depends(_require_user_auth_sse),
 ) -> StreamingResponse:
     return StreamingResponse(
-        _sse_generator(f"comms:{auth_user.workspace_id}"),
+        _sse_generator({f"comms:{auth_user.workspace_id}": None}, last_event_id),
         media_type="text/event-stream",
         headers=_SSE_HEADERS,
     )
@@ -1894,10 +2764,11 @@ async def stream_comms(
 
 @app.get("/v1/stream/inbox")
 async def stream_inbox(
+    last_event_id: str | None = Depends(_sse_last_event_id),
     auth_user: AuthenticatedUser = Depends(_require_user_auth_sse),
 ) -> StreamingResponse:
     return StreamingResponse(
-        _sse_generator(f"inbox:{auth_user.workspace_id}"),
+        _sse_generator({f"inbox:{auth_user.workspace_id}": None}, last_event_id),
         media_type="text/event-stream",
         headers=_SSE_HEADERS,
     )
@@ -1905,15 +2776,220 @@ async def stream_inbox(
 
 @app.get("/v1/stream/spend")
 async def stream_spend(
+    last_event_id: str | None = Depends(_sse_last_event_id),
     auth_user: AuthenticatedUser = Depends(_require_user_auth_sse),
 ) -> StreamingResponse:
     return StreamingResponse(
-        _sse_generator(f"spend:{auth_user.workspace_id}"),
+        _sse_generator({f"spend:{auth_user.workspace_id}": None}, last_event_id),
         media_type="text/event-stream",
         headers=_SSE_HEADERS,
     )
 
 
+# ============================================================================
+# Agent WebSocket
+# ============================================================================
+
+_AGENT_WS_AUTH_TIMEOUT_SECONDS = 10.0
+# How often a connected agent's token is looked up again, so revocation
+# closes the socket (served from the agent token cache most of the time).
+_AGENT_WS_REAUTH_SECONDS = 30.0
+
+
+async def _agent_ws_identity(websocket: WebSocket) -> tuple[str, AgentIdentity] | None:
+    """Token from the X-Agent-Token header, or else a first {"type": "auth"} frame."""
+    token = websocket.headers.get("x-agent-token")
+    if not token:
+        try:
+            frame = json.loads(
+                await asyncio.wait_for(websocket.receive_text(), timeout=_AGENT_WS_AUTH_TIMEOUT_SECONDS)
+            )
+        except (asyncio.TimeoutError, KeyError, ValueError):
+            return None
+        if isinstance(frame, dict) and frame.get("type") == "auth" and isinstance(frame.get("token"), str):
+            token = frame["token"]
+    if not token:
+        return None
+    async with get_async_db_pool().connection() as conn:
+        identity = await _lookup_agent_identity_async(conn, token)
+    return (token, identity) if identity is not None else None
+
+
+class _AgentSocket:
+    """One authenticated agent connection: pushes its commands, applies its frames.
+
+    Frames from the agent are handled one at a time, in order, so an event
+    logged before a chunk reaches the dashboard first.
+    """
+
+    def __init__(self, websocket: WebSocket, token: str, agent: AgentIdentity) -> None:
+        self.websocket = websocket
+        self.agent = agent
+        self._token = token
+        self._send_lock = asyncio.Lock()
+        # Pending commands already pushed on this socket; resent after a reconnect.
+        self._delivered: set[UUID] = set()
+
+    async def send(self, frame: dict[str, Any]) -> None:
+        async with self._send_lock:
+            await self.websocket.send_text(json.dumps(frame, separators=(",", ":"), default=str))
+
+    async def run(self) -> None:
+        await self.send({"type": "ready", "agentId": self.agent.agent_id, "workspaceId": self.agent.workspace_id})
+        tasks = {asyncio.create_task(self._receive()), asyncio.create_task(self._push_commands())}
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        for task in done:
+            exc = task.exception()
+            if exc is not None and not isinstance(exc, WebSocketDisconnect):
+                logger.warning("Agent WebSocket for %s failed: %r", self.agent.agent_id, exc)
+                await self._close(status.WS_1011_INTERNAL_ERROR, "Internal error.")
+
+    async def _close(self, code: int, reason: str) -> None:
+        try:
+            await self.websocket.close(code=code, reason=reason)
+        except RuntimeError:
+            pass  # already closed
+
+    async def _receive(self) -> None:
+        while True:
+            try:
+                text = await self.websocket.receive_text()
+            except KeyError:
+                text = ""  # binary frame; answered with an error like any non-JSON frame
+            await self._handle(text)
+
+    async def _push_commands(self) -> None:
+        pool = get_async_db_pool()
+        agent_id = self.agent.agent_id
+        q = _sse_subscribe(f"commands:{agent_id}")
+        try:
+            checked = time.monotonic()
+            while True:
+                async with pool.connection() as conn:
+                    cursor = await conn.execute(_PENDING_COMMANDS_SQL, (agent_id,), prepare=True)
+                    rows = await cursor.fetchall()
+                # Forget commands that stopped being pending (acked over HTTP, cancelled).
+                self._delivered &= {row["id"] for row in rows}
+                for row in rows:
+                    if row["id"] not in self._delivered:
+                        self._delivered.add(row["id"])
+                        await self.send({"type": "command", "command": _command_from_row(row).model_dump(mode="json")})
+                try:
+                    await asyncio.wait_for(q.get(), timeout=_AGENT_WS_REAUTH_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                except SubscriptionClosed:
+                    await self._close(status.WS_1013_TRY_AGAIN_LATER, "Fell behind; reconnect.")
+                    return
+                if time.monotonic() - checked >= _AGENT_WS_REAUTH_SECONDS:
+                    async with pool.connection() as conn:
+                        identity = await _lookup_agent_identity_async(conn, self._token)
+                    if identity is None:
+                        await self._close(status.WS_1008_POLICY_VIOLATION, "Invalid or revoked agent token.")
+                        return
+                    checked = time.monotonic()
+        finally:
+            _sse_unsubscribe(q)
+
+    async def _handle(self, text: str) -> None:
+        request_id: Any = None
+        result: dict[str, Any] = {}
+        try:
+            try:
+                frame = json.loads(text)
+            except ValueError:
+                frame = None
+            if not isinstance(frame, dict):
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Frames must be JSON objects.")
+            request_id = frame.get("id")
+            kind = frame.get("type")
+            if kind == "chunk":
+                _publish_comms_chunk(self.agent, CommsStreamChunkRequest.model_validate(frame).content)
+            elif kind == "typing":
+                _publish_comms_typing(self.agent, CommsTypingRequest.model_validate(frame).isTyping)
+            elif kind == "event":
+                payload = EventIngestRequest.model_validate(frame.get("event"))
+                ingested = await run_in_threadpool(self._ingest, payload)
+                result = ingested.model_dump(mode="json")
+            elif kind == "ack":
+                try:
+                    command_id = UUID(str(frame.get("commandId")))
+                except ValueError:
+                    raise HTTPException(
+                        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                        detail="Invalid commandId.",
+                    ) from None
+                command = await run_in_threadpool(self._ack, command_id)
+                self._delivered.discard(command_id)
+                result = {"command": command.model_dump(mode="json")}
+            else:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown frame type: {kind!r}.")
+        except HTTPException as exc:
+            await self.send({"type": "error", "id": request_id, "status": exc.status_code, "detail": exc.detail})
+            return
+        except ValidationError as exc:
+            await self.send({
+                "type": "error",
+                "id": request_id,
+                "status": status.HTTP_422_UNPROCESSABLE_ENTITY,
+                "detail": exc.errors(include_url=False, include_context=False),
+            })
+            return
+        except psycopg.DataError:
+            await self.send({
+                "type": "error",
+                "id": request_id,
+                "status": status.HTTP_422_UNPROCESSABLE_ENTITY,
+                "detail": "Invalid value format for one or more fields.",
+            })
+            return
+        if request_id is not None:
+            await self.send({"type": "ok", "id": request_id, **result})
+
+    def _ingest(self, payload: EventIngestRequest) -> EventIngestResponse:
+        with db_connection() as connection:
+            return _ingest_event(connection, self.agent, payload, Response())
+
+    def _ack(self, command_id: UUID) -> CommandResponse:
+        with db_connection() as connection:
+            return _ack_command(connection, self.agent.agent_id, command_id)
+
+
+@app.websocket("/v1/agent/ws")
+async def agent_websocket(websocket: WebSocket) -> None:
+    """Persistent agent connection, authenticated once.
+
+    Authenticate with the X-Agent-Token header or, for clients that cannot
+    set headers, a first {"type": "auth", "token": "..."} frame. The server
+    answers {"type": "ready"} and then pushes {"type": "command", "command":
+    {...}} for every pending command as it is created. The agent sends:
+
+        {"type": "event", "event": {<POST /v1/events body>}}
+        {"type": "chunk", "content": "..."}
+        {"type": "typing", "isTyping": true}
+        {"type": "ack", "commandId": "..."}
+
+    A frame carrying an "id" is answered with {"type": "ok", "id": ...}
+    (plus "event"/"taskId" or "command"); a failed frame with {"type":
+    "error", "id": ..., "status": <HTTP status>, "detail": ...}.
+    """
+    await websocket.accept()
+    try:
+        authenticated = await _agent_ws_identity(websocket)
+    except WebSocketDisconnect:
+        return
+    if authenticated is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Invalid or revoked agent token.")
+        return
+    token, agent = authenticated
+    await _AgentSocket(websocket, token, agent).run()
+
+
 # ============================================================================
 # Workshop endpoints
 # ============================================================================
@@ -1951,7 +3027,7 @@ _WORKSHOP_SELECT = """
 @app.get("/v1/workshop/tasks", response_model=list[WorkshopTaskResponse])
 def list_workshop_tasks(
     auth_user: AuthenticatedUser = Depends(_require_user_auth),
-    connection: Connection[dict[str, Any]] = Depends(get_db),
+    connection: Connection[dict[str, Any]] = Depends(get_read_db),
 ) -> list[WorkshopTaskResponse]:
     rows = connection.execute(
         _WORKSHOP_SELECT + """
@@ -1973,8 +3049,9 @@ def create_workshop_task(
 ) -> WorkshopTaskResponse:
     if payload.agentId:
         agent_check = connection.execute(
-            "select 1 from agents where id = %s::uuid and workspace_id = %s::uuid",
+            _AGENT_IN_WORKSPACE_SQL,
             (payload.agentId, auth_user.workspace_id),
+            prepare=True,
         ).fetchone()
         if agent_check is None:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Agent not found.")
@@ -2018,8 +3095,9 @@ def update_workshop_task(
     if "agentId" in payload.model_fields_set:
         if payload.agentId is not None:
             agent_check = connection.execute(
-                "select 1 from agents where id = %s::uuid and workspace_id = %s::uuid",
+                _AGENT_IN_WORKSPACE_SQL,
                 (payload.agentId, auth_user.workspace_id),
+                prepare=True,
             ).fetchone()
             if agent_check is None:
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Agent not found.")
@@ -2281,23 +3359,16 @@ def get_agent_secret(
     Returns the plaintext value so agents can inject it into their environment.
     """
     vault_key = _require_vault_key()
-    agent_id = _require_agent_id(connection, x_agent_token)
+    agent = _require_agent(connection, x_agent_token)
 
     # Agents can only access secrets belonging to their workspace
-    agent_row = connection.execute(
-        "select workspace_id from agents where id = %s::uuid",
-        (agent_id,),
-    ).fetchone()
-    if agent_row is None:
-        raise HTTPException(status_code=404, detail="Agent not found.")
-
     row = connection.execute(
         """
         select encrypted_value
         from vault_secrets
         where workspace_id = %s::uuid and key_name = %s
         """,
-        (agent_row["workspace_id"], key_name.upper()),
+        (agent.workspace_id, key_name.upper()),
     ).fetchone()
     if row is None:
         raise HTTPException(
@@ -2509,19 +3580,14 @@ async def mcp_http_endpoint(
             content={"error": "Missing token. Add ?token=YOUR_TOKEN to the MCP URL."},
         )
 
-    pool = get_db_pool()
-    with pool.connection() as conn:
-        token_hash = hash_agent_token(token)
-        row = conn.execute(
-            "select agent_id from agent_tokens where token_hash = %s and revoked_at is null",
-            (token_hash,),
-        ).fetchone()
-        if row is None:
+    pool = get_async_db_pool()
+    async with pool.connection() as conn:
+        agent = await _lookup_agent_identity_async(conn, token)
+        if agent is None:
             return JSONResponse(status_code=401, content={"error": "Invalid or revoked token."})
-        agent_id: UUID = row["agent_id"]
-        conn.execute(
+        await conn.execute(
             "update agents set last_seen_at = now() where id = %s::uuid",
-            (agent_id,),
+            (agent.agent_id,),
         )
 
     try:
@@ -2557,7 +3623,7 @@ async def mcp_http_endpoint(
     if method == "tools/call":
         tool_name: str = params.get("name", "")
         arguments: dict = params.get("arguments") or {}
-        return await _mcp_call_tool(rpc_id, agent_id, tool_name, arguments)
+        return await _mcp_call_tool(rpc_id, agent, tool_name, arguments)
 
     return JSONResponse({
         "jsonrpc": "2.0",
@@ -2568,27 +3634,23 @@ async def mcp_http_endpoint(
 
 async def _mcp_call_tool(
     rpc_id: Any,
-    agent_id: UUID,
+    agent: AgentIdentity,
     tool_name: str,
     arguments: dict,
 ) -> JSONResponse:
-    pool = get_db_pool()
+    pool = get_async_db_pool()
+    agent_id = agent.agent_id
+    workspace_id = agent.workspace_id
 
     # ── log_action ───────────────────────────────────────────────────────────────
     if tool_name == "log_action":
-        with pool.connection() as conn:
-            agent_row = conn.execute(
-                "select workspace_id from agents where id = %s::uuid", (agent_id,)
-            ).fetchone()
-            if agent_row is None:
-                return _mcp_tool_error(rpc_id, "Error: Agent not found.")
-            workspace_id = agent_row["workspace_id"]
-            event_row = conn.execute(
+        async with pool.connection() as conn:
+            cursor = await conn.execute(
                 """
                 insert into events (agent_id, workspace_id, type, message, cost,
                                     requires_approval, proposed_action, completed_actions)
                 values (%s::uuid, %s::uuid, %s, %s, %s, false, null, %s)
-                returning id
+                returning id, agent_id, type, message, cost, created_at
                 """,
                 (
                     agent_id,
@@ -2598,9 +3660,12 @@ async def _mcp_call_tool(
                     arguments.get("cost", 0),
                     Jsonb([]),
                 ),
-            ).fetchone()
-        _sse_publish(f"events:{workspace_id}", str(agent_id))
-        _sse_publish(f"spend:{workspace_id}")
+            )
+            event_row = await cursor.fetchone()
+            event = _event_from_row(event_row)
+            _count_spend(workspace_id, event.cost)
+            _publish_events(workspace_id, [event])
+            await _publish_spend_async(conn, workspace_id, {agent_id: event.cost})
         return _mcp_result(rpc_id, f"Logged to Jarvis (event: {event_row['id']})")
 
     # ── request_approval ─────────────────────────────────────────────────────────
@@ -2608,19 +3673,13 @@ async def _mcp_call_tool(
         timeout_minutes = int(arguments.get("timeout_minutes", 5))
         deadline = time.monotonic() + (timeout_minutes * 60)
 
-        with pool.connection() as conn:
-            agent_row = conn.execute(
-                "select workspace_id from agents where id = %s::uuid", (agent_id,)
-            ).fetchone()
-            if agent_row is None:
-                return _mcp_tool_error(rpc_id, "Error: Agent not found.")
-            workspace_id = agent_row["workspace_id"]
-
-            conn.execute(
+        async with pool.connection() as conn:
+            cursor = await conn.execute(
                 """
                 insert into events (agent_id, workspace_id, type, message, cost,
                                     requires_approval, proposed_action, completed_actions)
                 values (%s::uuid, %s::uuid, 'approval_request', %s, 0, true, %s, %s)
+                returning id, agent_id, type, message, cost, created_at
                 """,
                 (
                     agent_id,
@@ -2630,11 +3689,13 @@ async def _mcp_call_tool(
                     Jsonb(arguments.get("completed_actions", [])),
                 ),
             )
-            conn.execute(
+            event_row = await cursor.fetchone()
+            cursor = await conn.execute(
                 """
                 insert into tasks (agent_id, workspace_id, proposed_action, completed_actions, status)
                 values (%s::uuid, %s::uuid, %s, %s, 'pending')
-                """,
+                """
+                + _TASK_INBOX_RETURNING,
                 (
                     agent_id,
                     workspace_id,
@@ -2642,33 +3703,30 @@ async def _mcp_call_tool(
                     Jsonb(arguments.get("completed_actions", [])),
                 ),
             )
-            conn.execute(
+            task_row = await cursor.fetchone()
+            await conn.execute(
                 "update agents set status = 'waiting_approval' where id = %s::uuid",
                 (agent_id,),
             )
 
-        _sse_publish(f"events:{workspace_id}", str(agent_id))
-        _sse_publish(f"inbox:{workspace_id}")
+        _publish_events(workspace_id, [_event_from_row(event_row)])
+        _publish_inbox_items(workspace_id, [_inbox_from_row(task_row)])
 
         # Long-poll for the approval_decision command using internal SSE queues
         channel = f"commands:{agent_id}"
         while time.monotonic() < deadline:
             remaining = deadline - time.monotonic()
             poll_timeout = min(30.0, max(1.0, remaining))
-            q: asyncio.Queue[str] = asyncio.Queue()
-            _sse_queues[channel].append(q)
+            q = _sse_subscribe(channel)
             try:
                 await asyncio.wait_for(q.get(), timeout=poll_timeout)
             except asyncio.TimeoutError:
                 pass
             finally:
-                try:
-                    _sse_queues[channel].remove(q)
-                except ValueError:
-                    pass
+                _sse_unsubscribe(q)
 
-            with pool.connection() as conn:
-                cmd_row = conn.execute(
+            async with pool.connection() as conn:
+                cursor = await conn.execute(
                     """
                     select id, payload
                     from commands
@@ -2679,11 +3737,12 @@ async def _mcp_call_tool(
                     limit 1
                     """,
                     (agent_id,),
-                ).fetchone()
+                )
+                cmd_row = await cursor.fetchone()
 
             if cmd_row:
-                with pool.connection() as conn:
-                    conn.execute(
+                async with pool.connection() as conn:
+                    await conn.execute(
                         "update commands set status = 'acked', acked_at = now() where id = %s::uuid",
                         (cmd_row["id"],),
                     )
@@ -2702,8 +3761,8 @@ async def _mcp_call_tool(
 
     # ── fetch_human_messages ─────────────────────────────────────────────────────
     if tool_name == "fetch_human_messages":
-        with pool.connection() as conn:
-            rows = conn.execute(
+        async with pool.connection() as conn:
+            cursor = await conn.execute(
                 """
                 with picked as (
                   update commands
@@ -2722,10 +3781,11 @@ async def _mcp_call_tool(
                 order by (select created_at from commands c where c.id = picked.id)
                 """,
                 (agent_id,),
-            ).fetchall()
+            )
+            rows = await cursor.fetchall()
             for row in rows:
                 if row.get("source_message_id"):
-                    conn.execute(
+                    await conn.execute(
                         """
                         update comms_messages
                         set message_status = 'delivered', delivered_at = now()
@@ -2752,9 +3812,9 @@ async def _mcp_call_tool(
         timeout_minutes = int(arguments.get("timeout_minutes", 5))
         deadline = time.monotonic() + (timeout_minutes * 60)
 
-        def _atomic_claim(conn: Any) -> list:
+        async def _atomic_claim(conn: Any) -> list:
             """Atomically claim and ack all pending human_message commands for this agent."""
-            claimed = conn.execute(
+            cursor = await conn.execute(
                 """
                 with picked as (
                   update commands
@@ -2773,10 +3833,11 @@ async def _mcp_call_tool(
                 order by (select created_at from commands c where c.id = picked.id)
                 """,
                 (agent_id,),
-            ).fetchall()
+            )
+            claimed = await cursor.fetchall()
             for row in claimed:
                 if row.get("source_message_id"):
-                    conn.execute(
+                    await conn.execute(
                         """
                         update comms_messages
                         set message_status = 'delivered', delivered_at = now()
@@ -2798,8 +3859,8 @@ async def _mcp_call_tool(
             return "\n\n---\n\n".join(lines)
 
         # Check immediately for any already-pending messages first
-        with pool.connection() as conn:
-            rows = _atomic_claim(conn)
+        async with pool.connection() as conn:
+            rows = await _atomic_claim(conn)
 
         if rows:
             return _mcp_result(rpc_id, _format(rows))
@@ -2809,20 +3870,16 @@ async def _mcp_call_tool(
         while time.monotonic() < deadline:
             remaining = deadline - time.monotonic()
             poll_timeout = min(30.0, max(1.0, remaining))
-            q: asyncio.Queue[str] = asyncio.Queue()
-            _sse_queues[channel].append(q)
+            q = _sse_subscribe(channel)
             try:
                 await asyncio.wait_for(q.get(), timeout=poll_timeout)
             except asyncio.TimeoutError:
                 pass
             finally:
-                try:
-                    _sse_queues[channel].remove(q)
-                except ValueError:
-                    pass
+                _sse_unsubscribe(q)
 
-            with pool.connection() as conn:
-                rows = _atomic_claim(conn)
+            async with pool.connection() as conn:
+                rows = await _atomic_claim(conn)
 
             if rows:
                 return _mcp_result(rpc_id, _format(rows))
@@ -2831,8 +3888,8 @@ async def _mcp_call_tool(
 
     # ── get_workshop_tasks ───────────────────────────────────────────────────────
     if tool_name == "get_workshop_tasks":
-        with pool.connection() as conn:
-            rows = conn.execute(
+        async with pool.connection() as conn:
+            cursor = await conn.execute(
                 _WORKSHOP_SELECT + """
                 where wt.agent_id = %s::uuid
                   and wt.status in ('backlog', 'in_progress')
@@ -2841,7 +3898,8 @@ async def _mcp_call_tool(
                   wt.created_at asc
                 """,
                 (agent_id,),
-            ).fetchall()
+            )
+            rows = await cursor.fetchall()
 
         if not rows:
             return _mcp_result(rpc_id, "No tasks assigned to this agent.")
@@ -2860,8 +3918,8 @@ async def _mcp_call_tool(
     if tool_name == "update_workshop_task_status":
         task_id_str = arguments.get("task_id", "")
         new_status = arguments.get("status", "")
-        with pool.connection() as conn:
-            updated = conn.execute(
+        async with pool.connection() as conn:
+            cursor = await conn.execute(
                 """
                 update workshop_tasks
                 set status = %s, updated_at = now()
@@ -2869,7 +3927,8 @@ async def _mcp_call_tool(
                 returning id, title, workspace_id
                 """,
                 (new_status, task_id_str, agent_id),
-            ).fetchone()
+            )
+            updated = await cursor.fetchone()
         if updated is None:
             return _mcp_tool_error(rpc_id, "Task not found or not assigned to this agent.")
         _sse_publish(f"workshop:{updated['workspace_id']}")
@@ -2886,18 +3945,11 @@ async def _mcp_call_tool(
         if arguments.get("model"):
             metadata["model"] = arguments["model"]
 
-        with pool.connection() as conn:
-            agent_row = conn.execute(
-                "select workspace_id from agents where id = %s::uuid", (agent_id,)
-            ).fetchone()
-            if agent_row is None:
-                return _mcp_tool_error(rpc_id, "Error: Agent not found.")
-            workspace_id = agent_row["workspace_id"]
-
+        async with pool.connection() as conn:
             reply_to_id = UUID(reply_to_message_id_str) if reply_to_message_id_str else None
 
-            with conn.transaction():
-                msg_row = conn.execute(
+            async with conn.transaction():
+                cursor = await conn.execute(
                     """
                     insert into comms_messages
                       (workspace_id, agent_id, sender, content, message_status,
@@ -2906,10 +3958,11 @@ async def _mcp_call_tool(
                     returning id
                     """,
                     (workspace_id, agent_id, content, reply_to_id, Jsonb(metadata)),
-                ).fetchone()
+                )
+                msg_row = await cursor.fetchone()
 
                 if reply_to_id:
-                    conn.execute(
+                    await conn.execute(
                         """
                         update comms_messages
                         set message_status = 'responded', responded_at = now()
@@ -2918,7 +3971,7 @@ async def _mcp_call_tool(
                         (reply_to_id,),
                     )
 
-                conn.execute(
+                await conn.execute(
                     """
                     update commands
                     set status = 'acked', acked_at = now()
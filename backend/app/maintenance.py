@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+
+import psycopg
+
+from .config import Settings
+from .db import get_async_db_pool
+
+logger = logging.getLogger(__name__)
+
+_RETRY_DELAY_SECONDS = 300.0
+
+
+class EventsPartitionMaintainer:
+    """Background task that keeps the monthly events partitions in shape.
+
+    Each run pre-creates upcoming partitions and, when a retention window is
+    configured, detaches or drops partitions older than it. Both are
+    idempotent SQL functions from schema.sql that take the same transaction-
+    scoped advisory lock, so when several workers run this at once the later
+    ones wait and then find nothing left to do.
+    """
+
+    def __init__(self, settings: Settings) -> None:
+        self._interval_seconds = settings.events_maintenance_interval_seconds
+        self._retention_months = settings.events_retention_months
+        self._retention_mode = settings.events_retention_mode
+        self._task: asyncio.Task[None] | None = None
+
+    async def start(self) -> None:
+        if self._interval_seconds <= 0:
+            return
+        self._task = asyncio.create_task(self._run_forever(), name="events-partition-maintenance")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def run_once(self) -> None:
+        async with get_async_db_pool().connection() as conn:
+            cursor = await conn.execute("select public.ensure_events_partitions() as created")
+            row = await cursor.fetchone()
+            if row and row["created"]:
+                logger.info("Created %s events partition(s).", row["created"])
+            if self._retention_months > 0:
+                cursor = await conn.execute(
+                    "select public.apply_events_retention(%s, %s) as partition",
+                    (self._retention_months, self._retention_mode),
+                )
+                for expired in await cursor.fetchall():
+                    logger.info(
+                        "Events retention (%s): %s", self._retention_mode, expired["partition"]
+                    )
+
+    async def _run_forever(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+                delay = self._interval_seconds
+            except asyncio.CancelledError:
+                raise
+            except psycopg.Error as exc:
+                logger.warning("Events partition maintenance failed (%s); retrying.", exc)
+                delay = min(self._interval_seconds, _RETRY_DELAY_SECONDS)
+            await asyncio.sleep(delay)
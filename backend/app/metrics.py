@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable, Iterator
+from typing import Any
+
+from prometheus_client import CollectorRegistry, Counter as PromCounter, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .db import QueryStats, query_stats
+
+# Per-process registry: with several uvicorn workers each one exposes its own
+# series, so scrape them individually (or aggregate in Prometheus).
+registry = CollectorRegistry(auto_describe=True)
+
+_UNMATCHED_ROUTE = "<unmatched>"
+
+http_requests_total = PromCounter(
+    "jarvis_http_requests_total",
+    "HTTP requests by route template, method and status code.",
+    ("method", "route", "status"),
+    registry=registry,
+)
+http_request_duration_seconds = Histogram(
+    "jarvis_http_request_duration_seconds",
+    "Time to complete the HTTP response, by route template. Long-polls and SSE streams run long by design.",
+    ("method", "route"),
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+    registry=registry,
+)
+db_queries_per_request = Histogram(
+    "jarvis_db_queries_per_request",
+    "SQL statements executed per HTTP request, by route template.",
+    ("method", "route"),
+    buckets=(0, 1, 2, 3, 4, 5, 6, 8, 10, 15, 25, 50),
+    registry=registry,
+)
+db_time_per_request_seconds = Histogram(
+    "jarvis_db_time_per_request_seconds",
+    "Time spent executing SQL per HTTP request, by route template.",
+    ("method", "route"),
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+    registry=registry,
+)
+db_slow_queries_total = PromCounter(
+    "jarvis_db_slow_queries_total",
+    "Statements slower than DB_SLOW_QUERY_MS, by route template.",
+    ("method", "route"),
+    registry=registry,
+)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route request counts, latency and DB usage.
+
+    Routes are labelled by their path template (``/v1/agents/{agent_id}``),
+    read from the matched route after the router has run, so label
+    cardinality stays bounded. Pure ASGI rather than BaseHTTPMiddleware so
+    streaming responses are not buffered.
+
+    Statements run through the pools are counted against the request and
+    reported in a ``Server-Timing: db`` header. For streaming responses the
+    header covers only the work done before the first byte.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+        stats = QueryStats(scope)
+        stats_token = query_stats.set(stats)
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing", f'db;dur={stats.seconds * 1000:.1f};desc="{stats.queries} queries"'
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            query_stats.reset(stats_token)
+            route = scope.get("route")
+            template = getattr(route, "path", None) or _UNMATCHED_ROUTE
+            method = scope["method"]
+            http_requests_total.labels(method, template, str(status_code)).inc()
+            http_request_duration_seconds.labels(method, template).observe(time.perf_counter() - start)
+            db_queries_per_request.labels(method, template).observe(stats.queries)
+            db_time_per_request_seconds.labels(method, template).observe(stats.seconds)
+            if stats.slow_queries:
+                db_slow_queries_total.labels(method, template).inc(stats.slow_queries)
+
+
+class StateCollector(Collector):
+    """Scrape-time gauges for in-process state: DB pools, SSE, queues and threads.
+
+    Each source is a zero-argument callable so this module does not import
+    the app; a callable that raises (e.g. a pool that is not open yet) just
+    skips its metrics for that scrape.
+    """
+
+    def __init__(
+        self,
+        pools: dict[str, Callable[[], Any]],
+        sse_channels: Callable[[], dict[str, int]],
+        sse_tokens: Callable[[], int],
+        sse_overflows: Callable[[], int],
+        ingest_queue_depth: Callable[[], int | None],
+    ) -> None:
+        self._pools = pools
+        self._sse_channels = sse_channels
+        self._sse_tokens = sse_tokens
+        self._sse_overflows = sse_overflows
+        self._ingest_queue_depth = ingest_queue_depth
+
+    def collect(self) -> Iterator[Any]:
+        yield from self._collect_pools()
+
+        by_type: Counter[str] = Counter()
+        for channel, subscribers in self._sse_channels().items():
+            by_type[channel.split(":", 1)[0]] += subscribers
+        subscribers = GaugeMetricFamily(
+            "jarvis_sse_subscribers",
+            "Open SSE/long-poll subscriptions by channel type.",
+            labels=("channel_type",),
+        )
+        for channel_type, count in sorted(by_type.items()):
+            subscribers.add_metric((channel_type,), count)
+        yield subscribers
+        # Every commands:* subscriber is a parked /v1/commands/listen or MCP long-poll.
+        yield GaugeMetricFamily(
+            "jarvis_longpoll_waiters",
+            "Requests parked in a command long-poll.",
+            value=by_type.get("commands", 0),
+        )
+
+        yield GaugeMetricFamily(
+            "jarvis_sse_tokens",
+            "Issued, not yet consumed SSE tokens.",
+            value=self._sse_tokens(),
+        )
+        yield CounterMetricFamily(
+            "jarvis_sse_slow_consumers",
+            "Times a subscriber's bounded queue overflowed and the slow-consumer policy applied.",
+            value=self._sse_overflows(),
+        )
+        yield GaugeMetricFamily(
+            "jarvis_budget_alert_threads",
+            "Budget alert webhook deliveries in flight.",
+            value=sum(1 for t in threading.enumerate() if t.name == "budget-alert"),
+        )
+        depth = self._ingest_queue_depth()
+        if depth is not None:
+            yield GaugeMetricFamily(
+                "jarvis_ingest_queue_depth",
+                "Events buffered by the write-behind ingest queue.",
+                value=depth,
+            )
+
+    def _collect_pools(self) -> Iterator[Any]:
+        size = GaugeMetricFamily("jarvis_db_pool_size", "Open connections.", labels=("pool",))
+        available = GaugeMetricFamily("jarvis_db_pool_available", "Idle connections.", labels=("pool",))
+        max_size = GaugeMetricFamily("jarvis_db_pool_max_size", "Configured max_size.", labels=("pool",))
+        waiting = GaugeMetricFamily(
+            "jarvis_db_pool_requests_waiting", "Callers waiting for a connection.", labels=("pool",)
+        )
+        requests = CounterMetricFamily(
+            "jarvis_db_pool_requests", "Connection requests served by the pool.", labels=("pool",)
+        )
+        queued = CounterMetricFamily(
+            "jarvis_db_pool_requests_queued", "Connection requests that had to wait.", labels=("pool",)
+        )
+        wait_seconds = CounterMetricFamily(
+            "jarvis_db_pool_wait_seconds", "Total time callers spent waiting for a connection.", labels=("pool",)
+        )
+        errors = CounterMetricFamily(
+            "jarvis_db_pool_requests_errors", "Connection requests that timed out or failed.", labels=("pool",)
+        )
+        for name, get_pool in self._pools.items():
+            try:
+                stats = get_pool().get_stats()
+            except RuntimeError:
+                continue
+            size.add_metric((name,), stats.get("pool_size", 0))
+            available.add_metric((name,), stats.get("pool_available", 0))
+            max_size.add_metric((name,), stats.get("pool_max", 0))
+            waiting.add_metric((name,), stats.get("requests_waiting", 0))
+            requests.add_metric((name,), stats.get("requests_num", 0))
+            queued.add_metric((name,), stats.get("requests_queued", 0))
+            wait_seconds.add_metric((name,), stats.get("requests_wait_ms", 0) / 1000)
+            errors.add_metric((name,), stats.get("requests_errors", 0))
+        yield from (size, available, max_size, waiting, requests, queued, wait_seconds, errors)
@@ -65,6 +65,14 @@ class EventIngestResponse(BaseModel):
     taskId: UUID | None = None
 
 
+class EventBatchIngestRequest(BaseModel):
+    events: list[EventIngestRequest] = Field(min_length=1, max_length=500)
+
+
+class EventBatchIngestResponse(BaseModel):
+    events: list[EventIngestResponse]
+
+
 class InboxItemResponse(BaseModel):
     id: UUID
     agentId: UUID
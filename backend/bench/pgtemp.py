@@ -0,0 +1,81 @@
+"""Throwaway local Postgres cluster for benchmarks (initdb + pg_ctl, no docker)."""
+from __future__ import annotations
+
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+from pathlib import Path
+
+
+def _find_bindir() -> Path:
+    explicit = os.getenv("PG_BINDIR")
+    if explicit:
+        return Path(explicit)
+    on_path = shutil.which("pg_ctl")
+    if on_path:
+        return Path(on_path).parent
+    pg_config = shutil.which("pg_config")
+    if pg_config:
+        bindir = subprocess.run([pg_config, "--bindir"], capture_output=True, text=True, check=True)
+        candidate = Path(bindir.stdout.strip())
+        if (candidate / "pg_ctl").exists():
+            return candidate
+    raise RuntimeError("Postgres server binaries not found. Install them or set PG_BINDIR.")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+class TempPostgres:
+    """A private cluster in a temp directory, torn down on exit.
+
+    pg_stat_statements is preloaded so the harness can count the queries
+    each scenario issues. fsync stays on: ingest numbers should include
+    commit latency, which is what the write paths are tuned against.
+    """
+
+    def __init__(self, user: str = "postgres", database: str = "bench") -> None:
+        self.user = user
+        self.database = database
+        self.port = free_port()
+        self._bindir = _find_bindir()
+        self._datadir = Path(tempfile.mkdtemp(prefix="jarvis-bench-pg-"))
+
+    @property
+    def url(self) -> str:
+        return f"postgresql://{self.user}@127.0.0.1:{self.port}/{self.database}"
+
+    def __enter__(self) -> TempPostgres:
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        self._run("initdb", "-D", str(self._datadir), "-U", self.user, "--auth=trust", "-E", "UTF8")
+        options = " ".join([
+            f"-p {self.port}",
+            "-c listen_addresses=127.0.0.1",
+            f"-c unix_socket_directories={self._datadir}",
+            "-c max_connections=500",
+            "-c shared_buffers=256MB",
+            "-c shared_preload_libraries=pg_stat_statements",
+            "-c timezone=UTC",
+        ])
+        self._run("pg_ctl", "-D", str(self._datadir), "-o", options, "-l", str(self._datadir / "log"), "-w", "start")
+        self._run("createdb", "-h", "127.0.0.1", "-p", str(self.port), "-U", self.user, self.database)
+
+    def stop(self) -> None:
+        try:
+            self._run("pg_ctl", "-D", str(self._datadir), "-m", "fast", "-w", "stop")
+        finally:
+            shutil.rmtree(self._datadir, ignore_errors=True)
+
+    def _run(self, binary: str, *args: str) -> None:
+        subprocess.run([str(self._bindir / binary), *args], check=True, capture_output=True)
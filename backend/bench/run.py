@@ -0,0 +1,242 @@
+"""
+API benchmark harness.
+
+Boots the FastAPI app with uvicorn against a throwaway Postgres cluster (or
+--database-url), seeds it, drives the hot-path scenarios and reports
+throughput, p50/p99 latency and DB statements per request. Results are
+compared with bench/baseline-<scale>.json; refresh that file with
+--update-baseline and commit it alongside the change that moved the numbers.
+
+    cd backend
+    pip install -r requirements.txt -r bench/requirements.txt
+    python -m bench.run                      # quick scale, all scenarios
+    python -m bench.run --scale full         # 1k agents x 1M events, 10k SSE subscribers
+    python -m bench.run --scenario ingest --scenario spend
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from . import seed
+from .pgtemp import TempPostgres, free_port
+from .scenarios import SCENARIOS, Context
+
+BENCH_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = BENCH_DIR.parent
+
+SCALES: dict[str, dict[str, Any]] = {
+    "quick": {
+        "agents": 100,
+        "spend_event_steps": [10_000, 50_000],
+        "ingest_requests": 2_000,
+        "ingest_concurrency": 20,
+        "read_requests": 500,
+        "read_concurrency": 10,
+        "sse_subscribers": 500,
+        "longpoll_waiters": 200,
+        "longpoll_timeout": 5,
+    },
+    "full": {
+        "agents": 1_000,
+        "spend_event_steps": [100_000, 300_000, 1_000_000],
+        "ingest_requests": 20_000,
+        "ingest_concurrency": 50,
+        "read_requests": 2_000,
+        "read_concurrency": 20,
+        "sse_subscribers": 10_000,
+        "longpoll_waiters": 1_000,
+        "longpoll_timeout": 10,
+    },
+}
+
+# Direction of each metric when comparing against the baseline.
+_HIGHER_IS_WORSE = ("p50_ms", "p99_ms", "side_p99_ms", "queries_per_request", "errors")
+_LOWER_IS_WORSE = ("throughput_rps",)
+
+_BENCH_SECRET = "bench-jwt-secret"
+
+
+@contextlib.contextmanager
+def database(url: str | None) -> Iterator[str]:
+    if url:
+        yield url
+        return
+    with TempPostgres() as pg:
+        yield pg.url
+
+
+@contextlib.contextmanager
+def api_server(database_url: str, pool_size: int) -> Iterator[str]:
+    port = free_port()
+    env = {
+        **os.environ,
+        "DATABASE_URL": database_url,
+        "CONTROL_PLANE_TOKEN": "bench-control-plane",
+        "SUPABASE_JWT_SECRET": _BENCH_SECRET,
+        "DB_POOL_MAX_SIZE": str(pool_size),
+        "EVENTS_MAINTENANCE_INTERVAL_SECONDS": "0",
+    }
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                if httpx.get(f"{base_url}/healthz", timeout=1).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if process.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError("API server failed to start.")
+            time.sleep(0.2)
+        yield base_url
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def raise_fd_limit() -> None:
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard == resource.RLIM_INFINITY or hard > soft:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard if hard != resource.RLIM_INFINITY else 65536, hard))
+
+
+async def run_scenarios(ctx: Context, names: list[str]) -> dict[str, Any]:
+    results: dict[str, Any] = {}
+    seeded = 0
+    steps = ctx.scale["spend_event_steps"]
+    for name in names:
+        if name == "spend":
+            # /v1/spend should stay flat as the events table grows.
+            for target in steps:
+                seed.add_events(ctx.database_url, ctx.workspace, target - seeded)
+                seeded = target
+                results[f"spend@{target}"] = await report(name, target, SCENARIOS[name](ctx))
+            continue
+        if name == "list_agents" and seeded < steps[-1]:
+            seed.add_events(ctx.database_url, ctx.workspace, steps[-1] - seeded)
+            seeded = steps[-1]
+        results[name] = await report(name, None, SCENARIOS[name](ctx))
+    return results
+
+
+async def report(name: str, size: int | None, pending: Any) -> dict[str, Any]:
+    label = f"{name}@{size}" if size is not None else name
+    print(f"  {label:<22}", end="", flush=True)
+    result = await pending
+    print(
+        f"{result['throughput_rps']:>9} rps  p50 {result['p50_ms']:>8} ms  p99 {result['p99_ms']:>8} ms"
+        f"  q/req {result['queries_per_request']}  errors {result['errors']}"
+    )
+    return result
+
+
+def compare(results: dict[str, Any], baseline: dict[str, Any], tolerance: float) -> list[str]:
+    regressions: list[str] = []
+    for scenario, metrics in results.items():
+        base = baseline.get("scenarios", {}).get(scenario)
+        if not base:
+            continue
+        for key, value in metrics.items():
+            expected = base.get(key)
+            if value is None or expected is None:
+                continue
+            if key == "queries_per_request":
+                # Statement counts are deterministic; any increase is a regression.
+                if value > expected + 0.01:
+                    regressions.append(f"{scenario}.{key}: {expected} -> {value}")
+            elif key in _HIGHER_IS_WORSE and value > expected * (1 + tolerance):
+                regressions.append(f"{scenario}.{key}: {expected} -> {value}")
+            if key in _LOWER_IS_WORSE and value < expected * (1 - tolerance):
+                regressions.append(f"{scenario}.{key}: {expected} -> {value}")
+    return regressions
+
+
+def git_revision() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True)
+    except OSError:
+        return None
+    return out.stdout.strip() or None
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=sorted(SCALES), default="quick")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="Repeatable; default is all.")
+    parser.add_argument("--database-url", help="Use an existing, empty database instead of a temp cluster.")
+    parser.add_argument("--pool-size", type=int, default=10, help="DB_POOL_MAX_SIZE for the API under test.")
+    parser.add_argument("--output", type=Path, default=BENCH_DIR / "results" / "latest.json")
+    parser.add_argument("--baseline", type=Path, help="Defaults to bench/baseline-<scale>.json.")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression (default 0.2).")
+    args = parser.parse_args()
+
+    scale = SCALES[args.scale]
+    names = args.scenario or list(SCENARIOS)
+    baseline_path = args.baseline or BENCH_DIR / f"baseline-{args.scale}.json"
+    raise_fd_limit()
+
+    with database(args.database_url) as database_url:
+        seed.apply_schema(database_url)
+        workspace = seed.create_workspace(database_url, scale["agents"])
+        with api_server(database_url, args.pool_size) as base_url:
+            ctx = Context(
+                base_url=base_url,
+                database_url=database_url,
+                user_token=seed.user_jwt(workspace, _BENCH_SECRET),
+                workspace=workspace,
+                scale=scale,
+            )
+            print(f"Benchmarking {base_url} at scale '{args.scale}'")
+            results = asyncio.run(run_scenarios(ctx, names))
+
+    document = {
+        "meta": {
+            "scale": args.scale,
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "pool_size": args.pool_size,
+            "ingest_mode": os.getenv("INGEST_MODE", "sync"),
+        },
+        "scenarios": results,
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(document, indent=2) + "\n")
+    print(f"Results written to {args.output}")
+
+    if args.update_baseline:
+        baseline_path.write_text(json.dumps(document, indent=2) + "\n")
+        print(f"Baseline updated: {baseline_path}")
+        return 0
+    if not baseline_path.exists():
+        print(f"No baseline at {baseline_path}; run with --update-baseline to create one.")
+        return 0
+    regressions = compare(results, json.loads(baseline_path.read_text()), args.tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,284 @@
+"""Benchmark scenarios. Each returns a flat dict of metrics for the report."""
+from __future__ import annotations
+
+import asyncio
+import itertools
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+from urllib.parse import urlsplit
+
+import httpx
+import psycopg
+
+from .seed import Workspace
+
+
+@dataclass
+class Context:
+    base_url: str
+    database_url: str
+    user_token: str
+    workspace: Workspace
+    scale: dict[str, Any]
+    _stats_available: bool | None = field(default=None, repr=False)
+
+    def user_headers(self) -> dict[str, str]:
+        return {"Authorization": f"Bearer {self.user_token}"}
+
+    def agent_headers(self, index: int) -> dict[str, str]:
+        tokens = self.workspace.agent_tokens
+        return {"X-Agent-Token": tokens[index % len(tokens)]}
+
+
+# ── Measurement helpers ───────────────────────────────────────────────────────
+
+_STATEMENTS_SQL = """
+select coalesce(sum(calls), 0)::bigint
+from pg_stat_statements
+where dbid = (select oid from pg_database where datname = current_database())
+  and query not ilike '%%pg_stat_statements%%'
+"""
+
+
+class QueryCounter:
+    """Counts statements the API ran during a scenario via pg_stat_statements."""
+
+    def __init__(self, ctx: Context) -> None:
+        self._ctx = ctx
+
+    def __enter__(self) -> QueryCounter:
+        self.total: int | None = None
+        if self._available():
+            with psycopg.connect(self._ctx.database_url, autocommit=True) as conn:
+                conn.execute("select pg_stat_statements_reset()")
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        if self._available():
+            with psycopg.connect(self._ctx.database_url, autocommit=True) as conn:
+                row = conn.execute(_STATEMENTS_SQL).fetchone()
+                self.total = int(row[0]) if row else None
+
+    def per_request(self, requests: int) -> float | None:
+        if self.total is None or not requests:
+            return None
+        return round(self.total / requests, 2)
+
+    def _available(self) -> bool:
+        if self._ctx._stats_available is None:
+            try:
+                with psycopg.connect(self._ctx.database_url, autocommit=True) as conn:
+                    conn.execute("select 1 from pg_stat_statements limit 1")
+                self._ctx._stats_available = True
+            except psycopg.Error:
+                self._ctx._stats_available = False
+        return self._ctx._stats_available
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(latencies: list[float], errors: int, elapsed: float, queries: QueryCounter) -> dict[str, Any]:
+    ordered = sorted(latencies)
+    requests = len(latencies) + errors
+    return {
+        "requests": requests,
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 2),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 2),
+        "queries_per_request": queries.per_request(requests),
+    }
+
+
+async def drive(
+    total: int,
+    concurrency: int,
+    request: Callable[[int], Awaitable[httpx.Response]],
+) -> tuple[list[float], int, float]:
+    """Issue *total* requests with at most *concurrency* in flight."""
+    latencies: list[float] = []
+    errors = 0
+    counter = itertools.count()
+
+    async def worker() -> None:
+        nonlocal errors
+        for i in iter(lambda: next(counter), None):
+            if i >= total:
+                return
+            started = time.perf_counter()
+            try:
+                response = await request(i)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+def client(ctx: Context, connections: int) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        base_url=ctx.base_url,
+        timeout=120.0,
+        limits=httpx.Limits(max_connections=connections, max_keepalive_connections=connections),
+    )
+
+
+# ── Scenarios ─────────────────────────────────────────────────────────────────
+
+async def ingest(ctx: Context) -> dict[str, Any]:
+    """Sustained POST /v1/events across all agents."""
+    total, concurrency = ctx.scale["ingest_requests"], ctx.scale["ingest_concurrency"]
+    async with client(ctx, concurrency) as http:
+        body = {"type": "action", "message": "bench ingest", "cost": 0.001}
+        with QueryCounter(ctx) as queries:
+            latencies, errors, elapsed = await drive(
+                total,
+                concurrency,
+                lambda i: http.post("/v1/events", json=body, headers=ctx.agent_headers(i)),
+            )
+    return summarize(latencies, errors, elapsed, queries)
+
+
+async def read_endpoint(ctx: Context, path: str) -> dict[str, Any]:
+    total, concurrency = ctx.scale["read_requests"], ctx.scale["read_concurrency"]
+    async with client(ctx, concurrency) as http:
+        headers = ctx.user_headers()
+        await http.get(path, headers=headers)  # warm the JWT cache and plans
+        with QueryCounter(ctx) as queries:
+            latencies, errors, elapsed = await drive(total, concurrency, lambda _: http.get(path, headers=headers))
+    return summarize(latencies, errors, elapsed, queries)
+
+
+async def spend(ctx: Context) -> dict[str, Any]:
+    return await read_endpoint(ctx, "/v1/spend")
+
+
+async def list_agents(ctx: Context) -> dict[str, Any]:
+    return await read_endpoint(ctx, "/v1/agents")
+
+
+async def _open_sse(base_url: str, path: str) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    # Raw sockets rather than httpx streams: ten thousand idle subscribers
+    # must not cost ten thousand client-side connection pools.
+    url = urlsplit(base_url)
+    reader, writer = await asyncio.open_connection(url.hostname, url.port or 80)
+    writer.write(
+        f"GET {path} HTTP/1.1\r\nHost: {url.netloc}\r\nAccept: text/event-stream\r\n\r\n".encode()
+    )
+    await writer.drain()
+    while (await reader.readline()) not in (b"\r\n", b""):
+        pass  # response headers
+    return reader, writer
+
+
+async def _read_until(reader: asyncio.StreamReader, needle: bytes) -> None:
+    while True:
+        line = await reader.readline()
+        if not line:
+            raise ConnectionError("SSE stream closed")
+        if needle in line:
+            return
+
+
+async def sse_fanout(ctx: Context) -> dict[str, Any]:
+    """Hold N /v1/stream/events subscribers open, then time one event's fan-out."""
+    subscribers = ctx.scale["sse_subscribers"]
+    semaphore = asyncio.Semaphore(200)
+
+    async def connect(http: httpx.AsyncClient) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        # SSE tokens live 30 s, so each subscriber fetches its own just before connecting.
+        async with semaphore:
+            response = await http.post("/v1/sse-token", headers=ctx.user_headers())
+            response.raise_for_status()
+            token = response.json()["token"]
+            reader, writer = await _open_sse(ctx.base_url, f"/v1/stream/events?token={token}")
+            await _read_until(reader, b"connected")
+            return reader, writer
+
+    connect_started = time.perf_counter()
+    async with client(ctx, 200) as http:
+        streams = await asyncio.gather(*(connect(http) for _ in range(subscribers)), return_exceptions=True)
+    connected = [s for s in streams if not isinstance(s, BaseException)]
+    connect_elapsed = time.perf_counter() - connect_started
+
+    agent_id = str(ctx.workspace.agent_ids[0]).encode()
+
+    async def delivery(reader: asyncio.StreamReader) -> float:
+        await _read_until(reader, agent_id)
+        return time.perf_counter()
+
+    async with client(ctx, 1) as http:
+        with QueryCounter(ctx) as queries:
+            waits = [asyncio.create_task(delivery(reader)) for reader, _ in connected]
+            published = time.perf_counter()
+            await http.post("/v1/events", json={"type": "action", "message": "fanout"}, headers=ctx.agent_headers(0))
+            done, pending = await asyncio.wait(waits, timeout=60)
+            for task in pending:
+                task.cancel()
+
+    delivered = [task.result() - published for task in done if task.exception() is None]
+    for _, writer in connected:
+        writer.close()
+    elapsed = max((published + d for d in delivered), default=published) - published
+    result = summarize(delivered, len(connected) - len(delivered), elapsed, queries)
+    result.update({
+        "subscribers": subscribers,
+        "connected": len(connected),
+        "connect_seconds": round(connect_elapsed, 2),
+        "queries_per_request": queries.per_request(1),
+    })
+    return result
+
+
+async def longpoll_storm(ctx: Context) -> dict[str, Any]:
+    """Many agents parked in /v1/commands/listen while a side load measures API responsiveness."""
+    waiters, timeout = ctx.scale["longpoll_waiters"], ctx.scale["longpoll_timeout"]
+    async with client(ctx, waiters) as poll_http, client(ctx, 10) as side_http:
+        with QueryCounter(ctx) as queries:
+            storm = asyncio.create_task(
+                drive(
+                    waiters,
+                    waiters,
+                    lambda i: poll_http.get(
+                        "/v1/commands/listen",
+                        params={"timeout": timeout},
+                        headers=ctx.agent_headers(i),
+                        timeout=timeout + 30,
+                    ),
+                )
+            )
+            await asyncio.sleep(min(1.0, timeout / 2))
+            side_latencies, side_errors, side_elapsed = await drive(
+                200, 10, lambda _: side_http.get("/healthz")
+            )
+            latencies, errors, elapsed = await storm
+    result = summarize(latencies, errors, elapsed, queries)
+    side = sorted(side_latencies)
+    result.update({
+        "waiters": waiters,
+        "side_p99_ms": round(percentile(side, 99) * 1000, 2),
+        "side_errors": side_errors,
+    })
+    return result
+
+
+SCENARIOS: dict[str, Callable[[Context], Awaitable[dict[str, Any]]]] = {
+    "ingest": ingest,
+    "spend": spend,
+    "list_agents": list_agents,
+    "sse_fanout": sse_fanout,
+    "longpoll_storm": longpoll_storm,
+}
@@ -0,0 +1,116 @@
+"""Schema setup and bulk seeding for benchmarks."""
+from __future__ import annotations
+
+import hashlib
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+
+import jwt
+import psycopg
+
+SCHEMA_PATH = Path(__file__).resolve().parent.parent / "sql" / "schema.sql"
+
+# Just enough of Supabase for schema.sql to apply on vanilla Postgres.
+_SUPABASE_STUBS = """
+create extension if not exists pg_stat_statements;
+create schema if not exists auth;
+create table if not exists auth.users (id uuid primary key, email text);
+create or replace function auth.uid() returns uuid language sql stable as $$ select null::uuid $$;
+"""
+
+
+@dataclass
+class Workspace:
+    user_id: uuid.UUID
+    workspace_id: uuid.UUID
+    agent_ids: list[uuid.UUID]
+    agent_tokens: list[str]
+
+
+def apply_schema(database_url: str) -> None:
+    with psycopg.connect(database_url, autocommit=True) as conn:
+        conn.execute(_SUPABASE_STUBS)
+        conn.execute(SCHEMA_PATH.read_text())
+        # Cover the seeded back-dated events as well as the current month.
+        conn.execute("select public.ensure_events_partitions((now() - interval '90 days')::date)")
+
+
+def create_workspace(database_url: str, agents: int) -> Workspace:
+    user_id = uuid.uuid4()
+    with psycopg.connect(database_url, autocommit=True) as conn:
+        conn.execute(
+            "insert into auth.users (id, email) values (%s, %s)",
+            (user_id, f"bench-{user_id}@example.com"),
+        )
+        # Large enough that no scenario trips the budget cap.
+        row = conn.execute(
+            "update public.users set monthly_budget = 1000000000 where id = %s returning workspace_id",
+            (user_id,),
+        ).fetchone()
+        assert row is not None
+        workspace_id = row[0]
+    workspace = Workspace(user_id, workspace_id, [], [])
+    add_agents(database_url, workspace, agents)
+    return workspace
+
+
+def add_agents(database_url: str, workspace: Workspace, count: int) -> None:
+    start = len(workspace.agent_ids)
+    tokens = [f"bench-{workspace.workspace_id}-{i}" for i in range(start, start + count)]
+    with psycopg.connect(database_url, autocommit=True) as conn, conn.transaction():
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                insert into agents (owner_user_id, workspace_id, name)
+                select %s, %s, 'bench-agent-' || g
+                from generate_series(%s, %s) g
+                order by g
+                returning id
+                """,
+                (workspace.user_id, workspace.workspace_id, start, start + count - 1),
+            )
+            agent_ids = [row[0] for row in cur.fetchall()]
+            cur.executemany(
+                "insert into agent_tokens (agent_id, token_hash) values (%s, %s)",
+                [
+                    (agent_id, hashlib.sha256(token.encode("utf-8")).hexdigest())
+                    for agent_id, token in zip(agent_ids, tokens)
+                ],
+            )
+    workspace.agent_ids.extend(agent_ids)
+    workspace.agent_tokens.extend(tokens)
+
+
+def add_events(database_url: str, workspace: Workspace, count: int, chunk: int = 200_000) -> None:
+    """Insert *count* costed events spread over the last 60 days and all agents."""
+    agents = [str(agent_id) for agent_id in workspace.agent_ids]
+    with psycopg.connect(database_url, autocommit=True) as conn:
+        done = 0
+        while done < count:
+            n = min(chunk, count - done)
+            conn.execute(
+                """
+                insert into events (agent_id, workspace_id, type, message, cost, created_at)
+                select
+                  (%s::uuid[])[1 + (g %% array_length(%s::uuid[], 1))],
+                  %s,
+                  'action',
+                  'bench event ' || g,
+                  0.001,
+                  now() - random() * interval '60 days'
+                from generate_series(1, %s) g
+                """,
+                (agents, agents, workspace.workspace_id, n),
+            )
+            done += n
+        conn.execute("analyze events")
+
+
+def user_jwt(workspace: Workspace, secret: str) -> str:
+    return jwt.encode(
+        {"sub": str(workspace.user_id), "aud": "authenticated", "exp": int(time.time()) + 6 * 3600},
+        secret,
+        algorithm="HS256",
+    )
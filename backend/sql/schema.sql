@@ -90,10 +90,14 @@ CREATE INDEX IF NOT EXISTS idx_agent_tokens_hash_active
 
 -- ============================================================================
 -- events
+-- Range-partitioned by month on created_at: month-to-date reads prune to the
+-- current partition and retention drops whole partitions instead of deleting
+-- rows. public.ensure_events_partitions() creates the monthly partitions
+-- ahead of time; events_default catches anything outside them.
 -- ============================================================================
 
 CREATE TABLE IF NOT EXISTS events (
-  id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+  id uuid NOT NULL DEFAULT gen_random_uuid(),
   agent_id uuid NOT NULL REFERENCES agents(id) ON DELETE CASCADE,
   type text NOT NULL CHECK (type IN ('action', 'completion', 'error', 'tool_call', 'approval_request')),
   message text NOT NULL,
@@ -101,8 +105,9 @@ CREATE TABLE IF NOT EXISTS events (
   requires_approval boolean NOT NULL DEFAULT false,
   proposed_action text,
   completed_actions jsonb NOT NULL DEFAULT '[]'::jsonb,
-  created_at timestamptz NOT NULL DEFAULT now()
-);
+  created_at timestamptz NOT NULL DEFAULT now(),
+  PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
 
 -- Migration: Add workspace_id (nullable first, then backfill, then NOT NULL)
 ALTER TABLE events ADD COLUMN IF NOT EXISTS workspace_id uuid;
@@ -120,6 +125,173 @@ END $$;
 -- Apply NOT NULL constraint after backfill
 ALTER TABLE events ALTER COLUMN workspace_id SET NOT NULL;
 
+-- Create the monthly partitions from from_month through months_ahead months
+-- past the current one. Rows already sitting in events_default for a new
+-- month are moved into its partition before it is attached, under a lock
+-- that keeps new ones from arriving in between. Partitions get
+-- RLS with no policies (PostgREST must go through the parent's policies) and
+-- the same replica identity as the parent. Bounds follow the session time
+-- zone, so run this (and the retention job) in UTC as Supabase does.
+-- Called by the backend maintenance loop; can also be scheduled with pg_cron:
+--   SELECT cron.schedule('events-partitions', '0 3 * * *', $$SELECT public.ensure_events_partitions()$$);
+CREATE OR REPLACE FUNCTION public.ensure_events_partitions(
+  from_month date DEFAULT date_trunc('month', now())::date,
+  months_ahead integer DEFAULT 2
+)
+RETURNS integer
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  month_start date := date_trunc('month', from_month)::date;
+  last_month date := (date_trunc('month', now()) + make_interval(months => months_ahead))::date;
+  next_month date;
+  part_name text;
+  created integer := 0;
+BEGIN
+  -- Serialise concurrent callers (every API worker runs this on start-up):
+  -- the to_regclass checks below would otherwise let two of them race to
+  -- CREATE the same partition and fail with duplicate_table.
+  PERFORM pg_advisory_xact_lock(hashtext('public.events partition maintenance'));
+
+  IF to_regclass('public.events_default') IS NULL THEN
+    CREATE TABLE public.events_default PARTITION OF public.events DEFAULT;
+    ALTER TABLE public.events_default ENABLE ROW LEVEL SECURITY;
+    ALTER TABLE public.events_default REPLICA IDENTITY FULL;
+  END IF;
+
+  WHILE month_start <= last_month LOOP
+    next_month := (month_start + interval '1 month')::date;
+    part_name := 'events_' || to_char(month_start, '"y"YYYY"m"MM');
+    IF to_regclass('public.' || part_name) IS NULL THEN
+      EXECUTE format(
+        'CREATE TABLE public.%I (LIKE public.events INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+        part_name
+      );
+      -- Block inserts into events_default until the partition is attached
+      -- (this function runs in one transaction): a row for this month landing
+      -- there after the move would make ATTACH fail its default-partition
+      -- check. Inserts routed to the default partition wait the few ms this takes;
+      -- with months_ahead lead time the move itself is normally empty.
+      LOCK TABLE public.events_default IN SHARE ROW EXCLUSIVE MODE;
+      EXECUTE format(
+        'WITH moved AS (DELETE FROM public.events_default WHERE created_at >= %L AND created_at < %L RETURNING *) '
+        'INSERT INTO public.%I SELECT * FROM moved',
+        month_start, next_month, part_name
+      );
+      EXECUTE format(
+        'ALTER TABLE public.events ATTACH PARTITION public.%I FOR VALUES FROM (%L) TO (%L)',
+        part_name, month_start, next_month
+      );
+      EXECUTE format('ALTER TABLE public.%I ENABLE ROW LEVEL SECURITY', part_name);
+      EXECUTE format('ALTER TABLE public.%I REPLICA IDENTITY FULL', part_name);
+      created := created + 1;
+    END IF;
+    month_start := next_month;
+  END LOOP;
+  RETURN created;
+END $$;
+
+-- Migration: convert a pre-partitioning events heap in place. Copies every
+-- row under an ACCESS EXCLUSIVE lock, so run it in a quiet window on large
+-- tables. Triggers, indexes and policies are recreated further down.
+-- Supabase Realtime: re-add events to the publication afterwards with
+--   ALTER PUBLICATION supabase_realtime SET (publish_via_partition_root = true);
+-- so changes keep arriving under the "events" table name.
+DO $$
+DECLARE
+  oldest timestamptz;
+BEGIN
+  IF EXISTS (
+    SELECT 1 FROM pg_class
+    WHERE oid = 'public.events'::regclass AND relkind = 'r'
+  ) THEN
+    LOCK TABLE public.events IN ACCESS EXCLUSIVE MODE;
+    ALTER TABLE public.events RENAME TO events_unpartitioned;
+    ALTER INDEX IF EXISTS public.events_pkey RENAME TO events_unpartitioned_pkey;
+
+    CREATE TABLE public.events (
+      LIKE public.events_unpartitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS,
+      PRIMARY KEY (id, created_at)
+    ) PARTITION BY RANGE (created_at);
+    ALTER TABLE public.events
+      ADD FOREIGN KEY (agent_id) REFERENCES agents(id) ON DELETE CASCADE;
+
+    SELECT min(created_at) INTO oldest FROM public.events_unpartitioned;
+    PERFORM public.ensure_events_partitions(coalesce(oldest, now())::date);
+
+    INSERT INTO public.events SELECT * FROM public.events_unpartitioned;
+    DROP TABLE public.events_unpartitioned;
+  END IF;
+END $$;
+
+SELECT public.ensure_events_partitions();
+
+-- Detach (into the events_archive schema) or drop every monthly partition
+-- that ends before the start of the month keep_months months ago; returns the
+-- partitions handled. Drop mode also purges expired rows from events_default.
+-- Expired rows are taken out of agents.total_spend and events_count, so the
+-- agents list keeps matching the events that still exist (last_activity_at
+-- is left alone). Past spend rollup buckets are kept; budgets only read the
+-- current day and month.
+CREATE OR REPLACE FUNCTION public.apply_events_retention(
+  keep_months integer,
+  retention_mode text DEFAULT 'detach'
+)
+RETURNS SETOF text
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  cutoff date := (date_trunc('month', now()) - make_interval(months => keep_months))::date;
+  part record;
+BEGIN
+  -- Same lock as ensure_events_partitions: one maintenance run at a time.
+  PERFORM pg_advisory_xact_lock(hashtext('public.events partition maintenance'));
+
+  IF keep_months < 0 THEN
+    RAISE EXCEPTION 'keep_months must be >= 0';
+  END IF;
+  IF retention_mode NOT IN ('detach', 'drop') THEN
+    RAISE EXCEPTION 'retention_mode must be detach or drop';
+  END IF;
+
+  FOR part IN
+    SELECT c.relname
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = 'public.events'::regclass
+      AND c.relname ~ '^events_y[0-9]{4}m[0-9]{2}$'
+      AND (to_date(substr(c.relname, 9), 'YYYY"m"MM') + interval '1 month')::date <= cutoff
+    ORDER BY c.relname
+  LOOP
+    -- Detach first in both modes: no insert can reach the partition while
+    -- its rows are subtracted from the agent stats.
+    EXECUTE format('ALTER TABLE public.events DETACH PARTITION public.%I', part.relname);
+    EXECUTE format(
+      'UPDATE agents a SET total_spend = a.total_spend - o.cost, events_count = a.events_count - o.cnt '
+      'FROM (SELECT agent_id, sum(cost) AS cost, count(*) AS cnt FROM public.%I GROUP BY agent_id) o '
+      'WHERE a.id = o.agent_id',
+      part.relname
+    );
+    IF retention_mode = 'drop' THEN
+      EXECUTE format('DROP TABLE public.%I', part.relname);
+    ELSE
+      CREATE SCHEMA IF NOT EXISTS events_archive;
+      EXECUTE format('ALTER TABLE public.%I SET SCHEMA events_archive', part.relname);
+    END IF;
+    RETURN NEXT part.relname;
+  END LOOP;
+
+  IF retention_mode = 'drop' THEN
+    WITH expired AS (
+      DELETE FROM public.events_default WHERE created_at < cutoff RETURNING agent_id, cost
+    )
+    UPDATE agents a
+    SET total_spend = a.total_spend - o.cost, events_count = a.events_count - o.cnt
+    FROM (SELECT agent_id, sum(cost) AS cost, count(*) AS cnt FROM expired GROUP BY agent_id) o
+    WHERE a.id = o.agent_id;
+  END IF;
+END $$;
+
 -- Create indexes after column is guaranteed to exist and be populated
 CREATE INDEX IF NOT EXISTS idx_events_agent_created_at
   ON events(agent_id, created_at DESC);
@@ -324,6 +496,197 @@ CREATE UNIQUE INDEX IF NOT EXISTS idx_commands_one_per_source_message
   ON commands(source_message_id)
   WHERE source_message_id IS NOT NULL AND kind = 'human_message';
 
+-- ============================================================================
+-- workspace_spend_rollup
+-- Day and month spend buckets, maintained by a statement-level trigger on
+-- events so budget checks and /v1/spend never scan a month of events.
+-- Rows are per agent (bounded by agent count, and less lock contention than a
+-- single hot row per workspace); deleting an agent drops its spend, matching
+-- the old join-on-agents sums.
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS workspace_spend_rollup (
+  workspace_id uuid NOT NULL,
+  agent_id uuid NOT NULL REFERENCES agents(id) ON DELETE CASCADE,
+  bucket text NOT NULL CHECK (bucket IN ('day', 'month')),
+  bucket_start date NOT NULL,
+  total_cost numeric(14,6) NOT NULL DEFAULT 0,
+  updated_at timestamptz NOT NULL DEFAULT now(),
+  PRIMARY KEY (workspace_id, bucket, bucket_start, agent_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_workspace_spend_rollup_agent
+  ON workspace_spend_rollup(agent_id);
+
+CREATE OR REPLACE FUNCTION public.events_rollup_spend()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  -- Ordered upsert keeps row-lock acquisition deterministic across concurrent batches.
+  INSERT INTO workspace_spend_rollup (workspace_id, agent_id, bucket, bucket_start, total_cost)
+  SELECT
+    n.workspace_id,
+    n.agent_id,
+    b.bucket,
+    date_trunc(b.bucket, n.created_at)::date,
+    sum(n.cost)
+  FROM new_events n
+  CROSS JOIN (VALUES ('day'), ('month')) AS b(bucket)
+  WHERE n.cost <> 0
+  GROUP BY 1, 2, 3, 4
+  ORDER BY 1, 3, 4, 2
+  ON CONFLICT (workspace_id, bucket, bucket_start, agent_id)
+  DO UPDATE SET
+    total_cost = workspace_spend_rollup.total_cost + EXCLUDED.total_cost,
+    updated_at = now();
+  RETURN NULL;
+END $$;
+
+DROP TRIGGER IF EXISTS events_rollup_spend ON events;
+CREATE TRIGGER events_rollup_spend
+  AFTER INSERT ON events
+  REFERENCING NEW TABLE AS new_events
+  FOR EACH STATEMENT
+  EXECUTE PROCEDURE public.events_rollup_spend();
+
+-- Rebuild every bucket from the events table. Used for the initial backfill and
+-- can be called manually to repair drift: SELECT public.rebuild_workspace_spend_rollup();
+CREATE OR REPLACE FUNCTION public.rebuild_workspace_spend_rollup()
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  LOCK TABLE events IN SHARE ROW EXCLUSIVE MODE;
+  DELETE FROM workspace_spend_rollup;
+  INSERT INTO workspace_spend_rollup (workspace_id, agent_id, bucket, bucket_start, total_cost)
+  SELECT
+    e.workspace_id,
+    e.agent_id,
+    b.bucket,
+    date_trunc(b.bucket, e.created_at)::date,
+    sum(e.cost)
+  FROM events e
+  CROSS JOIN (VALUES ('day'), ('month')) AS b(bucket)
+  WHERE e.cost <> 0
+  GROUP BY 1, 2, 3, 4;
+END $$;
+
+DO $$
+BEGIN
+  IF NOT EXISTS (SELECT 1 FROM workspace_spend_rollup LIMIT 1)
+     AND EXISTS (SELECT 1 FROM events WHERE cost <> 0 LIMIT 1) THEN
+    PERFORM public.rebuild_workspace_spend_rollup();
+  END IF;
+END $$;
+
+-- ============================================================================
+-- Denormalised agent stats
+-- total_spend, events_count and last_activity_at are maintained by
+-- statement-level triggers on events, commands and comms_messages, so the
+-- agents list is a single index scan instead of a join over every event.
+-- ============================================================================
+
+ALTER TABLE agents ADD COLUMN IF NOT EXISTS total_spend numeric(14,6) NOT NULL DEFAULT 0;
+ALTER TABLE agents ADD COLUMN IF NOT EXISTS events_count bigint NOT NULL DEFAULT 0;
+ALTER TABLE agents ADD COLUMN IF NOT EXISTS last_activity_at timestamptz;
+
+CREATE OR REPLACE FUNCTION public.events_bump_agent_stats()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  UPDATE agents a
+  SET
+    total_spend = a.total_spend + n.cost,
+    events_count = a.events_count + n.cnt,
+    last_activity_at = greatest(a.last_activity_at, n.latest)
+  FROM (
+    SELECT agent_id, sum(cost) AS cost, count(*) AS cnt, max(created_at) AS latest
+    FROM new_events
+    GROUP BY agent_id
+  ) n
+  WHERE a.id = n.agent_id;
+  RETURN NULL;
+END $$;
+
+DROP TRIGGER IF EXISTS events_bump_agent_stats ON events;
+CREATE TRIGGER events_bump_agent_stats
+  AFTER INSERT ON events
+  REFERENCING NEW TABLE AS new_events
+  FOR EACH STATEMENT
+  EXECUTE PROCEDURE public.events_bump_agent_stats();
+
+-- Shared by commands and comms_messages: both only move last_activity_at forward.
+CREATE OR REPLACE FUNCTION public.bump_agent_last_activity()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  UPDATE agents a
+  SET last_activity_at = greatest(a.last_activity_at, n.latest)
+  FROM (
+    SELECT agent_id, max(created_at) AS latest
+    FROM new_rows
+    GROUP BY agent_id
+  ) n
+  WHERE a.id = n.agent_id;
+  RETURN NULL;
+END $$;
+
+DROP TRIGGER IF EXISTS commands_bump_agent_last_activity ON commands;
+CREATE TRIGGER commands_bump_agent_last_activity
+  AFTER INSERT ON commands
+  REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT
+  EXECUTE PROCEDURE public.bump_agent_last_activity();
+
+DROP TRIGGER IF EXISTS comms_messages_bump_agent_last_activity ON comms_messages;
+CREATE TRIGGER comms_messages_bump_agent_last_activity
+  AFTER INSERT ON comms_messages
+  REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT
+  EXECUTE PROCEDURE public.bump_agent_last_activity();
+
+-- Recompute every agent's stats from source tables. Used for the initial
+-- backfill and can be called manually to repair drift: SELECT public.rebuild_agent_stats();
+CREATE OR REPLACE FUNCTION public.rebuild_agent_stats()
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  LOCK TABLE events, commands, comms_messages IN SHARE ROW EXCLUSIVE MODE;
+  UPDATE agents a
+  SET
+    total_spend = coalesce(e.cost, 0),
+    events_count = coalesce(e.cnt, 0),
+    last_activity_at = greatest(e.latest, c.latest, m.latest)
+  FROM agents src
+  LEFT JOIN (
+    SELECT agent_id, sum(cost) AS cost, count(*) AS cnt, max(created_at) AS latest
+    FROM events GROUP BY agent_id
+  ) e ON e.agent_id = src.id
+  LEFT JOIN (
+    SELECT agent_id, max(created_at) AS latest FROM commands GROUP BY agent_id
+  ) c ON c.agent_id = src.id
+  LEFT JOIN (
+    SELECT agent_id, max(created_at) AS latest FROM comms_messages GROUP BY agent_id
+  ) m ON m.agent_id = src.id
+  WHERE a.id = src.id;
+END $$;
+
+DO $$
+BEGIN
+  IF EXISTS (
+    SELECT 1 FROM agents a
+    WHERE a.events_count = 0
+      AND EXISTS (SELECT 1 FROM events e WHERE e.agent_id = a.id)
+    LIMIT 1
+  ) THEN
+    PERFORM public.rebuild_agent_stats();
+  END IF;
+END $$;
+
 -- ============================================================================
 -- workshop_tasks
 -- ============================================================================
@@ -368,6 +731,7 @@ ALTER TABLE tasks           ENABLE ROW LEVEL SECURITY;
 ALTER TABLE commands        ENABLE ROW LEVEL SECURITY;
 ALTER TABLE comms_messages  ENABLE ROW LEVEL SECURITY;
 ALTER TABLE workshop_tasks  ENABLE ROW LEVEL SECURITY;
+ALTER TABLE workspace_spend_rollup ENABLE ROW LEVEL SECURITY;
 
 DROP POLICY IF EXISTS "workspace_select" ON agents;
 CREATE POLICY "workspace_select" ON agents
@@ -405,6 +769,12 @@ CREATE POLICY "workspace_select" ON workshop_tasks
     workspace_id = (SELECT workspace_id FROM public.users WHERE id = auth.uid())
   );
 
+DROP POLICY IF EXISTS "workspace_select" ON workspace_spend_rollup;
+CREATE POLICY "workspace_select" ON workspace_spend_rollup
+  FOR SELECT USING (
+    workspace_id = (SELECT workspace_id FROM public.users WHERE id = auth.uid())
+  );
+
 -- ============================================================================
 -- vault_secrets
 -- Values are encrypted at rest (AES-128-CBC via Fernet) by the backend.
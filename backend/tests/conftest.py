@@ -0,0 +1,31 @@
+"""Shared fixtures. These tests need no database: routes run against stubs."""
+from __future__ import annotations
+
+import os
+from uuid import uuid4
+
+import pytest
+
+# app.config reads these at import time; the pools are only opened on startup.
+os.environ.setdefault("DATABASE_URL", "postgresql://jarvis@localhost/jarvis")
+os.environ.setdefault("CONTROL_PLANE_TOKEN", "test-control-plane")
+os.environ.setdefault("SUPABASE_JWT_SECRET", "test-jwt-secret")
+
+from app import main  # noqa: E402
+
+
+@pytest.fixture
+def user() -> main.AuthenticatedUser:
+    return main.AuthenticatedUser(id=uuid4(), email="ops@example.com", workspace_id=uuid4())
+
+
+@pytest.fixture
+def client(user: main.AuthenticatedUser):
+    """TestClient with dashboard auth stubbed out; the lifespan (pools, workers) is not run."""
+    from fastapi.testclient import TestClient
+
+    main.app.dependency_overrides[main._require_user_auth] = lambda: user
+    try:
+        yield TestClient(main.app)
+    finally:
+        main.app.dependency_overrides.clear()
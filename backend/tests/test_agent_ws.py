@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+from datetime import datetime, timezone
+from typing import Any
+from uuid import uuid4
+
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+from app import main
+
+
+def _command_row(agent_id: Any, content: str) -> dict[str, Any]:
+    return {
+        "id": uuid4(),
+        "agent_id": agent_id,
+        "kind": "human_message",
+        "payload": {"content": content},
+        "status": "pending",
+        "created_at": datetime.now(timezone.utc),
+        "source_task_id": None,
+        "source_message_id": None,
+    }
+
+
+class _FakePool:
+    """Answers every query with the current contents of *rows*."""
+
+    def __init__(self, rows: list[dict[str, Any]]) -> None:
+        self.rows = rows
+
+    @contextlib.asynccontextmanager
+    async def connection(self):
+        rows = self.rows
+
+        class _Cursor:
+            async def fetchall(self) -> list[dict[str, Any]]:
+                return list(rows)
+
+        class _Conn:
+            async def execute(self, *args: Any, **kwargs: Any) -> _Cursor:
+                return _Cursor()
+
+        yield _Conn()
+
+
+class _FakeWebSocket:
+    def __init__(self) -> None:
+        self.sent: list[dict[str, Any]] = []
+
+    async def send_text(self, text: str) -> None:
+        self.sent.append(json.loads(text))
+
+
+@pytest.fixture
+def agent() -> main.AgentIdentity:
+    return main.AgentIdentity(agent_id=uuid4(), workspace_id=uuid4())
+
+
+async def _until(predicate) -> None:
+    for _ in range(200):
+        if predicate():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition not reached")
+
+
+def test_push_commands_once_and_forget_settled_ones(monkeypatch, agent) -> None:
+    first = _command_row(agent.agent_id, "first")
+    second = _command_row(agent.agent_id, "second")
+    pool = _FakePool([first])
+    monkeypatch.setattr(main, "get_async_db_pool", lambda: pool)
+    subscriptions: list[Any] = []
+    subscribe = main._sse_subscribe
+
+    def capture(channel: str, *args: Any):
+        q = subscribe(channel, *args)
+        subscriptions.append(q)
+        return q
+
+    monkeypatch.setattr(main, "_sse_subscribe", capture)
+
+    async def scenario() -> None:
+        ws = _FakeWebSocket()
+        sock = main._AgentSocket(ws, "token", agent)  # type: ignore[arg-type]
+        task = asyncio.create_task(sock._push_commands())
+        try:
+            await _until(lambda: len(ws.sent) == 1)
+            q = subscriptions[0]
+            # A wake-up with nothing new pushes nothing again.
+            q.offer(q.channels[0], 1, "update")
+            await asyncio.sleep(0.05)
+            assert len(ws.sent) == 1
+            # "first" was acked over HTTP; "second" arrives.
+            pool.rows[:] = [second]
+            q.offer(q.channels[0], 2, "update")
+            await _until(lambda: len(ws.sent) == 2)
+            assert [f["command"]["payload"]["content"] for f in ws.sent] == ["first", "second"]
+            assert sock._delivered == {second["id"]}
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        assert subscriptions[0].channels[0] not in main._broadcaster.queues
+
+    asyncio.run(scenario())
+
+
+def test_rejects_unknown_token(client, monkeypatch) -> None:
+    monkeypatch.setattr(main, "get_async_db_pool", lambda: _FakePool([]))
+
+    async def lookup(conn: Any, token: str) -> None:
+        return None
+
+    monkeypatch.setattr(main, "_lookup_agent_identity_async", lookup)
+    with client.websocket_connect("/v1/agent/ws") as ws:
+        ws.send_text(json.dumps({"type": "auth", "token": "nope"}))
+        with pytest.raises(WebSocketDisconnect) as closed:
+            ws.receive_text()
+    assert closed.value.code == 1008
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import contextlib
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any
+from uuid import uuid4
+
+import pytest
+
+from app import main
+
+AGENT = main.AgentIdentity(agent_id=uuid4(), workspace_id=uuid4())
+# Everything in one batch lands in the same microsecond.
+SAME_INSTANT = datetime(2026, 10, 1, tzinfo=timezone.utc)
+
+
+class _BatchConnection:
+    """Answers the batch inserts with RETURNING rows in reverse and identical timestamps."""
+
+    @contextlib.contextmanager
+    def transaction(self):
+        yield
+
+    def execute(self, query: str, params: Any = None, prepare: bool | None = None) -> SimpleNamespace:
+        rows: list[dict[str, Any]] = []
+        if "insert into events" in query:
+            agent_id, _, ids, types, messages, costs, *_ = params
+            rows = [
+                {"id": i, "agent_id": agent_id, "type": t, "message": m, "cost": c, "created_at": SAME_INSTANT}
+                for i, t, m, c in zip(ids, types, messages, costs)
+            ]
+        elif "insert into tasks" in query:
+            agent_id, _, ids, actions, _ = params
+            rows = [
+                {
+                    "id": i,
+                    "agent_id": agent_id,
+                    "agent_name": "scout",
+                    "proposed_action": action,
+                    "completed_actions": [],
+                    "status": "pending",
+                    "created_at": SAME_INSTANT,
+                }
+                for i, action in zip(ids, actions)
+            ]
+        rows.reverse()
+        return SimpleNamespace(fetchall=lambda: rows, fetchone=lambda: None)
+
+
+@pytest.fixture
+def batch_client(client, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(main, "_require_agent", lambda connection, token: AGENT)
+    monkeypatch.setattr(main, "_sse_publish", lambda *args, **kwargs: None)
+    main.app.dependency_overrides[main.get_db] = lambda: _BatchConnection()
+    return client
+
+
+def test_results_follow_request_order_despite_tied_timestamps(batch_client) -> None:
+    events = [
+        {"type": "action", "message": "one"},
+        {"type": "approval_request", "message": "two", "requiresApproval": True, "proposedAction": "ship A"},
+        {"type": "action", "message": "three"},
+        {"type": "approval_request", "message": "four", "requiresApproval": True, "proposedAction": "ship B"},
+    ]
+    response = batch_client.post("/v1/events/batch", json={"events": events}, headers={"X-Agent-Token": "t"})
+    assert response.status_code == 201
+    results = response.json()["events"]
+    assert [result["event"]["message"] for result in results] == ["one", "two", "three", "four"]
+    assert [result["taskId"] is not None for result in results] == [False, True, False, True]
+    assert results[1]["taskId"] != results[3]["taskId"]
@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+import pytest
+
+from app import broadcast
+from app.broadcast import RESYNC, PostgresBroadcaster
+
+
+def _drain(q: broadcast.Subscription) -> list[tuple[str, str]]:
+    frames = []
+    while q.qsize():
+        channel, _, data = q._items.popleft()
+        frames.append((channel, data))
+    return frames
+
+
+class _FakeListenConnection:
+    """A LISTEN connection that delivers *payloads*, then drops (or idles if *last*)."""
+
+    def __init__(self, payloads: list[str], last: bool) -> None:
+        self._payloads = payloads
+        self._last = last
+
+    async def __aenter__(self) -> _FakeListenConnection:
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        return None
+
+    async def execute(self, query: str) -> None:
+        return None
+
+    async def notifies(self):
+        for payload in self._payloads:
+            yield type("Notify", (), {"payload": payload})()
+        if self._last:
+            await asyncio.Event().wait()
+        raise OSError("server closed the connection")
+
+
+def test_listen_reconnect_resyncs_local_channels(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(broadcast, "_PG_RECONNECT_DELAY_SECONDS", 0)
+    connections = [
+        _FakeListenConnection(['{"o": "other", "c": "events:w", "d": "update"}'], last=False),
+        _FakeListenConnection([], last=True),
+    ]
+
+    async def scenario() -> None:
+        done = asyncio.Event()
+
+        async def connect(*args: Any, **kwargs: Any) -> _FakeListenConnection:
+            conn = connections.pop(0)
+            if not connections:
+                done.set()
+            return conn
+
+        monkeypatch.setattr(broadcast.psycopg.AsyncConnection, "connect", connect)
+        b = PostgresBroadcaster("postgresql://unused")
+        listening = b.subscribe("events:w")
+        logged_only = "spend:w"
+        b._deliver_local(logged_only, "update", True)
+        task = asyncio.create_task(b._listen_forever())
+        try:
+            await asyncio.wait_for(done.wait(), timeout=1)
+            await asyncio.sleep(0.01)
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+        # Delivered before the drop, then one RESYNC for the gap.
+        assert _drain(listening) == [("events:w", "update"), ("events:w", RESYNC)]
+        # A client resuming from before the gap on a channel nobody was
+        # subscribed to is replayed the RESYNC as well.
+        resumed = b.subscribe(logged_only, b.event_id(1))
+        assert _drain(resumed) == [(logged_only, RESYNC)]
+
+    asyncio.run(scenario())
+
+
+# ── Subscription: coalescing and slow consumers ──────────────────────────────
+
+
+def test_identical_pending_signals_coalesce() -> None:
+    q = broadcast.Subscription(("a", "b"), max_size=10, slow_consumer_policy="resync")
+    assert q.offer("a", 1, "update")
+    assert q.offer("a", 2, "update")
+    assert q.offer("b", 3, "update")  # same payload, other channel
+    assert q.offer("a", 4, "chunk", coalesce=False)
+    assert q.offer("a", 5, "chunk", coalesce=False)
+    assert _drain(q) == [("a", "update"), ("b", "update"), ("a", "chunk"), ("a", "chunk")]
+
+
+def test_overflow_resyncs_every_channel() -> None:
+    q = broadcast.Subscription(("a", "b"), max_size=2, slow_consumer_policy="resync")
+    q.offer("a", 1, "one", coalesce=False)
+    q.offer("b", 2, "two", coalesce=False)
+    assert not q.offer("a", 3, "three", coalesce=False)
+    assert _drain(q) == [("a", RESYNC), ("b", RESYNC)]
+    assert not q.closed
+
+
+def test_overflow_disconnects_slow_consumer() -> None:
+    q = broadcast.Subscription(("a",), max_size=1, slow_consumer_policy="disconnect")
+    q.offer("a", 1, "one")
+    assert not q.offer("a", 2, "two")
+    assert q.closed
+    assert q.offer("a", 3, "three")  # ignored once closed
+
+    async def consume() -> list[str]:
+        received = [(await q.get())[2]]
+        with pytest.raises(broadcast.SubscriptionClosed):
+            await q.get()
+        return received
+
+    assert asyncio.run(consume()) == ["one"]
+
+
+def test_get_waits_for_an_offer() -> None:
+    async def scenario() -> broadcast.Frame:
+        q = broadcast.Subscription(("a",), max_size=4, slow_consumer_policy="resync")
+        asyncio.get_running_loop().call_later(0.01, q.offer, "a", 7, "hello")
+        return await asyncio.wait_for(q.get(), timeout=1)
+
+    assert asyncio.run(scenario()) == ("a", 7, "hello")
+
+
+def test_broadcaster_counts_overflows_and_unsubscribes() -> None:
+    b = broadcast.Broadcaster(max_queue_size=1)
+    q = b.subscribe("a")
+    b._deliver_local("a", "one", False)
+    b._deliver_local("a", "two", False)
+    assert b.overflows == 1
+    b.unsubscribe(q)
+    b.unsubscribe(q)
+    assert "a" not in b.queues
+
+
+# ── Replay from Last-Event-ID ────────────────────────────────────────────────
+
+
+def _published(b: broadcast.Broadcaster, channel: str, *payloads: str) -> list[str]:
+    ids = []
+    for data in payloads:
+        b._deliver_local(channel, data, False)
+        ids.append(b.event_id(b._seq))
+    return ids
+
+
+def test_resume_replays_missed_frames() -> None:
+    b = broadcast.Broadcaster(replay_size=10)
+    ids = _published(b, "a", "one", "two", "three")
+    q = b.subscribe("a", ids[0])
+    assert q.resumed is True
+    assert [(seq, data) for _, seq, data in q._items] == [(2, "two"), (3, "three")]
+
+
+def test_resume_at_head_replays_nothing() -> None:
+    b = broadcast.Broadcaster(replay_size=10)
+    ids = _published(b, "a", "one")
+    q = b.subscribe("a", ids[-1])
+    assert q.resumed is True
+    assert q.qsize() == 0
+
+
+@pytest.mark.parametrize(
+    "last_event_id",
+    ["otherepoch-1", "garbage", "{epoch}-99", "{epoch}--1", "{epoch}-x"],
+)
+def test_unknown_ids_resync(last_event_id: str) -> None:
+    b = broadcast.Broadcaster(replay_size=10)
+    _published(b, "a", "one", "two")
+    q = b.subscribe("a", last_event_id.format(epoch=b.epoch))
+    assert q.resumed is False
+    assert _drain(q) == [("a", RESYNC)]
+
+
+def test_gap_past_the_ring_resyncs() -> None:
+    b = broadcast.Broadcaster(replay_size=2)
+    ids = _published(b, "a", "one", "two", "three", "four")
+    assert _drain(b.subscribe("a", ids[0])) == [("a", RESYNC)]
+    # The oldest frame still held can be resumed from.
+    assert _drain(b.subscribe("a", ids[1])) == [("a", "three"), ("a", "four")]
+
+
+def test_channel_log_floor_tracks_evictions() -> None:
+    log = broadcast._ChannelLog(floor=5, size=2)
+    log.append(6, "x")
+    log.append(7, "y")
+    assert log.floor == 5
+    log.append(8, "z")
+    assert log.floor == 6
+    assert list(log.frames) == [(7, "y"), (8, "z")]
+
+
+def test_evicted_channel_logs_resync_instead_of_replaying_nothing() -> None:
+    b = broadcast.Broadcaster(replay_size=10, max_replay_channels=1)
+    ids = _published(b, "a", "one", "two")
+    _published(b, "b", "three")  # evicts the log for "a", and "two" with it
+    assert _drain(b.subscribe("a", ids[0])) == [("a", RESYNC)]
+    # Nothing newer than the evicted log was missed.
+    assert _drain(b.subscribe("a", ids[1])) == []
+    # A channel never seen since the eviction is behind the same floor.
+    assert _drain(b.subscribe("c", ids[0])) == [("c", RESYNC)]
+
+
+def test_multiplexed_resume_merges_channels_in_publish_order() -> None:
+    b = broadcast.Broadcaster(replay_size=10)
+    (start,) = _published(b, "a", "a0")
+    _published(b, "b", "b1")
+    _published(b, "a", "a2")
+    _published(b, "c", "c3")  # not subscribed
+    _published(b, "b", "b4")
+    q = b.subscribe_many(("a", "b"), start)
+    assert _drain(q) == [("b", "b1"), ("a", "a2"), ("b", "b4")]
+    b._deliver_local("a", "live", False)
+    assert _drain(q) == [("a", "live")]
+    b.unsubscribe(q)
+    assert not b.queues
+
+
+def test_multiplexed_resume_resyncs_only_the_stale_channel() -> None:
+    b = broadcast.Broadcaster(replay_size=1)
+    (start,) = _published(b, "a", "a0")
+    _published(b, "a", "a1", "a2")  # "a1" falls out of a's ring
+    _published(b, "b", "b3")
+    q = b.subscribe_many(("a", "b"), start)
+    assert q.resumed is False
+    assert _drain(q) == [("b", "b3"), ("a", RESYNC)]
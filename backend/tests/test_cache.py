@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+
+from app import cache
+from app.cache import TTLCache
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> _Clock:
+    fake = _Clock()
+    monkeypatch.setattr(cache, "time", SimpleNamespace(monotonic=fake))
+    return fake
+
+
+def test_entries_expire_after_ttl(clock: _Clock) -> None:
+    c: TTLCache[str, int] = TTLCache(max_size=10, ttl_seconds=60)
+    c.set("a", 1)
+    clock.now += 59.9
+    assert c.get("a") == 1
+    clock.now += 0.1
+    assert c.get("a") is None
+    assert len(c) == 0
+
+
+def test_per_entry_ttl_only_shortens(clock: _Clock) -> None:
+    c: TTLCache[str, int] = TTLCache(max_size=10, ttl_seconds=60)
+    c.set("short", 1, ttl_seconds=5)
+    c.set("capped", 2, ttl_seconds=600)
+    c.set("expired", 3, ttl_seconds=0)
+    clock.now += 10
+    assert c.get("short") is None
+    assert c.get("capped") == 2
+    clock.now += 50
+    assert c.get("capped") is None
+    assert c.get("expired") is None
+
+
+def test_evicts_least_recently_used(clock: _Clock) -> None:
+    c: TTLCache[str, int] = TTLCache(max_size=2, ttl_seconds=60)
+    c.set("a", 1)
+    c.set("b", 2)
+    assert c.get("a") == 1  # "b" is now the oldest
+    c.set("c", 3)
+    assert c.get("b") is None
+    assert (c.get("a"), c.get("c")) == (1, 3)
+
+
+@pytest.mark.parametrize("max_size, ttl", [(0, 60), (10, 0)])
+def test_zero_size_or_ttl_disables(clock: _Clock, max_size: int, ttl: float) -> None:
+    c: TTLCache[str, int] = TTLCache(max_size=max_size, ttl_seconds=ttl)
+    assert not c.enabled
+    c.set("a", 1)
+    assert c.get("a") is None
+    assert c.setdefault("a", 2) == 2
+    assert len(c) == 0
+
+
+def test_setdefault_keeps_the_first_live_value(clock: _Clock) -> None:
+    c: TTLCache[str, list[int]] = TTLCache(max_size=10, ttl_seconds=60)
+    first = c.setdefault("a", [1])
+    assert c.setdefault("a", [2]) is first
+    clock.now += 60
+    assert c.setdefault("a", [3]) == [3]
+
+
+def test_pop_discard_where_and_clear(clock: _Clock) -> None:
+    c: TTLCache[str, int] = TTLCache(max_size=10, ttl_seconds=60)
+    for key, value in (("a", 1), ("b", 2), ("c", 3)):
+        c.set(key, value)
+    c.pop("a")
+    c.pop("missing")
+    assert c.discard_where(lambda value: value % 2 == 1) == 1
+    assert (c.get("a"), c.get("b"), c.get("c")) == (None, 2, None)
+    c.clear()
+    assert len(c) == 0
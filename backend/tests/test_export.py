@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import contextlib
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+
+from app import main
+
+
+@pytest.fixture
+def exports(monkeypatch: pytest.MonkeyPatch) -> list[tuple[datetime, datetime, str]]:
+    calls: list[tuple[datetime, datetime, str]] = []
+
+    def fake_stream(workspace_id, start, end, export_format, authorization):
+        calls.append((start, end, export_format))
+        yield ""
+
+    monkeypatch.setattr(main, "_stream_event_export", fake_stream)
+    return calls
+
+
+def test_date_only_from_is_utc(client, exports) -> None:
+    response = client.get("/v1/events/export", params={"from": "2026-10-01"})
+    assert response.status_code == 200
+    start, end, export_format = exports[0]
+    assert start == datetime(2026, 10, 1, tzinfo=timezone.utc)
+    assert end.tzinfo is not None
+    assert export_format == "ndjson"
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+
+def test_naive_to_with_aware_from(client, exports) -> None:
+    response = client.get(
+        "/v1/events/export",
+        params={"from": "2026-10-01T00:00:00+00:00", "to": "2026-10-02", "format": "csv"},
+    )
+    assert response.status_code == 200
+    assert exports[0][:2] == (
+        datetime(2026, 10, 1, tzinfo=timezone.utc),
+        datetime(2026, 10, 2, tzinfo=timezone.utc),
+    )
+    assert 'filename="events-20261001-20261002.csv"' in response.headers["content-disposition"]
+
+
+def test_to_must_follow_from(client, exports) -> None:
+    response = client.get("/v1/events/export", params={"from": "2026-10-02", "to": "2026-10-01"})
+    assert response.status_code == 400
+    assert exports == []
+
+
+@pytest.mark.parametrize(
+    "params",
+    [{}, {"from": "yesterday"}, {"from": "2026-10-01", "format": "xml"}],
+)
+def test_invalid_params_are_422(client, exports, params) -> None:
+    assert client.get("/v1/events/export", params=params).status_code == 422
+    assert exports == []
+
+
+class _ExportCursor:
+    def __init__(self, rows: list[dict]) -> None:
+        self.rows = rows
+        self.itersize = 0
+
+    def __enter__(self) -> _ExportCursor:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+    def execute(self, query: str, params=None) -> None:
+        pass
+
+    def fetchmany(self, size: int) -> list[dict]:
+        batch, self.rows = self.rows[:size], self.rows[size:]
+        return batch
+
+
+class _ExportConnection:
+    def __init__(self, rows: list[dict]) -> None:
+        self.rows = rows
+        self.statements: list[str] = []
+
+    @contextlib.contextmanager
+    def transaction(self):
+        yield
+
+    def execute(self, query: str, params=None) -> None:
+        self.statements.append(query)
+
+    def cursor(self, name: str) -> _ExportCursor:
+        return _ExportCursor(self.rows)
+
+
+def _row(n: int) -> dict:
+    return {
+        "id": uuid4(),
+        "agent_id": uuid4(),
+        "agent_name": "scout",
+        "type": "action",
+        "message": f"step {n}",
+        "cost": 0,
+        "requires_approval": False,
+        "proposed_action": None,
+        "created_at": datetime(2026, 10, 1, 0, 0, n, tzinfo=timezone.utc),
+    }
+
+
+def test_streams_batches_and_releases_the_connection(client, monkeypatch: pytest.MonkeyPatch) -> None:
+    connection = _ExportConnection([_row(n) for n in range(3)])
+    released: list[str | None] = []
+
+    @contextlib.contextmanager
+    def fake_read_db_connection(authorization):
+        yield connection
+        released.append(authorization)
+
+    monkeypatch.setattr(main, "_EVENT_EXPORT_BATCH_ROWS", 2)
+    monkeypatch.setattr(main, "read_db_connection", fake_read_db_connection)
+    response = client.get(
+        "/v1/events/export",
+        params={"from": "2026-10-01", "format": "csv"},
+        headers={"Authorization": "Bearer t"},
+    )
+    assert response.status_code == 200
+    lines = response.text.splitlines()
+    assert lines[0].startswith("id,agentId,")
+    assert [line.split(",")[4] for line in lines[1:]] == ["step 0", "step 1", "step 2"]
+    assert "idle_in_transaction_session_timeout" in connection.statements[0]
+    assert released == ["Bearer t"]
+
+
+def test_database_errors_surface_before_the_response_starts(client, monkeypatch: pytest.MonkeyPatch) -> None:
+    @contextlib.contextmanager
+    def unavailable(authorization):
+        raise HTTPException(status_code=503, detail="Database pool is not initialized.")
+        yield
+
+    monkeypatch.setattr(main, "read_db_connection", unavailable)
+    response = client.get("/v1/events/export", params={"from": "2026-10-01"})
+    assert response.status_code == 503
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import contextlib
+import threading
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any
+from uuid import UUID, uuid4
+
+import psycopg
+import pytest
+from fastapi import HTTPException
+
+from app import ingest, main
+from app.ingest import IngestQueue, IngestQueueFull, QueuedEvent
+
+WORKSPACE = uuid4()
+
+
+def _event(cost: float = 0.0, message: str = "step") -> QueuedEvent:
+    return QueuedEvent(
+        id=uuid4(),
+        agent_id=uuid4(),
+        workspace_id=WORKSPACE,
+        type="action",
+        message=message,
+        cost=cost,
+        completed_actions=[],
+        created_at=datetime.now(timezone.utc),
+    )
+
+
+class _FakeConnection:
+    def __init__(self, pool: _FakePool) -> None:
+        self._pool = pool
+
+    @contextlib.contextmanager
+    def transaction(self):
+        yield
+
+    def execute(self, query: str, params: Any = None) -> None:
+        if "insert into events" not in query:
+            return
+        self._pool.gate.wait(5)
+        messages = [value for value in params if isinstance(value, str) and value.startswith("msg")]
+        if any(message == "msg-bad" for message in messages):
+            raise psycopg.IntegrityError("agent deleted")
+        self._pool.inserts.append(messages)
+
+
+class _FakePool:
+    def __init__(self) -> None:
+        self.inserts: list[list[str]] = []
+        self.gate = threading.Event()
+        self.gate.set()
+
+    @contextlib.contextmanager
+    def connection(self):
+        yield _FakeConnection(self)
+
+
+@pytest.fixture
+def pool(monkeypatch: pytest.MonkeyPatch) -> _FakePool:
+    fake = _FakePool()
+    monkeypatch.setattr(ingest, "get_db_pool", lambda: fake)
+    return fake
+
+
+def _queue(flushed: list[QueuedEvent], max_size: int = 100, max_rows: int = 3) -> IngestQueue:
+    settings = SimpleNamespace(
+        ingest_queue_max_size=max_size,
+        ingest_flush_interval_ms=20,
+        ingest_flush_max_rows=max_rows,
+        ingest_synchronous_commit="off",
+        ingest_drain_timeout_seconds=5,
+    )
+    return IngestQueue(settings, lambda connection, events: flushed.extend(events))  # type: ignore[arg-type]
+
+
+def test_close_drains_in_groups(pool: _FakePool) -> None:
+    flushed: list[QueuedEvent] = []
+    q = _queue(flushed)
+    q.start()
+    events = [_event(message=f"msg-{i}") for i in range(7)]
+    for event in events:
+        q.put(event)
+    q.close()
+
+    assert [m for group in pool.inserts for m in group] == [e.message for e in events]
+    assert all(len(group) <= 3 for group in pool.inserts)
+    assert flushed == events
+    with pytest.raises(IngestQueueFull):
+        q.put(_event())
+
+
+def test_full_queue_rejects(pool: _FakePool) -> None:
+    q = _queue([], max_size=1)
+    q.put(_event(cost=1.0))
+    with pytest.raises(IngestQueueFull):
+        q.put(_event(cost=2.0))
+    assert q.pending_cost(WORKSPACE) == pytest.approx(1.0)
+
+
+def test_bad_row_does_not_sink_its_group(pool: _FakePool) -> None:
+    flushed: list[QueuedEvent] = []
+    q = _queue(flushed)
+    good, bad = _event(message="msg-good"), _event(message="msg-bad")
+    q._flush([good, bad])
+    assert pool.inserts == [["msg-good"]]
+    assert flushed == [good]
+
+
+def test_pending_cost_until_committed(pool: _FakePool) -> None:
+    q = _queue([])
+    pool.gate.clear()  # hold the writer inside its insert
+    q.start()
+    q.put(_event(cost=1.5, message="msg-a"))
+    q.put(_event(cost=2.5, message="msg-b"))
+    q.put(_event(cost=0.0, message="msg-c"))
+    assert q.pending_cost(WORKSPACE) == pytest.approx(4.0)
+    pool.gate.set()
+    q.close()
+    assert q.pending_cost(WORKSPACE) == 0.0
+
+
+def _budget_fixture(monkeypatch: pytest.MonkeyPatch, budget: float, spend: float, queued: float) -> None:
+    monkeypatch.setattr(main, "_fetch_monthly_budget", lambda connection, workspace_id: budget)
+    monkeypatch.setattr(main, "_fetch_monthly_spend", lambda connection, workspace_id: spend)
+    monkeypatch.setattr(main, "_ingest_queue", SimpleNamespace(pending_cost=lambda workspace_id: queued))
+    monkeypatch.setattr(
+        main,
+        "_budget_counters",
+        main.TTLCache(max_size=10, ttl_seconds=60),
+    )
+
+
+def test_budget_refresh_counts_queued_spend(monkeypatch: pytest.MonkeyPatch) -> None:
+    workspace_id: UUID = uuid4()
+    _budget_fixture(monkeypatch, budget=100.0, spend=5.0, queued=90.0)
+    main._enforce_budget_cap_cached(None, workspace_id, 10.0)  # type: ignore[arg-type]
+    with pytest.raises(HTTPException) as rejected:
+        main._enforce_budget_cap_cached(None, workspace_id, 0.01)  # type: ignore[arg-type]
+    assert rejected.value.status_code == 402
+
+
+def test_racing_refreshes_share_one_counter(monkeypatch: pytest.MonkeyPatch) -> None:
+    workspace_id: UUID = uuid4()
+    _budget_fixture(monkeypatch, budget=100.0, spend=0.0, queued=0.0)
+    barrier = threading.Barrier(8)
+    fetch = main._fetch_monthly_spend
+
+    def slow_spend(connection: Any, workspace_id: UUID) -> float:
+        barrier.wait(5)  # every thread misses the cache before any stores
+        return fetch(connection, workspace_id)
+
+    monkeypatch.setattr(main, "_fetch_monthly_spend", slow_spend)
+    threads = [
+        threading.Thread(target=main._enforce_budget_cap_cached, args=(None, workspace_id, 1.0))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    counter = main._budget_counters.get(workspace_id)
+    assert counter is not None and counter.spend == pytest.approx(8.0)
+
+
+def test_spend_from_other_paths_counts_against_the_cap(monkeypatch: pytest.MonkeyPatch) -> None:
+    workspace_id: UUID = uuid4()
+    _budget_fixture(monkeypatch, budget=100.0, spend=0.0, queued=0.0)
+    main._enforce_budget_cap_cached(None, workspace_id, 1.0)  # type: ignore[arg-type]
+    main._count_spend(workspace_id, 99.0)  # e.g. a batch or webhook committed on this worker
+    with pytest.raises(HTTPException):
+        main._enforce_budget_cap_cached(None, workspace_id, 1.0)  # type: ignore[arg-type]
+
+
+class _BudgetConnection:
+    def execute(self, query: str, params: Any = None, prepare: bool | None = None) -> SimpleNamespace:
+        row = {"id": uuid4(), "monthly_budget": 500.0, "budget_alert_webhook_url": None, "daily": 0, "monthly": 0}
+        return SimpleNamespace(fetchone=lambda: row, fetchall=lambda: [])
+
+
+def test_raising_the_budget_drops_the_cached_counter(monkeypatch: pytest.MonkeyPatch, client: Any, user: Any) -> None:
+    _budget_fixture(monkeypatch, budget=100.0, spend=100.0, queued=0.0)
+    monkeypatch.setattr(main, "_sse_publish", lambda *args, **kwargs: None)
+    main.app.dependency_overrides[main.get_db] = lambda: _BudgetConnection()
+    with pytest.raises(HTTPException):
+        main._enforce_budget_cap_cached(None, user.workspace_id, 1.0)  # type: ignore[arg-type]
+
+    response = client.patch("/v1/spend/budget", json={"budget": 500.0})
+    assert response.status_code == 200
+    assert main._budget_counters.get(user.workspace_id) is None
+    monkeypatch.setattr(main, "_fetch_monthly_budget", lambda connection, workspace_id: 500.0)
+    main._enforce_budget_cap_cached(None, user.workspace_id, 1.0)  # type: ignore[arg-type]
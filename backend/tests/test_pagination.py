@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import base64
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException, Response
+
+from app import main
+
+
+def test_cursor_round_trip() -> None:
+    created_at = datetime(2026, 10, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+    row_id = uuid4()
+    cursor = main._encode_cursor(created_at, row_id)
+    assert "=" not in cursor
+    assert main._decode_cursor(cursor) == main.PageCursor(created_at, row_id)
+
+
+def test_cursor_round_trip_with_rank() -> None:
+    created_at = datetime(2026, 10, 1, tzinfo=timezone(timedelta(hours=2)))
+    row_id = uuid4()
+    decoded = main._decode_cursor(main._encode_cursor(created_at, row_id, rank=1))
+    assert decoded == main.PageCursor(created_at, row_id, 1)
+
+
+def test_missing_cursor_is_first_page() -> None:
+    assert main._decode_cursor(None) is None
+    assert main._decode_cursor("") is None
+    assert main._keyset_clause("e", None) == ("", ())
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        "not a cursor",
+        "2026-10-01T00:00:00+00:00",
+        f"2026-10-01T00:00:00+00:00|{uuid4()}|1|2",
+        f"yesterday|{uuid4()}",
+        "2026-10-01T00:00:00+00:00|not-a-uuid",
+        f"2026-10-01T00:00:00+00:00|{uuid4()}|first",
+    ],
+)
+def test_malformed_cursor_is_400(raw: str) -> None:
+    cursor = base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+    with pytest.raises(HTTPException) as rejected:
+        main._decode_cursor(cursor)
+    assert rejected.value.status_code == 400
+
+
+@pytest.mark.parametrize("cursor", ["%%%", "\xff\xfe", "a"])
+def test_undecodable_cursor_is_400(cursor: str) -> None:
+    with pytest.raises(HTTPException) as rejected:
+        main._decode_cursor(cursor)
+    assert rejected.value.status_code == 400
+
+
+def test_keyset_clause_binds_cursor() -> None:
+    cursor = main.PageCursor(datetime(2026, 10, 1, tzinfo=timezone.utc), uuid4())
+    sql, params = main._keyset_clause("e", cursor)
+    assert sql == "and e.created_at <= %s and (e.created_at, e.id) < (%s, %s::uuid)"
+    assert params == (cursor.created_at, cursor.created_at, cursor.id)
+
+
+def _rows(count: int) -> list[dict]:
+    start = datetime(2026, 10, 1, tzinfo=timezone.utc)
+    return [{"id": uuid4(), "created_at": start - timedelta(minutes=i), "pending": i % 2} for i in range(count)]
+
+
+def test_paginate_sets_next_cursor_only_when_more_remain() -> None:
+    rows = _rows(3)
+    response = Response()
+    assert main._paginate(response, rows, limit=3) == rows
+    assert main._NEXT_CURSOR_HEADER not in response.headers
+
+    rows = _rows(4)
+    response = Response()
+    page = main._paginate(response, rows, limit=3, rank_of=lambda row: row["pending"])
+    assert page == rows[:3]
+    cursor = main._decode_cursor(response.headers[main._NEXT_CURSOR_HEADER])
+    assert cursor == main.PageCursor(rows[2]["created_at"], rows[2]["id"], rows[2]["pending"])
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import json
+from types import SimpleNamespace
+from typing import Any
+from uuid import uuid4
+
+import pytest
+
+from app import main
+
+
+class _TotalsConnection:
+    def __init__(self, row: dict[str, Any] | None) -> None:
+        self.row = row
+        self.queries: list[tuple[str, Any]] = []
+
+    def execute(self, query: str, params: Any = None, prepare: bool | None = None) -> SimpleNamespace:
+        self.queries.append((query, params))
+        return SimpleNamespace(fetchone=lambda: self.row)
+
+
+@pytest.fixture
+def published(monkeypatch: pytest.MonkeyPatch) -> list[tuple[str, dict[str, Any]]]:
+    frames: list[tuple[str, dict[str, Any]]] = []
+    monkeypatch.setattr(
+        main, "_sse_publish", lambda channel, data="update", coalesce=True: frames.append((channel, json.loads(data)))
+    )
+    return frames
+
+
+def test_spend_frames_carry_totals_not_increments(published: list[tuple[str, dict[str, Any]]]) -> None:
+    workspace_id, spender, idle = uuid4(), uuid4(), uuid4()
+    connection = _TotalsConnection({"daily": 3.5, "monthly": 42.0, "agents": {str(spender): 12.25}})
+    main._publish_spend(connection, workspace_id, {spender: 0.5, idle: 0.0})  # type: ignore[arg-type]
+    assert connection.queries[0][1] == ([spender], workspace_id)
+    assert published == [
+        (
+            f"spend:{workspace_id}",
+            {"type": "spend", "daily": 3.5, "monthly": 42.0, "agents": [{"agentId": str(spender), "spend": 12.25}]},
+        )
+    ]
+
+
+def test_missing_rollup_rows_read_as_zero(published: list[tuple[str, dict[str, Any]]]) -> None:
+    workspace_id, agent_id = uuid4(), uuid4()
+    main._publish_spend(_TotalsConnection(None), workspace_id, {agent_id: 1.0})  # type: ignore[arg-type]
+    assert published[0][1] == {
+        "type": "spend", "daily": 0.0, "monthly": 0.0, "agents": [{"agentId": str(agent_id), "spend": 0.0}],
+    }
+
+
+def test_zero_cost_events_publish_nothing(published: list[tuple[str, dict[str, Any]]]) -> None:
+    connection = _TotalsConnection({})
+    main._publish_spend(connection, uuid4(), {uuid4(): 0.0})  # type: ignore[arg-type]
+    assert connection.queries == [] and published == []
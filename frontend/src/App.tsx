@@ -21,6 +21,7 @@ import Layout from './components/Layout';
 import ProtectedRoute from './components/ProtectedRoute';
 import { AuthProvider } from './contexts/AuthContext';
 import { InvalidationProvider } from './contexts/InvalidationContext';
+import { StreamProvider } from './contexts/StreamContext';
 import { Workshop } from './views/Workshop';
 import { CommsHub } from './views/CommsHub';
 import { KeyVault } from './views/KeyVault';
@@ -51,6 +52,7 @@ export default function App() {
   return (
     <AuthProvider>
       <InvalidationProvider>
+      <StreamProvider>
       <Router>
         <Routes>
           <Route path="/" element={<LandingPage />} />
@@ -78,6 +80,7 @@ export default function App() {
           <Route path="*" element={<Navigate to="/auth" replace />} />
         </Routes>
       </Router>
+      </StreamProvider>
       </InvalidationProvider>
     </AuthProvider>
   );
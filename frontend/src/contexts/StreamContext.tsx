@@ -0,0 +1,97 @@
+import { createContext, useCallback, useContext, useEffect, useRef } from 'react';
+import { useAuth } from '@/contexts/AuthContext';
+import { getSseToken, lastEventIdParam } from '@/lib/api';
+
+export type StreamChannel = 'events' | 'comms' | 'inbox' | 'spend';
+
+type StreamListener = (data: string) => void;
+
+type StreamContextType = {
+  listen: (channel: StreamChannel, listener: StreamListener) => () => void;
+};
+
+const CHANNELS: StreamChannel[] = ['events', 'comms', 'inbox', 'spend'];
+
+const API_BASE = (import.meta.env.VITE_API_BASE_URL as string | undefined) ?? 'http://localhost:8000';
+
+const StreamContext = createContext<StreamContextType | undefined>(undefined);
+
+/**
+ * One multiplexed /v1/stream connection per signed-in dashboard. Frames are
+ * tagged with their channel as the SSE event type; the untagged "connected"
+ * frame is passed to every channel's listeners so they refetch.
+ */
+export function StreamProvider({ children }: { children: React.ReactNode }) {
+  const { user } = useAuth();
+
+  const listenersRef = useRef<Map<StreamChannel, Set<StreamListener>>>(
+    new Map(CHANNELS.map((channel) => [channel, new Set<StreamListener>()]))
+  );
+
+  const userId = user?.id ?? null;
+
+  useEffect(() => {
+    if (!userId) return;
+    let es: EventSource | null = null;
+    let lastEventId: string | null = null;
+    let retryTimer: ReturnType<typeof setTimeout> | null = null;
+    let mounted = true;
+
+    const dispatch = (channel: StreamChannel, data: string) => {
+      listenersRef.current.get(channel)?.forEach((listener) => listener(data));
+    };
+
+    const connect = async () => {
+      if (!mounted) return;
+      let sseToken: string;
+      try { sseToken = await getSseToken(); } catch { return; }
+      if (!mounted) return;
+      es = new EventSource(
+        `${API_BASE}/v1/stream?channels=${CHANNELS.join(',')}&token=${sseToken}${lastEventIdParam(lastEventId)}`
+      );
+      es.onmessage = (e: MessageEvent) => {
+        CHANNELS.forEach((channel) => dispatch(channel, e.data as string));
+      };
+      CHANNELS.forEach((channel) => {
+        es?.addEventListener(channel, (e: MessageEvent) => {
+          if (e.lastEventId) lastEventId = e.lastEventId;
+          dispatch(channel, e.data as string);
+        });
+      });
+      es.onerror = () => {
+        es?.close();
+        es = null;
+        if (mounted) retryTimer = setTimeout(() => { void connect(); }, 5000);
+      };
+    };
+
+    void connect();
+    return () => {
+      mounted = false;
+      es?.close();
+      if (retryTimer) clearTimeout(retryTimer);
+    };
+  }, [userId]);
+
+  const listen = useCallback((channel: StreamChannel, listener: StreamListener) => {
+    const set = listenersRef.current.get(channel);
+    set?.add(listener);
+    return () => {
+      set?.delete(listener);
+    };
+  }, []);
+
+  return (
+    <StreamContext.Provider value={{ listen }}>
+      {children}
+    </StreamContext.Provider>
+  );
+}
+
+export function useStream() {
+  const ctx = useContext(StreamContext);
+  if (ctx === undefined) {
+    throw new Error('useStream must be used within a StreamProvider');
+  }
+  return ctx;
+}
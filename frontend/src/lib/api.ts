@@ -241,3 +241,36 @@ export async function getSseToken(): Promise<string> {
   const { token } = await apiRequest<{ token: string }>('/v1/sse-token', { method: 'POST' });
   return token;
 }
+
+/**
+ * Query suffix that resumes a stream after the last frame seen. A reconnect
+ * needs a fresh single-use token, so it opens a new EventSource and cannot
+ * rely on the browser resending Last-Event-ID; the server then replays the
+ * missed frames, or sends "resync" when they are gone.
+ */
+export function lastEventIdParam(lastEventId: string | null): string {
+  return lastEventId ? `&last_event_id=${encodeURIComponent(lastEventId)}` : '';
+}
+
+/**
+ * Payloads pushed on /v1/stream/{events,spend,inbox}. Anything that does not
+ * parse as one of these ("connected", "resync", legacy pings) means the
+ * client should refetch.
+ */
+export type SseDelta =
+  | { type: 'events'; events: AgentEvent[] }
+  | { type: 'spend'; daily: number; monthly: number; agents: { agentId: string; spend: number }[] }
+  | { type: 'budget'; budget: number }
+  | { type: 'inbox'; items: InboxItem[] };
+
+export function parseSseDelta(data: string): SseDelta | null {
+  try {
+    const parsed = JSON.parse(data) as { type?: unknown };
+    if (parsed && typeof parsed === 'object' && typeof parsed.type === 'string') {
+      return parsed as SseDelta;
+    }
+  } catch {
+    // not JSON: a refetch signal
+  }
+  return null;
+}
@@ -18,8 +18,9 @@ import {
 } from 'lucide-react';
 import { CopiedIcon } from '@/components/ui/animated-state-icons';
 import type { Agent, AgentEvent } from '@/types/index';
-import { deleteAgent, getAgent, getAgentEvents, getSseToken, revealAgentToken, revokeAgentToken, updateAgentStatus } from '@/lib/api';
+import { deleteAgent, getAgent, getAgentEvents, parseSseDelta, revealAgentToken, revokeAgentToken, updateAgentStatus } from '@/lib/api';
 import { useInvalidation } from '@/contexts/InvalidationContext';
+import { useStream } from '@/contexts/StreamContext';
 import {
   Dialog,
   DialogContent,
@@ -50,6 +51,7 @@ export default function AgentDetail() {
   const { id } = useParams<{ id: string }>();
   const navigate = useNavigate();
   const { subscribe } = useInvalidation();
+  const { listen } = useStream();
   const [agent, setAgent] = useState<Agent | undefined>(undefined);
   const [events, setEvents] = useState<AgentEvent[]>([]);
   const [connectTab, setConnectTab] = useState('claude-code');
@@ -96,35 +98,33 @@ export default function AgentDetail() {
     };
   }, [subscribe, loadData]);
 
-  // SSE — primary real-time channel; polling via InvalidationContext is the fallback
+  // SSE (shared /v1/stream connection) — primary real-time channel; polling via InvalidationContext is the fallback
   useEffect(() => {
     if (!id) return;
-    const apiBase = (import.meta.env.VITE_API_BASE_URL as string | undefined) ?? 'http://localhost:8000';
-    let es: EventSource | null = null;
-    let retryTimer: ReturnType<typeof setTimeout> | null = null;
-    let mounted = true;
-
-    const connect = async () => {
-      if (!mounted) return;
-      let sseToken: string;
-      try { sseToken = await getSseToken(); } catch { return; }
-      if (!mounted) return;
-      es = new EventSource(`${apiBase}/v1/stream/events?agent_id=${id}&token=${sseToken}`);
-      es.onmessage = () => { void loadData(); };
-      es.onerror = () => {
-        es?.close();
-        es = null;
-        if (mounted) retryTimer = setTimeout(() => { void connect(); }, 5000);
-      };
-    };
-
-    void connect();
-    return () => {
-      mounted = false;
-      es?.close();
-      if (retryTimer) clearTimeout(retryTimer);
-    };
-  }, [id, loadData]);
+    return listen('events', (data) => {
+      const delta = parseSseDelta(data);
+      // The shared stream carries the whole workspace; keep this agent's events.
+      const mine = delta?.type === 'events' ? delta.events.filter((event) => event.agentId === id) : null;
+      if (mine && mine.length === 0) return;
+      if (mine && !mine.some((event) => event.type === 'approval_request')) {
+        const added = mine.reduce((sum, event) => sum + event.cost, 0);
+        const lastSeen = mine[mine.length - 1]?.createdAt;
+        setAgent((prev) => prev && {
+          ...prev,
+          totalSpend: prev.totalSpend + added,
+          eventsCount: prev.eventsCount + mine.length,
+          lastSeen: lastSeen ?? prev.lastSeen,
+        });
+        setEvents((prev) => {
+          const seen = new Set(prev.map((event) => event.id));
+          const fresh = mine.filter((event) => !seen.has(event.id)).reverse();
+          return [...fresh, ...prev].slice(0, Math.max(prev.length, 100));
+        });
+      } else {
+        void loadData(); // connected, resync, or an approval request that changes agent status
+      }
+    });
+  }, [id, loadData, listen]);
 
   if (isLoading) {
     return (
@@ -559,7 +559,7 @@ if msgs:
                   <div className="space-y-3 font-mono text-xs">
                     {[
                       { method: 'GET', path: '/v1/comms/agents', auth: 'user', desc: 'Per-agent summaries: last message, queued count, pending approvals' },
-                      { method: 'GET', path: '/v1/comms/agents/{id}/messages', auth: 'user', desc: 'Paginated timeline (asc). Query: limit, before (ISO timestamp)' },
+                      { method: 'GET', path: '/v1/comms/agents/{id}/messages', auth: 'user', desc: 'Newest page of the timeline (asc). Query: limit, cursor (from X-Next-Cursor) or before (ISO timestamp)' },
                       { method: 'POST', path: '/v1/comms/agents/{id}/messages', auth: 'user', desc: 'Send human message. Body: { content, metadata? }' },
                       { method: 'POST', path: '/v1/comms/replies', auth: 'agent', desc: 'Agent reply. Body: { content, replyToMessageId?, metadata? }' },
                     ].map((row) => (
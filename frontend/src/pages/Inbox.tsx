@@ -1,16 +1,16 @@
 import { useEffect, useMemo, useState } from 'react';
 import { CheckCircle, XCircle, MessageSquare, Bot, Clock } from 'lucide-react';
 import { SuccessIcon } from '@/components/ui/animated-state-icons';
-import { decideInboxItem, getInbox, getSseToken } from '@/lib/api';
+import { decideInboxItem, getInbox, parseSseDelta } from '@/lib/api';
 import type { InboxItem } from '@/types/index';
 import { useInvalidation } from '@/contexts/InvalidationContext';
-
-const _API_BASE = (import.meta.env.VITE_API_BASE_URL as string | undefined) ?? 'http://localhost:8000';
+import { useStream } from '@/contexts/StreamContext';
 
 type FilterType = 'all' | 'pending' | 'approved' | 'rejected';
 
 export default function Inbox() {
   const { subscribe } = useInvalidation();
+  const { listen } = useStream();
   const [items, setItems] = useState<InboxItem[]>([]);
   const [filter, setFilter] = useState<FilterType>('all');
   const [comment, setComment] = useState('');
@@ -39,33 +39,20 @@ export default function Inbox() {
     return subscribe('tasks', loadInbox);
   }, [subscribe]);
 
-  // SSE — primary real-time channel; polling via InvalidationContext is the fallback
+  // SSE (shared /v1/stream connection) — primary real-time channel; polling via InvalidationContext is the fallback
   useEffect(() => {
-    let es: EventSource | null = null;
-    let retryTimer: ReturnType<typeof setTimeout> | null = null;
-    let mounted = true;
-
-    const connect = async () => {
-      if (!mounted) return;
-      let sseToken: string;
-      try { sseToken = await getSseToken(); } catch { return; }
-      if (!mounted) return;
-      es = new EventSource(`${_API_BASE}/v1/stream/inbox?token=${sseToken}`);
-      es.onmessage = () => { void loadInbox(); };
-      es.onerror = () => {
-        es?.close();
-        es = null;
-        if (mounted) retryTimer = setTimeout(() => { void connect(); }, 5000);
-      };
-    };
-
-    void connect();
-    return () => {
-      mounted = false;
-      es?.close();
-      if (retryTimer) clearTimeout(retryTimer);
-    };
-  }, [loadInbox]);
+    return listen('inbox', (data) => {
+      const delta = parseSseDelta(data);
+      if (delta?.type === 'inbox') {
+        setItems((prev) => {
+          const seen = new Set(prev.map((item) => item.id));
+          return [...delta.items.filter((item) => !seen.has(item.id)).reverse(), ...prev];
+        });
+      } else {
+        void loadInbox();
+      }
+    });
+  }, [loadInbox, listen]);
 
   const filteredItems = useMemo(
     () => items.filter((item) => (filter === 'all' ? true : item.status === filter)),
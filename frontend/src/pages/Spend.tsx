@@ -1,11 +1,10 @@
-import { useEffect, useState } from 'react';
+import { useEffect, useRef, useState } from 'react';
 import { DollarSign, TrendingUp, TrendingDown, AlertTriangle, Edit2, Check, X } from 'lucide-react';
 import { NotificationIcon } from '@/components/ui/animated-state-icons';
 import type { SpendData } from '@/types/index';
-import { getSpend, getSseToken, updateAlertWebhook, updateBudget } from '@/lib/api';
+import { getSpend, parseSseDelta, updateAlertWebhook, updateBudget } from '@/lib/api';
 import { useInvalidation } from '@/contexts/InvalidationContext';
-
-const _API_BASE = (import.meta.env.VITE_API_BASE_URL as string | undefined) ?? 'http://localhost:8000';
+import { useStream } from '@/contexts/StreamContext';
 
 const defaultSpendData: SpendData = {
   daily: 0,
@@ -15,8 +14,24 @@ const defaultSpendData: SpendData = {
   agentBreakdown: [],
 };
 
+function applySpendTotals(
+  data: SpendData,
+  totals: { daily: number; monthly: number; agents: { agentId: string; spend: number }[] },
+): SpendData {
+  const byAgent = new Map(totals.agents.map((item) => [item.agentId, item.spend]));
+  return {
+    ...data,
+    daily: totals.daily,
+    monthly: totals.monthly,
+    agentBreakdown: data.agentBreakdown
+      .map((row) => ({ ...row, spend: byAgent.get(row.agentId) ?? row.spend }))
+      .sort((a, b) => b.spend - a.spend || a.agentName.localeCompare(b.agentName)),
+  };
+}
+
 export default function Spend() {
   const { subscribe } = useInvalidation();
+  const { listen } = useStream();
   const [spendData, setSpendData] = useState<SpendData>(defaultSpendData);
   const [editingBudget, setEditingBudget] = useState(false);
   const [newBudget, setNewBudget] = useState(defaultSpendData.budget.toString());
@@ -25,6 +40,8 @@ export default function Spend() {
   const [savingWebhook, setSavingWebhook] = useState(false);
   const [isLoading, setIsLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
+  const spendRef = useRef(spendData);
+  spendRef.current = spendData;
 
   const loadSpend = async () => {
     try {
@@ -48,33 +65,20 @@ export default function Spend() {
     return subscribe('events', loadSpend);
   }, [subscribe]);
 
-  // SSE — primary real-time channel; polling via InvalidationContext is the fallback
+  // SSE (shared /v1/stream connection) — primary real-time channel; polling via InvalidationContext is the fallback
   useEffect(() => {
-    let es: EventSource | null = null;
-    let retryTimer: ReturnType<typeof setTimeout> | null = null;
-    let mounted = true;
-
-    const connect = async () => {
-      if (!mounted) return;
-      let sseToken: string;
-      try { sseToken = await getSseToken(); } catch { return; }
-      if (!mounted) return;
-      es = new EventSource(`${_API_BASE}/v1/stream/spend?token=${sseToken}`);
-      es.onmessage = () => { void loadSpend(); };
-      es.onerror = () => {
-        es?.close();
-        es = null;
-        if (mounted) retryTimer = setTimeout(() => { void connect(); }, 5000);
-      };
-    };
-
-    void connect();
-    return () => {
-      mounted = false;
-      es?.close();
-      if (retryTimer) clearTimeout(retryTimer);
-    };
-  }, [loadSpend]);
+    return listen('spend', (data) => {
+      const delta = parseSseDelta(data);
+      const known = new Set(spendRef.current.agentBreakdown.map((row) => row.agentId));
+      if (delta?.type === 'spend' && delta.agents.every((item) => known.has(item.agentId))) {
+        setSpendData((prev) => applySpendTotals(prev, delta));
+      } else if (delta?.type === 'budget') {
+        setSpendData((prev) => ({ ...prev, budget: delta.budget }));
+      } else {
+        void loadSpend(); // connected, resync, or an agent we have not listed yet
+      }
+    });
+  }, [loadSpend, listen]);
 
   const budgetPercent = spendData.budget > 0 ? (spendData.monthly / spendData.budget) * 100 : 0;
   const remaining = spendData.budget - spendData.monthly;
@@ -1,11 +1,10 @@
 import React, { useCallback, useEffect, useRef, useState } from 'react';
 import { Link } from 'react-router-dom';
-import { getCommsAgents, getCommsMessages, getSseToken, sendCommsMessage } from '@/lib/api';
+import { getCommsAgents, getCommsMessages, sendCommsMessage } from '@/lib/api';
 import { useInvalidation } from '@/contexts/InvalidationContext';
+import { useStream } from '@/contexts/StreamContext';
 import type { CommsAgentSummary, CommsMessage } from '@/types/index';
 
-const _API_BASE = (import.meta.env.VITE_API_BASE_URL as string | undefined) ?? 'http://localhost:8000';
-
 // ── helpers ──────────────────────────────────────────────────────────────────
 
 function formatTime(iso: string) {
@@ -177,6 +176,7 @@ function StreamingBubble({ agentId, content }: { agentId: string; content: strin
 
 export const CommsHub: React.FC = () => {
   const { subscribe } = useInvalidation();
+  const { listen } = useStream();
 
   const [agents, setAgents] = useState<CommsAgentSummary[]>([]);
   const [selectedId, setSelectedId] = useState<string | null>(null);
@@ -228,40 +228,17 @@ export const CommsHub: React.FC = () => {
     return subscribe('agents', () => { void fetchAgents(); });
   }, [subscribe, fetchAgents]);
 
-  // SSE — primary real-time channel; polling via InvalidationContext is the fallback
+  // SSE (shared /v1/stream connection) — primary real-time channel; polling via InvalidationContext is the fallback
   useEffect(() => {
-    let es: EventSource | null = null;
-    let retryTimer: ReturnType<typeof setTimeout> | null = null;
-    let mounted = true;
-
-    const connect = async () => {
-      if (!mounted) return;
-      let sseToken: string;
-      try { sseToken = await getSseToken(); } catch { return; }
-      if (!mounted) return;
-      es = new EventSource(`${_API_BASE}/v1/stream/comms?token=${sseToken}`);
-      es.onmessage = (e: MessageEvent) => {
-        try {
-          const evt = JSON.parse(e.data as string) as { type: string };
-          if (evt.type === 'update') void fetchAgents();
-        } catch {
-          void fetchAgents(); // fallback
-        }
-      };
-      es.onerror = () => {
-        es?.close();
-        es = null;
-        if (mounted) retryTimer = setTimeout(() => { void connect(); }, 5000);
-      };
-    };
-
-    void connect();
-    return () => {
-      mounted = false;
-      es?.close();
-      if (retryTimer) clearTimeout(retryTimer);
-    };
-  }, [fetchAgents]);
+    return listen('comms', (data) => {
+      try {
+        const evt = JSON.parse(data) as { type: string };
+        if (evt.type === 'update') void fetchAgents();
+      } catch {
+        void fetchAgents(); // fallback
+      }
+    });
+  }, [fetchAgents, listen]);
 
   // ── fetch messages for selected agent ─────────────────────────────────────
 
@@ -290,51 +267,28 @@ export const CommsHub: React.FC = () => {
     return subscribe('comms', () => { void fetchMessages(selectedId); });
   }, [selectedId, subscribe, fetchMessages]);
 
-  // SSE for message thread of selected agent
+  // SSE (shared /v1/stream connection) for message thread of selected agent
   useEffect(() => {
     if (!selectedId) return;
-    let es: EventSource | null = null;
-    let retryTimer: ReturnType<typeof setTimeout> | null = null;
-    let mounted = true;
-
-    const connect = async () => {
-      if (!mounted) return;
-      let sseToken: string;
-      try { sseToken = await getSseToken(); } catch { return; }
-      if (!mounted) return;
-      es = new EventSource(`${_API_BASE}/v1/stream/comms?token=${sseToken}`);
-      es.onmessage = (e: MessageEvent) => {
-        try {
-          const evt = JSON.parse(e.data as string) as { type: string; agentId?: string; isTyping?: boolean; content?: string };
-          if (evt.type === 'update') {
-            setIsAgentTyping(false);
-            setStreamingContent(null);
-            void fetchMessages(selectedId);
-          } else if (evt.type === 'typing' && evt.agentId === selectedId) {
-            setIsAgentTyping(evt.isTyping ?? false);
-            if (!evt.isTyping) setStreamingContent(null);
-          } else if (evt.type === 'chunk' && evt.agentId === selectedId) {
-            setIsAgentTyping(false);
-            setStreamingContent(prev => (prev ?? '') + (evt.content ?? ''));
-          }
-        } catch {
-          void fetchMessages(selectedId); // fallback
+    return listen('comms', (data) => {
+      try {
+        const evt = JSON.parse(data) as { type: string; agentId?: string; isTyping?: boolean; content?: string };
+        if (evt.type === 'update') {
+          setIsAgentTyping(false);
+          setStreamingContent(null);
+          void fetchMessages(selectedId);
+        } else if (evt.type === 'typing' && evt.agentId === selectedId) {
+          setIsAgentTyping(evt.isTyping ?? false);
+          if (!evt.isTyping) setStreamingContent(null);
+        } else if (evt.type === 'chunk' && evt.agentId === selectedId) {
+          setIsAgentTyping(false);
+          setStreamingContent(prev => (prev ?? '') + (evt.content ?? ''));
         }
-      };
-      es.onerror = () => {
-        es?.close();
-        es = null;
-        if (mounted) retryTimer = setTimeout(() => { void connect(); }, 5000);
-      };
-    };
-
-    void connect();
-    return () => {
-      mounted = false;
-      es?.close();
-      if (retryTimer) clearTimeout(retryTimer);
-    };
-  }, [selectedId, fetchMessages]);
+      } catch {
+        void fetchMessages(selectedId); // fallback
+      }
+    });
+  }, [selectedId, fetchMessages, listen]);
 
   // ── auto-scroll ────────────────────────────────────────────────────────────
 
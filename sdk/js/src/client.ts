@@ -23,9 +23,17 @@
  *     await agent.streamChunk(chunk);
  *   }
  *   await agent.reply(full);
+ *
+ * Over one persistent WebSocket (commands are pushed, each chunk is one frame):
+ *   const agent = new JarvisAgent({ token: 'your-token', transport: 'websocket' });
+ *   // ...
+ *   agent.close();
  */
 
 const DEFAULT_BASE_URL = 'http://localhost:8000';
+const WS_PATH = '/v1/agent/ws';
+const MAX_BUFFERED_COMMANDS = 1000;
+const POLICY_VIOLATION = 1008; // close code for a rejected agent token
 
 // ── Types ─────────────────────────────────────────────────────────────────────
 
@@ -34,8 +42,34 @@ export interface JarvisAgentOptions {
   token: string;
   /** Jarvis API base URL. Defaults to http://localhost:8000. */
   baseUrl?: string;
+  /**
+   * 'http' (default) or 'websocket'. With 'websocket', log(), checkpoint(),
+   * ack(), typing(), streamChunk() and the waitFor* helpers share one
+   * persistent connection to /v1/agent/ws and commands are pushed by the
+   * server. Call close() when done so the socket does not keep Node alive.
+   */
+  transport?: 'http' | 'websocket';
+  /**
+   * WebSocket implementation for transport 'websocket'. Defaults to the
+   * global WebSocket (browsers, Node 22+); on older Node pass the `ws`
+   * package's WebSocket.
+   */
+  webSocket?: WebSocketConstructor;
+}
+
+/** The subset of the WHATWG WebSocket API the SDK uses; the `ws` package fits too. */
+export interface WebSocketLike {
+  readonly readyState: number;
+  onopen: ((event: any) => void) | null;
+  onmessage: ((event: any) => void) | null;
+  onclose: ((event: any) => void) | null;
+  onerror: ((event: any) => void) | null;
+  send(data: string): void;
+  close(code?: number, reason?: string): void;
 }
 
+export type WebSocketConstructor = new (url: string) => WebSocketLike;
+
 export interface LogOptions {
   /** USD cost for this step. Defaults to 0. */
   cost?: number;
@@ -97,15 +131,200 @@ export interface ReplyOptions {
   metadata?: Record<string, unknown>;
 }
 
+// ── WebSocket transport ───────────────────────────────────────────────────────
+
+interface SocketFrame {
+  type: string;
+  id?: number;
+  status?: number;
+  detail?: unknown;
+  command?: Command;
+  [key: string]: unknown;
+}
+
+interface PendingRequest {
+  resolve: (frame: SocketFrame) => void;
+  reject: (error: Error) => void;
+}
+
+/**
+ * One /v1/agent/ws connection, opened on first use and again on the next call
+ * after it drops. Browsers cannot set headers on a WebSocket, so the token is
+ * sent as the first frame. Frames that expect an answer carry an id; chunks
+ * and typing signals are fire-and-forget.
+ */
+class _AgentSocket {
+  private _socket: WebSocketLike | null = null;
+  private _connecting: Promise<WebSocketLike> | null = null;
+  private _nextId = 1;
+  private readonly _pending = new Map<number, PendingRequest>();
+  private readonly _commands: Command[] = [];
+  // Ids of commands buffered or handed out; the server re-pushes every pending
+  // command on each (re)connect, so repeats are dropped.
+  private readonly _seen = new Set<string>();
+  private readonly _waiters = new Set<() => void>();
+  private _closed = false;
+
+  constructor(
+    private readonly _url: string,
+    private readonly _token: string,
+    private readonly _WebSocket: WebSocketConstructor,
+  ) {}
+
+  private _connection(): Promise<WebSocketLike> {
+    if (this._socket) return Promise.resolve(this._socket);
+    if (this._closed) return Promise.reject(new Error('JarvisAgent has been closed.'));
+    this._connecting ??= this._open().finally(() => {
+      this._connecting = null;
+    });
+    return this._connecting;
+  }
+
+  private _open(): Promise<WebSocketLike> {
+    return new Promise<WebSocketLike>((resolve, reject) => {
+      const ws = new this._WebSocket(this._url);
+      let ready = false;
+      ws.onopen = () => {
+        ws.send(JSON.stringify({ type: 'auth', token: this._token }));
+      };
+      ws.onmessage = (event: { data: unknown }) => {
+        let frame: SocketFrame;
+        try {
+          frame = JSON.parse(String(event.data)) as SocketFrame;
+        } catch {
+          return;
+        }
+        if (ready) {
+          this._dispatch(frame);
+        } else if (frame.type === 'ready') {
+          ready = true;
+          this._socket = ws;
+          resolve(ws);
+        }
+      };
+      ws.onclose = (event: { code: number; reason: string }) => {
+        if (!ready) {
+          reject(
+            event.code === POLICY_VIOLATION
+              ? new Error(`Jarvis API error 401: ${event.reason || 'Invalid or revoked agent token.'}`)
+              : new Error(`Could not connect to ${this._url} (close code ${event.code}).`),
+          );
+          return;
+        }
+        if (this._socket === ws) this._socket = null;
+        for (const pending of this._pending.values()) {
+          pending.reject(new Error('Jarvis WebSocket closed.'));
+        }
+        this._pending.clear();
+        this._wake();
+      };
+      ws.onerror = () => {
+        // onclose follows with the close code.
+      };
+    });
+  }
+
+  /** Send a frame and resolve with the server's answer; rejects on an error frame. */
+  async request<T>(frame: Record<string, unknown>): Promise<T> {
+    const ws = await this._connection();
+    const id = this._nextId++;
+    return new Promise<T>((resolve, reject) => {
+      this._pending.set(id, { resolve: (reply) => resolve(reply as T), reject });
+      try {
+        ws.send(JSON.stringify({ ...frame, id }));
+      } catch (err) {
+        this._pending.delete(id);
+        reject(err instanceof Error ? err : new Error(String(err)));
+      }
+    });
+  }
+
+  /** Send a frame without waiting for an answer. */
+  async send(frame: Record<string, unknown>): Promise<void> {
+    const ws = await this._connection();
+    ws.send(JSON.stringify(frame));
+  }
+
+  /** Resolve with the next pending command of `kind` the server pushes. */
+  async nextCommand(kind: string): Promise<Command> {
+    while (true) {
+      await this._connection();
+      const index = this._commands.findIndex((c) => c.kind === kind && c.status === 'pending');
+      if (index !== -1) return this._commands.splice(index, 1)[0];
+      await new Promise<void>((resolve) => this._waiters.add(resolve));
+    }
+  }
+
+  close(): void {
+    this._closed = true;
+    this._socket?.close();
+    this._socket = null;
+  }
+
+  private _wake(): void {
+    const waiters = [...this._waiters];
+    this._waiters.clear();
+    for (const wake of waiters) wake();
+  }
+
+  private _dispatch(frame: SocketFrame): void {
+    if (frame.type === 'command' && frame.command) {
+      if (this._seen.has(frame.command.id)) return;
+      this._seen.add(frame.command.id);
+      if (this._seen.size > MAX_BUFFERED_COMMANDS) {
+        this._seen.delete(this._seen.values().next().value as string);
+      }
+      if (this._commands.length >= MAX_BUFFERED_COMMANDS) this._commands.shift();
+      this._commands.push(frame.command);
+      this._wake();
+      return;
+    }
+    if (frame.id == null) return;
+    const pending = this._pending.get(frame.id);
+    if (!pending) return;
+    this._pending.delete(frame.id);
+    if (frame.type === 'error') {
+      const detail = typeof frame.detail === 'string' ? frame.detail : JSON.stringify(frame.detail);
+      pending.reject(new Error(`Jarvis API error ${frame.status ?? 500}: ${detail}`));
+    } else {
+      pending.resolve(frame);
+    }
+  }
+}
+
 // ── JarvisAgent ───────────────────────────────────────────────────────────────
 
 export class JarvisAgent {
   private readonly _baseUrl: string;
   private readonly _token: string;
+  private readonly _socket: _AgentSocket | null = null;
 
   constructor(options: JarvisAgentOptions) {
     this._baseUrl = (options.baseUrl ?? DEFAULT_BASE_URL).replace(/\/$/, '');
     this._token = options.token;
+    if (options.transport === 'websocket') {
+      const WebSocketImpl =
+        options.webSocket ?? (globalThis as unknown as { WebSocket?: WebSocketConstructor }).WebSocket;
+      if (!WebSocketImpl) {
+        throw new Error(
+          "transport 'websocket' needs a global WebSocket (browsers, Node 22+) or the webSocket option, " +
+            "e.g. the WebSocket export of the 'ws' package.",
+        );
+      }
+      this._socket = new _AgentSocket(
+        this._baseUrl.replace(/^http/, 'ws') + WS_PATH,
+        this._token,
+        WebSocketImpl,
+      );
+    }
+  }
+
+  /**
+   * Close the WebSocket of transport 'websocket'; no-op over HTTP.
+   * The agent cannot use the socket afterwards.
+   */
+  close(): void {
+    this._socket?.close();
   }
 
   // ── HTTP helpers ─────────────────────────────────────────────────────────────
@@ -160,6 +379,26 @@ export class JarvisAgent {
     return response.json() as Promise<T>;
   }
 
+  private async _postEvent<T>(body: Record<string, unknown>): Promise<T> {
+    if (this._socket) return this._socket.request<T>({ type: 'event', event: body });
+    return this._post<T>('/v1/events', body);
+  }
+
+  private async _waitForCommand(kind: string): Promise<Command> {
+    if (this._socket) return this._socket.nextCommand(kind);
+    const pollTimeout = 30;
+    while (true) {
+      const commands = await this._get<Command[]>(
+        '/v1/commands/listen',
+        { timeout: pollTimeout },
+        pollTimeout,
+      );
+      for (const cmd of commands) {
+        if (cmd.kind === kind && cmd.status === 'pending') return cmd;
+      }
+    }
+  }
+
   // ── Events ────────────────────────────────────────────────────────────────────
 
   /**
@@ -169,7 +408,7 @@ export class JarvisAgent {
    * @param options - Optional cost, type, and completedActions.
    */
   async log(message: string, options: LogOptions = {}): Promise<string> {
-    const data = await this._post<{ event: { id: string } }>('/v1/events', {
+    const data = await this._postEvent<{ event: { id: string } }>({
       type: options.type ?? 'action',
       message,
       cost: options.cost ?? 0,
@@ -194,7 +433,7 @@ export class JarvisAgent {
     proposedAction: string,
     options: CheckpointOptions = {},
   ): Promise<string> {
-    const data = await this._post<{ taskId?: string }>('/v1/events', {
+    const data = await this._postEvent<{ taskId?: string }>({
       type: 'approval_request',
       message,
       cost: options.cost ?? 0,
@@ -214,32 +453,26 @@ export class JarvisAgent {
    * Acknowledge a command by ID, marking it as processed.
    */
   async ack(commandId: string): Promise<void> {
+    if (this._socket) {
+      await this._socket.request({ type: 'ack', commandId });
+      return;
+    }
     await this._post(`/v1/commands/${commandId}/ack`, {});
   }
 
   /**
    * Resolve when a human approves or rejects in the dashboard.
    *
-   * Uses long polling — no wasted requests while waiting.
+   * Uses long polling (or the pushed commands of transport 'websocket') —
+   * no wasted requests while waiting.
    * Automatically acknowledges the command before resolving.
    *
    * @returns The decision payload: { decision: 'approved' | 'rejected', comment?: string }
    */
   async waitForDecision(): Promise<DecisionPayload> {
-    const pollTimeout = 30;
-    while (true) {
-      const commands = await this._get<Command[]>(
-        '/v1/commands/listen',
-        { timeout: pollTimeout },
-        pollTimeout,
-      );
-      for (const cmd of commands) {
-        if (cmd.kind === 'approval_decision' && cmd.status === 'pending') {
-          await this.ack(cmd.id);
-          return cmd.payload as unknown as DecisionPayload;
-        }
-      }
-    }
+    const cmd = await this._waitForCommand('approval_decision');
+    await this.ack(cmd.id);
+    return cmd.payload as unknown as DecisionPayload;
   }
 
   // ── Comms Hub ─────────────────────────────────────────────────────────────────
@@ -257,26 +490,16 @@ export class JarvisAgent {
   /**
    * Resolve when a human sends a message from the Comms Hub.
    *
-   * Uses long polling — no wasted requests while waiting.
+   * Uses long polling (or the pushed commands of transport 'websocket') —
+   * no wasted requests while waiting.
    * Automatically acknowledges the command before resolving.
    *
    * @returns The message payload: { messageId: string, content: string }
    */
   async waitForHumanMessage(): Promise<HumanMessagePayload> {
-    const pollTimeout = 30;
-    while (true) {
-      const commands = await this._get<Command[]>(
-        '/v1/commands/listen',
-        { timeout: pollTimeout },
-        pollTimeout,
-      );
-      for (const cmd of commands) {
-        if (cmd.kind === 'human_message' && cmd.status === 'pending') {
-          await this.ack(cmd.id);
-          return cmd.payload as unknown as HumanMessagePayload;
-        }
-      }
-    }
+    const cmd = await this._waitForCommand('human_message');
+    await this.ack(cmd.id);
+    return cmd.payload as unknown as HumanMessagePayload;
   }
 
   /**
@@ -285,6 +508,10 @@ export class JarvisAgent {
    * @param isTyping - True to show indicator, false to hide it. Defaults to true.
    */
   async typing(isTyping = true): Promise<void> {
+    if (this._socket) {
+      await this._socket.send({ type: 'typing', isTyping });
+      return;
+    }
     await this._post('/v1/comms/typing', { isTyping });
   }
 
@@ -293,6 +520,8 @@ export class JarvisAgent {
    *
    * Call in a loop as tokens arrive from the model. Finish by calling reply()
    * with the full response, which stores it in the DB and clears the stream.
+   * Over transport 'websocket' each chunk is one frame that does not wait
+   * for an answer.
    *
    * @example
    * await agent.typing();
@@ -304,6 +533,10 @@ export class JarvisAgent {
    * await agent.reply(full);
    */
   async streamChunk(content: string): Promise<void> {
+    if (this._socket) {
+      await this._socket.send({ type: 'chunk', content });
+      return;
+    }
     await this._post('/v1/comms/stream', { content });
   }
 
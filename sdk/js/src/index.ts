@@ -13,4 +13,6 @@ export type {
   CommsMessage,
   WorkshopTask,
   ReplyOptions,
+  WebSocketLike,
+  WebSocketConstructor,
 } from './client.js';
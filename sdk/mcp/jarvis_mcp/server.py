@@ -28,6 +28,11 @@ Setup (OpenAI Agents SDK):
     )
     agent = Agent(mcp_servers=[jarvis])
 
+Connection settings (optional env vars):
+    JARVIS_HTTP2             — "1" to negotiate HTTP/2 (needs: pip install jarvis-mc-mcp[http2])
+    JARVIS_MAX_CONNECTIONS   — connection pool size (default 10)
+    JARVIS_KEEPALIVE_EXPIRY  — seconds an idle connection is kept open (default 60)
+
 Tools exposed:
     log_action           — Report a significant action or milestone
     request_approval     — Block until a human approves/rejects in the dashboard
@@ -38,6 +43,7 @@ from __future__ import annotations
 
 import asyncio
 import os
+import sys
 import time
 
 import httpx
@@ -47,10 +53,18 @@ from mcp.types import TextContent, Tool
 
 JARVIS_TOKEN = os.environ.get("JARVIS_TOKEN", "")
 JARVIS_URL = os.environ.get("JARVIS_URL", "http://localhost:8000").rstrip("/")
+JARVIS_HTTP2 = os.environ.get("JARVIS_HTTP2", "").lower() in ("1", "true", "yes")
+JARVIS_MAX_CONNECTIONS = int(os.environ.get("JARVIS_MAX_CONNECTIONS", "10"))
+JARVIS_KEEPALIVE_EXPIRY = float(os.environ.get("JARVIS_KEEPALIVE_EXPIRY", "60"))
 
 server = Server("jarvis-mc")
 
 
+# One client for the whole server process, so consecutive tool calls reuse
+# pooled keep-alive connections instead of paying a TCP+TLS handshake each.
+_client: httpx.AsyncClient | None = None
+
+
 def _headers() -> dict[str, str]:
     return {
         "X-Agent-Token": JARVIS_TOKEN,
@@ -58,6 +72,27 @@ def _headers() -> dict[str, str]:
     }
 
 
+def _build_client() -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=JARVIS_MAX_CONNECTIONS,
+        max_keepalive_connections=JARVIS_MAX_CONNECTIONS,
+        keepalive_expiry=JARVIS_KEEPALIVE_EXPIRY,
+    )
+    try:
+        return httpx.AsyncClient(headers=_headers(), timeout=10.0, limits=limits, http2=JARVIS_HTTP2)
+    except ImportError:
+        # http2=True without the h2 package; stdout is the MCP channel, so warn on stderr.
+        print("jarvis-mcp: JARVIS_HTTP2 needs 'pip install httpx[http2]'; using HTTP/1.1.", file=sys.stderr)
+        return httpx.AsyncClient(headers=_headers(), timeout=10.0, limits=limits)
+
+
+def _get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
+
+
 @server.list_tools()
 async def list_tools() -> list[Tool]:
     return [
@@ -219,173 +254,177 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
     if not JARVIS_TOKEN:
         return [TextContent(type="text", text="Error: JARVIS_TOKEN environment variable is not set.")]
 
-    async with httpx.AsyncClient(headers=_headers(), timeout=10.0) as client:
-        if name == "log_action":
-            response = await client.post(
-                f"{JARVIS_URL}/v1/events",
-                json={
-                    "type": arguments.get("type", "action"),
-                    "message": arguments["message"],
-                    "cost": arguments.get("cost", 0),
-                    "requiresApproval": False,
-                    "completedActions": [],
-                },
-            )
-            response.raise_for_status()
-            event_id = response.json()["event"]["id"]
-            return [TextContent(type="text", text=f"Logged to Jarvis (event: {event_id})")]
-
-        elif name == "request_approval":
-            # Step 1: Create the approval request
-            response = await client.post(
-                f"{JARVIS_URL}/v1/events",
-                json={
-                    "type": "approval_request",
-                    "message": arguments["message"],
-                    "cost": 0,
-                    "requiresApproval": True,
-                    "proposedAction": arguments["proposed_action"],
-                    "completedActions": arguments.get("completed_actions", []),
-                },
-            )
-            response.raise_for_status()
-
-            task_id = response.json().get("taskId")
-            timeout_minutes = arguments.get("timeout_minutes", 5)
-            deadline = time.monotonic() + (timeout_minutes * 60)
-
-            # Step 2: Long-poll for decision until approved/rejected or timed out
-            while time.monotonic() < deadline:
-                remaining = deadline - time.monotonic()
-                poll_timeout = min(30, max(1, int(remaining)))
-                try:
-                    cmd_response = await client.get(
-                        f"{JARVIS_URL}/v1/commands/listen",
-                        params={"timeout": poll_timeout},
-                        timeout=poll_timeout + 10,
-                    )
-                    cmd_response.raise_for_status()
-                except httpx.HTTPError:
-                    # Dashboard unreachable — keep waiting until timeout
-                    continue
-
-                for cmd in cmd_response.json():
-                    if cmd.get("kind") == "approval_decision" and cmd.get("status") == "pending":
-                        # Acknowledge the command
-                        await client.post(f"{JARVIS_URL}/v1/commands/{cmd['id']}/ack")
-
-                        decision = cmd["payload"].get("decision", "unknown")
-                        comment = cmd["payload"].get("comment", "")
-                        result = f"Decision: {decision}"
-                        if comment:
-                            result += f". Comment: {comment}"
-                        return [TextContent(type="text", text=result)]
-
-            return [TextContent(
-                type="text",
-                text=f"Decision: timed out after {timeout_minutes} minute(s). No response from dashboard. Treat as rejected and abort."
-            )]
-
-        elif name == "get_workshop_tasks":
-            try:
-                resp = await client.get(f"{JARVIS_URL}/v1/workshop/my-tasks")
-                resp.raise_for_status()
-            except httpx.HTTPError as exc:
-                return [TextContent(type="text", text=f"Error fetching workshop tasks: {exc}")]
-
-            tasks = resp.json()
-            if not tasks:
-                return [TextContent(type="text", text="No tasks assigned to this agent.")]
-
-            lines = []
-            for task in tasks:
-                desc = f"\n  description: {task['description']}" if task.get("description") else ""
-                lines.append(
-                    f"task_id: {task['id']}\n"
-                    f"  title: {task['title']}{desc}\n"
-                    f"  status: {task['status']}"
-                )
-            return [TextContent(type="text", text="\n\n".join(lines))]
+    client = _get_client()
+    if name == "log_action":
+        response = await client.post(
+            f"{JARVIS_URL}/v1/events",
+            json={
+                "type": arguments.get("type", "action"),
+                "message": arguments["message"],
+                "cost": arguments.get("cost", 0),
+                "requiresApproval": False,
+                "completedActions": [],
+            },
+        )
+        response.raise_for_status()
+        event_id = response.json()["event"]["id"]
+        return [TextContent(type="text", text=f"Logged to Jarvis (event: {event_id})")]
+
+    elif name == "request_approval":
+        # Step 1: Create the approval request
+        response = await client.post(
+            f"{JARVIS_URL}/v1/events",
+            json={
+                "type": "approval_request",
+                "message": arguments["message"],
+                "cost": 0,
+                "requiresApproval": True,
+                "proposedAction": arguments["proposed_action"],
+                "completedActions": arguments.get("completed_actions", []),
+            },
+        )
+        response.raise_for_status()
 
-        elif name == "update_workshop_task_status":
-            task_id = arguments["task_id"]
-            new_status = arguments["status"]
-            try:
-                resp = await client.patch(
-                    f"{JARVIS_URL}/v1/workshop/my-tasks/{task_id}/status",
-                    json={"status": new_status},
-                )
-                resp.raise_for_status()
-            except httpx.HTTPError as exc:
-                return [TextContent(type="text", text=f"Error updating task: {exc}")]
-            task = resp.json()
-            return [TextContent(type="text", text=f"Task '{task['title']}' moved to {new_status}.")]
+        task_id = response.json().get("taskId")
+        timeout_minutes = arguments.get("timeout_minutes", 5)
+        deadline = time.monotonic() + (timeout_minutes * 60)
 
-        elif name == "fetch_human_messages":
+        # Step 2: Long-poll for decision until approved/rejected or timed out
+        while time.monotonic() < deadline:
+            remaining = deadline - time.monotonic()
+            poll_timeout = min(30, max(1, int(remaining)))
             try:
-                cmd_response = await client.get(f"{JARVIS_URL}/v1/commands")
-                cmd_response.raise_for_status()
-            except httpx.HTTPError as exc:
-                return [TextContent(type="text", text=f"Error fetching commands: {exc}")]
-
-            human_cmds = [
-                c for c in cmd_response.json()
-                if c.get("kind") == "human_message" and c.get("status") == "pending"
-            ]
-            if not human_cmds:
-                return [TextContent(type="text", text="No pending human messages.")]
-
-            lines = []
-            for cmd in human_cmds:
-                payload = cmd.get("payload", {})
-                lines.append(
-                    f"command_id: {cmd['id']}\n"
-                    f"message_id: {payload.get('messageId', '')}\n"
-                    f"content: {payload.get('content', '')}"
+                cmd_response = await client.get(
+                    f"{JARVIS_URL}/v1/commands/listen",
+                    params={"timeout": poll_timeout},
+                    timeout=poll_timeout + 10,
                 )
-            return [TextContent(type="text", text="\n\n---\n\n".join(lines))]
-
-        elif name == "send_human_reply":
-            metadata: dict = {}
-            if arguments.get("cost"):
-                metadata["cost"] = arguments["cost"]
-            if arguments.get("model"):
-                metadata["model"] = arguments["model"]
-
-            reply_body: dict = {
-                "content": arguments["content"],
-                "metadata": metadata,
-            }
-            if arguments.get("reply_to_message_id"):
-                reply_body["replyToMessageId"] = arguments["reply_to_message_id"]
-
+                cmd_response.raise_for_status()
+            except httpx.HTTPError:
+                # Dashboard unreachable — keep waiting until timeout
+                continue
+
+            for cmd in cmd_response.json():
+                if cmd.get("kind") == "approval_decision" and cmd.get("status") == "pending":
+                    # Acknowledge the command
+                    await client.post(f"{JARVIS_URL}/v1/commands/{cmd['id']}/ack")
+
+                    decision = cmd["payload"].get("decision", "unknown")
+                    comment = cmd["payload"].get("comment", "")
+                    result = f"Decision: {decision}"
+                    if comment:
+                        result += f". Comment: {comment}"
+                    return [TextContent(type="text", text=result)]
+
+        return [TextContent(
+            type="text",
+            text=f"Decision: timed out after {timeout_minutes} minute(s). No response from dashboard. Treat as rejected and abort."
+        )]
+
+    elif name == "get_workshop_tasks":
+        try:
+            resp = await client.get(f"{JARVIS_URL}/v1/workshop/my-tasks")
+            resp.raise_for_status()
+        except httpx.HTTPError as exc:
+            return [TextContent(type="text", text=f"Error fetching workshop tasks: {exc}")]
+
+        tasks = resp.json()
+        if not tasks:
+            return [TextContent(type="text", text="No tasks assigned to this agent.")]
+
+        lines = []
+        for task in tasks:
+            desc = f"\n  description: {task['description']}" if task.get("description") else ""
+            lines.append(
+                f"task_id: {task['id']}\n"
+                f"  title: {task['title']}{desc}\n"
+                f"  status: {task['status']}"
+            )
+        return [TextContent(type="text", text="\n\n".join(lines))]
+
+    elif name == "update_workshop_task_status":
+        task_id = arguments["task_id"]
+        new_status = arguments["status"]
+        try:
+            resp = await client.patch(
+                f"{JARVIS_URL}/v1/workshop/my-tasks/{task_id}/status",
+                json={"status": new_status},
+            )
+            resp.raise_for_status()
+        except httpx.HTTPError as exc:
+            return [TextContent(type="text", text=f"Error updating task: {exc}")]
+        task = resp.json()
+        return [TextContent(type="text", text=f"Task '{task['title']}' moved to {new_status}.")]
+
+    elif name == "fetch_human_messages":
+        try:
+            cmd_response = await client.get(f"{JARVIS_URL}/v1/commands")
+            cmd_response.raise_for_status()
+        except httpx.HTTPError as exc:
+            return [TextContent(type="text", text=f"Error fetching commands: {exc}")]
+
+        human_cmds = [
+            c for c in cmd_response.json()
+            if c.get("kind") == "human_message" and c.get("status") == "pending"
+        ]
+        if not human_cmds:
+            return [TextContent(type="text", text="No pending human messages.")]
+
+        lines = []
+        for cmd in human_cmds:
+            payload = cmd.get("payload", {})
+            lines.append(
+                f"command_id: {cmd['id']}\n"
+                f"message_id: {payload.get('messageId', '')}\n"
+                f"content: {payload.get('content', '')}"
+            )
+        return [TextContent(type="text", text="\n\n---\n\n".join(lines))]
+
+    elif name == "send_human_reply":
+        metadata: dict = {}
+        if arguments.get("cost"):
+            metadata["cost"] = arguments["cost"]
+        if arguments.get("model"):
+            metadata["model"] = arguments["model"]
+
+        reply_body: dict = {
+            "content": arguments["content"],
+            "metadata": metadata,
+        }
+        if arguments.get("reply_to_message_id"):
+            reply_body["replyToMessageId"] = arguments["reply_to_message_id"]
+
+        try:
+            reply_resp = await client.post(f"{JARVIS_URL}/v1/comms/replies", json=reply_body)
+            reply_resp.raise_for_status()
+        except httpx.HTTPError as exc:
+            return [TextContent(type="text", text=f"Error sending reply: {exc}")]
+
+        # Ack the source command
+        command_id = arguments.get("command_id")
+        if command_id:
             try:
-                reply_resp = await client.post(f"{JARVIS_URL}/v1/comms/replies", json=reply_body)
-                reply_resp.raise_for_status()
-            except httpx.HTTPError as exc:
-                return [TextContent(type="text", text=f"Error sending reply: {exc}")]
+                await client.post(f"{JARVIS_URL}/v1/commands/{command_id}/ack")
+            except httpx.HTTPError:
+                pass  # ack failure is non-fatal
 
-            # Ack the source command
-            command_id = arguments.get("command_id")
-            if command_id:
-                try:
-                    await client.post(f"{JARVIS_URL}/v1/commands/{command_id}/ack")
-                except httpx.HTTPError:
-                    pass  # ack failure is non-fatal
+        reply_id = reply_resp.json().get("id", "")
+        return [TextContent(type="text", text=f"Reply sent (message: {reply_id})")]
 
-            reply_id = reply_resp.json().get("id", "")
-            return [TextContent(type="text", text=f"Reply sent (message: {reply_id})")]
-
-        return [TextContent(type="text", text=f"Unknown tool: {name}")]
+    return [TextContent(type="text", text=f"Unknown tool: {name}")]
 
 
 async def main() -> None:
-    async with stdio_server() as (read_stream, write_stream):
-        await server.run(
-            read_stream,
-            write_stream,
-            server.create_initialization_options(),
-        )
+    try:
+        async with stdio_server() as (read_stream, write_stream):
+            await server.run(
+                read_stream,
+                write_stream,
+                server.create_initialization_options(),
+            )
+    finally:
+        if _client is not None:
+            await _client.aclose()
 
 
 def main_sync() -> None:
@@ -1,4 +1,6 @@
 from .client import JarvisAgent, AnthropicJarvis
+from .async_client import AsyncJarvisAgent
+from .ws import JarvisSocketError
 
-__all__ = ["JarvisAgent", "AnthropicJarvis"]
+__all__ = ["JarvisAgent", "AsyncJarvisAgent", "AnthropicJarvis", "JarvisSocketError"]
 __version__ = "0.1.0"
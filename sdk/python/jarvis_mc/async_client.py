@@ -0,0 +1,274 @@
+"""
+Asyncio client for Jarvis Mission Control.
+
+Same surface as JarvisAgent, but every method is a coroutine and all calls
+share one long-lived httpx.AsyncClient (keep-alive, optional HTTP/2), so
+asyncio agents never need run_in_executor.
+
+Usage:
+    from jarvis_mc import AsyncJarvisAgent
+
+    async with AsyncJarvisAgent(token="your-token") as agent:
+        await agent.log("Fetching competitor data", cost=0.04)
+        task_id = await agent.checkpoint("Draft ready", proposed_action="Publish")
+        decision = await agent.wait_for_decision()
+
+Requires: pip install jarvis-mc[async]   (or jarvis-mc[http2] for HTTP/2;
+add jarvis-mc[websocket] for transport="websocket")
+"""
+from __future__ import annotations
+
+from typing import Any
+
+from .client import _DEFAULT_BASE_URL, _USER_AGENT
+from .ws import AsyncAgentSocket
+
+_POLL_TIMEOUT_SECONDS = 30
+
+
+class AsyncJarvisAgent:
+    """
+    Asyncio Jarvis Mission Control client backed by httpx.AsyncClient.
+
+    Long-polls (wait_for_decision, wait_for_human_message) are plain awaits
+    on the shared client: they hold no thread, and cancelling the awaiting
+    task closes the request without acknowledging anything, so the command
+    is still pending for the next call.
+
+    Parameters
+    ----------
+    token:
+        The agent token shown at agent creation in the Jarvis dashboard.
+    base_url:
+        Jarvis API base URL. Defaults to http://localhost:8000.
+    timeout:
+        HTTP request timeout in seconds. Defaults to 30.
+    http2:
+        Negotiate HTTP/2 when the server supports it (needs jarvis-mc[http2]).
+    max_connections:
+        Upper bound on pooled connections. Defaults to 10.
+    transport:
+        "http" (default) or "websocket": log(), checkpoint(), ack(), typing(),
+        stream_chunk() and the waits go over one persistent /v1/agent/ws
+        connection. See JarvisAgent.
+    """
+
+    def __init__(
+        self,
+        token: str,
+        base_url: str = _DEFAULT_BASE_URL,
+        timeout: float = 30.0,
+        http2: bool = False,
+        max_connections: int = 10,
+        transport: str = "http",
+    ) -> None:
+        if transport not in ("http", "websocket"):
+            raise ValueError("transport must be 'http' or 'websocket'.")
+        try:
+            import httpx
+        except ImportError as exc:
+            raise ImportError(
+                "The 'httpx' package is required for AsyncJarvisAgent.\n"
+                "Install it with: pip install jarvis-mc[async]"
+            ) from exc
+
+        self._timeout = timeout
+        self._client = httpx.AsyncClient(
+            base_url=base_url.rstrip("/"),
+            headers={
+                "X-Agent-Token": token,
+                "Content-Type": "application/json",
+                "User-Agent": _USER_AGENT,
+            },
+            timeout=timeout,
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+        )
+        self._socket: AsyncAgentSocket | None = None
+        if transport == "websocket":
+            self._socket = AsyncAgentSocket(base_url.rstrip("/"), token, timeout, _USER_AGENT)
+
+    async def __aenter__(self) -> AsyncJarvisAgent:
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close pooled connections. The agent cannot be used afterwards."""
+        if self._socket is not None:
+            await self._socket.aclose()
+        await self._client.aclose()
+
+    async def _post(self, path: str, body: dict[str, Any]) -> dict[str, Any]:
+        response = await self._client.post(path, json=body)
+        response.raise_for_status()
+        return response.json()  # type: ignore[no-any-return]
+
+    async def _get(
+        self,
+        path: str,
+        params: dict[str, Any] | None = None,
+        timeout: float | None = None,
+    ) -> list[dict[str, Any]]:
+        response = await self._client.get(
+            path,
+            params=params,
+            timeout=timeout if timeout is not None else self._timeout,
+        )
+        response.raise_for_status()
+        return response.json()  # type: ignore[no-any-return]
+
+    async def _post_event(self, body: dict[str, Any]) -> dict[str, Any]:
+        if self._socket is not None:
+            return await self._socket.request({"type": "event", "event": body})
+        return await self._post("/v1/events", body)
+
+    async def _wait_for_command(self, kind: str) -> dict[str, Any]:
+        if self._socket is not None:
+            cmd = await self._socket.next_command(kind)
+            await self.ack(cmd["id"])
+            return cmd.get("payload", {})  # type: ignore[no-any-return]
+        while True:
+            commands = await self._get(
+                "/v1/commands/listen",
+                params={"timeout": _POLL_TIMEOUT_SECONDS},
+                timeout=float(_POLL_TIMEOUT_SECONDS + 10),
+            )
+            for cmd in commands:
+                if cmd.get("kind") == kind and cmd.get("status") == "pending":
+                    await self.ack(cmd["id"])
+                    return cmd.get("payload", {})  # type: ignore[return-value]
+
+    async def log(
+        self,
+        message: str,
+        cost: float = 0.0,
+        type: str = "action",  # noqa: A002
+        completed_actions: list[str] | None = None,
+    ) -> str:
+        """Log an event to the dashboard. Returns the event ID. See JarvisAgent.log."""
+        data = await self._post_event({
+            "type": type,
+            "message": message,
+            "cost": cost,
+            "requiresApproval": False,
+            "completedActions": completed_actions or [],
+        })
+        return str(data["event"]["id"])
+
+    async def checkpoint(
+        self,
+        message: str,
+        proposed_action: str,
+        cost: float = 0.0,
+        completed_actions: list[str] | None = None,
+    ) -> str:
+        """Request human approval before proceeding. Returns the task ID. See JarvisAgent.checkpoint."""
+        data = await self._post_event({
+            "type": "approval_request",
+            "message": message,
+            "cost": cost,
+            "requiresApproval": True,
+            "proposedAction": proposed_action,
+            "completedActions": completed_actions or [],
+        })
+        task_id = data.get("taskId")
+        if not task_id:
+            raise RuntimeError("Server did not return a taskId for the checkpoint.")
+        return str(task_id)
+
+    async def wait_for_decision(self) -> dict[str, Any]:
+        """
+        Wait until a human approves or rejects in the dashboard.
+
+        Returns the decision payload, e.g. {"decision": "approved", "comment": "Go ahead"}.
+        Safe to cancel (e.g. with asyncio.wait_for) while waiting.
+        """
+        return await self._wait_for_command("approval_decision")
+
+    async def ack(self, command_id: str) -> dict[str, Any]:
+        """Acknowledge a command by ID, marking it as processed."""
+        if self._socket is not None:
+            return (await self._socket.request({"type": "ack", "commandId": command_id}))["command"]  # type: ignore[no-any-return]
+        return await self._post(f"/v1/commands/{command_id}/ack", {})
+
+    # ── Comms Hub helpers ─────────────────────────────────────────────────────
+
+    async def get_human_messages(self) -> list[dict[str, Any]]:
+        """Return all pending human_message commands for this agent."""
+        commands = await self._get("/v1/commands")
+        return [c for c in commands if c.get("kind") == "human_message" and c.get("status") == "pending"]
+
+    async def wait_for_human_message(self) -> dict[str, Any]:
+        """
+        Wait until a human sends a message from the Comms Hub.
+
+        Returns {"messageId": "<uuid>", "content": "..."}. Safe to cancel while waiting.
+        """
+        return await self._wait_for_command("human_message")
+
+    async def typing(self, is_typing: bool = True) -> None:
+        """Show or hide the typing indicator in the Comms Hub."""
+        if self._socket is not None:
+            await self._socket.send({"type": "typing", "isTyping": is_typing})
+            return
+        await self._post("/v1/comms/typing", {"isTyping": is_typing})
+
+    async def stream_chunk(self, content: str) -> None:
+        """Stream a token chunk to the Comms Hub; finish with reply()."""
+        if self._socket is not None:
+            await self._socket.send({"type": "chunk", "content": content})
+            return
+        await self._post("/v1/comms/stream", {"content": content})
+
+    async def reply(
+        self,
+        content: str,
+        reply_to_message_id: str | None = None,
+        metadata: dict[str, Any] | None = None,
+    ) -> dict[str, Any]:
+        """Post a reply to the Comms Hub as the agent. See JarvisAgent.reply."""
+        body: dict[str, Any] = {
+            "content": content,
+            "metadata": metadata or {},
+        }
+        if reply_to_message_id:
+            body["replyToMessageId"] = reply_to_message_id
+        return await self._post("/v1/comms/replies", body)
+
+    # ── Workshop helpers ──────────────────────────────────────────────────────
+
+    async def get_my_tasks(self) -> list[dict[str, Any]]:
+        """Return tasks assigned to this agent that are in 'backlog' or 'in_progress'."""
+        return await self._get("/v1/workshop/my-tasks")
+
+    async def update_task_status(self, task_id: str, status: str) -> dict[str, Any]:
+        """Update the status ('backlog', 'in_progress' or 'done') of a task assigned to this agent."""
+        return await self._post(f"/v1/workshop/my-tasks/{task_id}/status", {"status": status})
+
+    async def start_task(self, task_id: str) -> dict[str, Any]:
+        """Move a task to 'in_progress'."""
+        return await self.update_task_status(task_id, "in_progress")
+
+    async def complete_task(self, task_id: str) -> dict[str, Any]:
+        """Mark a task as 'done'."""
+        return await self.update_task_status(task_id, "done")
+
+    async def respond_to_human_command(
+        self,
+        command: dict[str, Any],
+        content: str,
+        metadata: dict[str, Any] | None = None,
+    ) -> dict[str, Any]:
+        """Reply to a human_message command then acknowledge it. See JarvisAgent.respond_to_human_command."""
+        message_id = command.get("payload", {}).get("messageId")
+        reply_msg = await self.reply(content, reply_to_message_id=message_id, metadata=metadata)
+        try:
+            await self.ack(command["id"])
+        except Exception:  # noqa: BLE001
+            pass  # ack failure shouldn't block the caller
+        return reply_msg
@@ -9,6 +9,18 @@ Basic usage:
     agent = JarvisAgent(token="your-token", base_url="http://localhost:8000")
     agent.log("Fetching competitor data", cost=0.04)
 
+Non-blocking logging (events are batched by a background thread):
+    agent = JarvisAgent(token="your-token", background=True)
+    agent.log("Step 1 done")     # returns immediately
+    agent.flush()                # optional: wait until everything is sent
+
+Surviving dashboard outages (failed events are spooled to disk and replayed in order):
+    agent = JarvisAgent(token="your-token", background=True, spool_path="~/.jarvis/spool.db")
+
+One persistent WebSocket instead of a request per call (commands are pushed,
+streamed chunks are single frames; needs jarvis-mc[websocket]):
+    agent = JarvisAgent(token="your-token", transport="websocket")
+
 With approval gates:
     task_id = agent.checkpoint(
         "Draft ready for review",
@@ -31,17 +43,225 @@ With Claude (auto-reports cost + response):
 """
 from __future__ import annotations
 
-from typing import Any
+import atexit
+import functools
+import logging
+import os
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Any, Callable
 
 import requests
 
+from .spool import EventSpool, PartialDelivery, SpoolReplayer, is_retryable
+from .ws import AgentSocket, JarvisSocketError
+
+logger = logging.getLogger("jarvis_mc")
+
 _DEFAULT_BASE_URL = "http://localhost:8000"
+_USER_AGENT = "jarvis-mc-python/0.1.0"
+_MAX_BATCH_SIZE = 500  # server-side limit for POST /v1/events/batch
+_POLL_TIMEOUT_SECONDS = 30
+_EXIT_TIMEOUT_SECONDS = 5.0
+# What a failed send raises on either transport.
+_SEND_ERRORS = (requests.RequestException, ConnectionError, JarvisSocketError, PartialDelivery)
+# Batch rejections that may be down to single events (budget cap, validation,
+# size); the batch is then retried one event at a time.
+_PER_EVENT_STATUSES = frozenset({400, 402, 413, 422})
 
 # claude-sonnet-4-6 pricing (per token)
 _INPUT_COST_PER_TOKEN = 3.00 / 1_000_000
 _OUTPUT_COST_PER_TOKEN = 15.00 / 1_000_000
 
 
+class _BackgroundLogger:
+    """
+    Bounded event buffer drained by a daemon thread into POST /v1/events/batch.
+
+    A batch is sent once ``batch_size`` events are waiting or ``flush_interval``
+    seconds have passed. When the buffer is full, ``on_full="drop"`` discards
+    the new event and ``on_full="block"`` waits for room. Failed batches are
+    logged and discarded; JarvisAgent's sender first retries a rejected batch
+    event by event, so only the events the server refuses are lost. At interpreter exit the buffer gets ``exit_timeout``
+    seconds to drain; whatever is left is reported and abandoned.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[list[dict[str, Any]]], None],
+        max_buffer: int,
+        batch_size: int,
+        flush_interval: float,
+        on_full: str,
+        exit_timeout: float = _EXIT_TIMEOUT_SECONDS,
+    ) -> None:
+        if on_full not in ("drop", "block"):
+            raise ValueError("on_full must be 'drop' or 'block'.")
+        self._send = send
+        self._max_buffer = max(1, max_buffer)
+        self._batch_size = max(1, min(batch_size, _MAX_BATCH_SIZE))
+        self._flush_interval = flush_interval
+        self._on_full = on_full
+        self.exit_timeout = exit_timeout
+        self._buffer: deque[dict[str, Any]] = deque()
+        self._cond = threading.Condition()
+        self._enqueued = 0   # events accepted into the buffer, ever
+        self._completed = 0  # events whose batch has been sent (or failed)
+        self._flush_until = 0
+        self._closed = False
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._run, name="jarvis-mc-logger", daemon=True)
+        self._thread.start()
+        _live_loggers.add(self)
+
+    def put(self, event: dict[str, Any]) -> bool:
+        """Buffer *event*; returns False if it was dropped because the buffer is full."""
+        with self._cond:
+            while not self._closed and len(self._buffer) >= self._max_buffer:
+                if self._on_full == "drop":
+                    self.dropped += 1
+                    return False
+                self._cond.wait()
+            if self._closed:
+                raise RuntimeError("JarvisAgent has been closed.")
+            self._buffer.append(event)
+            self._enqueued += 1
+            if len(self._buffer) >= self._batch_size:
+                self._cond.notify_all()
+            return True
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Send everything buffered so far; returns False if *timeout* expired first."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            target = self._enqueued
+            self._flush_until = max(self._flush_until, target)
+            self._cond.notify_all()
+            while self._completed < target:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                if not self._thread.is_alive():
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    @property
+    def undelivered(self) -> int:
+        """Events accepted but not yet sent: buffered plus the batch in flight."""
+        with self._cond:
+            return self._enqueued - self._completed
+
+    def close(self, timeout: float | None = None) -> None:
+        """Stop accepting events, send what is buffered, and stop the worker thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    def _next_batch(self) -> list[dict[str, Any]] | None:
+        with self._cond:
+            deadline = time.monotonic() + self._flush_interval
+            while (
+                len(self._buffer) < self._batch_size
+                and not self._closed
+                and self._enqueued - len(self._buffer) >= self._flush_until
+            ):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            if not self._buffer:
+                return None if self._closed else []
+            count = min(self._batch_size, len(self._buffer))
+            batch = [self._buffer.popleft() for _ in range(count)]
+            self._cond.notify_all()  # room for producers blocked on a full buffer
+            return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            if not batch:
+                continue
+            try:
+                self._send(batch)
+            except Exception as exc:  # noqa: BLE001
+                lost = exc.remaining if isinstance(exc, PartialDelivery) else batch
+                logger.warning("Jarvis: failed to send %d event(s): %s", len(lost), exc)
+            with self._cond:
+                self._completed += len(batch)
+                self._cond.notify_all()
+
+
+# Loggers whose worker may still hold events. Weak, so an agent that is never
+# closed does not outlive its last reference; the worker keeps its logger
+# alive until the buffer is drained.
+_live_loggers: weakref.WeakSet[_BackgroundLogger] = weakref.WeakSet()
+
+
+@atexit.register
+def _drain_at_exit() -> None:
+    """Give every open logger its exit_timeout to drain, concurrently, then report what is lost."""
+    loggers = list(_live_loggers)
+    for bg in loggers:
+        bg.close(timeout=0)
+    started = time.monotonic()
+    for bg in loggers:
+        bg.close(timeout=max(0.0, started + bg.exit_timeout - time.monotonic()))
+        if bg.undelivered or bg.dropped:
+            logger.warning(
+                "Jarvis: exiting with %d undelivered event(s); %d were dropped earlier because the buffer was full.",
+                bg.undelivered,
+                bg.dropped,
+            )
+
+
+def _send_or_spool(
+    send: Callable[[list[dict[str, Any]]], None],
+    spool: EventSpool | None,
+    replayer: SpoolReplayer | None,
+    events: list[dict[str, Any]],
+) -> None:
+    if spool is None:
+        send(events)
+        return
+    if not len(spool):
+        try:
+            send(events)
+            return
+        except _SEND_ERRORS as exc:
+            if not is_retryable(exc):
+                raise
+            if isinstance(exc, PartialDelivery):
+                events = exc.remaining
+    _spool_events(spool, replayer, events)
+
+
+def _spool_events(
+    spool: EventSpool,
+    replayer: SpoolReplayer | None,
+    events: list[dict[str, Any]],
+) -> None:
+    # Spooled events are replayed first, so while the spool is non-empty
+    # newer events must queue behind them to keep the feed in order.
+    assert replayer is not None
+    spool.append(events)
+    replayer.notify()
+
+
+def _release(bg: _BackgroundLogger | None, replayer: SpoolReplayer | None) -> None:
+    # Finalizer for an agent dropped without close(): stop the threads but do
+    # not wait; the logger still drains in the background.
+    if bg is not None:
+        bg.close(timeout=0)
+    if replayer is not None:
+        replayer.close(timeout=0)
+
+
 class JarvisAgent:
     """
     Core Jarvis Mission Control client. Works with any underlying AI model.
@@ -54,6 +274,40 @@ class JarvisAgent:
         Jarvis API base URL. Defaults to http://localhost:8000.
     timeout:
         HTTP request timeout in seconds. Defaults to 30.
+    background:
+        If True, log() buffers events and a background thread posts them in
+        batches, so the caller never waits on the network. Call flush() to
+        wait for delivery; close() drains the buffer. Defaults to False.
+    buffer_size:
+        Maximum number of buffered events in background mode. Defaults to 1000.
+    batch_size:
+        Maximum events per batch request (at most 500). Defaults to 100.
+    flush_interval:
+        Seconds a partial batch may wait before it is sent. Defaults to 1.
+    on_full:
+        What log() does when the buffer is full: "drop" the event (default)
+        or "block" until there is room.
+    exit_timeout:
+        Seconds interpreter exit waits for background mode to send what is
+        still buffered if close() was not called. Whatever is left is logged
+        as a warning and lost. Defaults to 5.
+    spool_path:
+        Optional SQLite file. log() events that fail with a network error,
+        timeout, 429 or 5xx are written there instead of raising (or being
+        dropped in background mode) and replayed in order by a background
+        thread once the API is reachable. While anything is spooled, new
+        events queue behind it. Replayed events are timestamped on arrival.
+    spool_max_events:
+        Cap on spooled events; the oldest are discarded past it. Defaults to 100,000.
+    spool_max_bytes:
+        Cap on spooled payload bytes. Defaults to 50 MB.
+    transport:
+        "http" (default) or "websocket". With "websocket", log(), checkpoint(),
+        ack(), typing() and stream_chunk() go over one persistent, once-
+        authenticated connection to /v1/agent/ws, and wait_for_decision() /
+        wait_for_human_message() receive commands as the server pushes them.
+        Background batches, spool replay and the other helpers stay on HTTP.
+        Needs jarvis-mc[websocket].
     """
 
     def __init__(
@@ -61,15 +315,132 @@ class JarvisAgent:
         token: str,
         base_url: str = _DEFAULT_BASE_URL,
         timeout: float = 30.0,
+        background: bool = False,
+        buffer_size: int = 1000,
+        batch_size: int = 100,
+        flush_interval: float = 1.0,
+        on_full: str = "drop",
+        exit_timeout: float = _EXIT_TIMEOUT_SECONDS,
+        spool_path: str | None = None,
+        spool_max_events: int = 100_000,
+        spool_max_bytes: int = 50 * 1024 * 1024,
+        transport: str = "http",
     ) -> None:
+        if transport not in ("http", "websocket"):
+            raise ValueError("transport must be 'http' or 'websocket'.")
         self._base_url = base_url.rstrip("/")
         self._timeout = timeout
-        self._session = requests.Session()
-        self._session.headers.update({
-            "X-Agent-Token": token,
+        self._token = token
+        self._session = self._new_session()
+        self._socket: AgentSocket | None = None
+        if transport == "websocket":
+            self._socket = AgentSocket(self._base_url, token, timeout, _USER_AGENT)
+        self._spool: EventSpool | None = None
+        self._replayer: SpoolReplayer | None = None
+        if spool_path:
+            self._spool = EventSpool(
+                os.path.expanduser(spool_path),
+                max_events=spool_max_events,
+                max_bytes=spool_max_bytes,
+            )
+            self._replayer = SpoolReplayer(
+                self._spool,
+                self._batch_sender(),
+                batch_size=min(batch_size, _MAX_BATCH_SIZE),
+            )
+            if len(self._spool):
+                self._replayer.notify()  # left over from a previous run
+        self._logger: _BackgroundLogger | None = None
+        if background:
+            # The worker must not reference self, or an unclosed agent would never be collected.
+            self._logger = _BackgroundLogger(
+                functools.partial(_send_or_spool, self._batch_sender(), self._spool, self._replayer),
+                max_buffer=buffer_size,
+                batch_size=batch_size,
+                flush_interval=flush_interval,
+                on_full=on_full,
+                exit_timeout=exit_timeout,
+            )
+        self._finalizer = weakref.finalize(self, _release, self._logger, self._replayer)
+        self._finalizer.atexit = False  # _drain_at_exit handles interpreter exit
+
+    def _new_session(self) -> requests.Session:
+        session = requests.Session()
+        session.headers.update({
+            "X-Agent-Token": self._token,
             "Content-Type": "application/json",
-            "User-Agent": "jarvis-mc-python/0.1.0",
+            "User-Agent": _USER_AGENT,
         })
+        return session
+
+    def _batch_sender(self) -> Callable[[list[dict[str, Any]]], None]:
+        # requests.Session is not thread-safe; each background thread gets its own.
+        session = self._new_session()
+        batch_url = f"{self._base_url}/v1/events/batch"
+        event_url = f"{self._base_url}/v1/events"
+        timeout = self._timeout
+
+        def send_each(events: list[dict[str, Any]]) -> None:
+            for index, event in enumerate(events):
+                try:
+                    response = session.post(event_url, json=event, timeout=timeout)
+                    if response.status_code in _PER_EVENT_STATUSES:
+                        logger.warning(
+                            "Jarvis rejected an event (%d); discarding: %s", response.status_code, response.text
+                        )
+                        continue
+                    response.raise_for_status()
+                except requests.RequestException as exc:
+                    raise PartialDelivery(events[index:]) from exc
+
+        def send(events: list[dict[str, Any]]) -> None:
+            response = session.post(batch_url, json={"events": events}, timeout=timeout)
+            if response.status_code in _PER_EVENT_STATUSES:
+                # The batch endpoint is all-or-nothing: an event over the
+                # budget cap or failing validation must not take the zero-cost
+                # and error events around it down too.
+                send_each(events)
+                return
+            response.raise_for_status()
+
+        return send
+
+    def __enter__(self) -> JarvisAgent:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """
+        Block until every event logged so far has been sent.
+
+        Returns False if *timeout* seconds passed first. A no-op returning
+        True when background mode is off. Events written to the spool count
+        as flushed.
+        """
+        if self._logger is None:
+            return True
+        return self._logger.flush(timeout)
+
+    def close(self, timeout: float | None = None) -> None:
+        """Send any buffered events, stop the background threads and close HTTP sessions.
+
+        Events still in the spool stay on disk for the next JarvisAgent on the same path.
+        """
+        self._finalizer.detach()
+        if self._logger is not None:
+            self._logger.close(timeout)
+        if self._replayer is not None:
+            self._replayer.close(timeout)
+        if self._socket is not None:
+            self._socket.close()
+        self._session.close()
+
+    @property
+    def dropped_events(self) -> int:
+        """Number of events discarded because the background buffer was full."""
+        return self._logger.dropped if self._logger is not None else 0
 
     def _post(self, path: str, body: dict[str, Any]) -> dict[str, Any]:
         response = self._session.post(
@@ -92,15 +463,34 @@ class JarvisAgent:
         response.raise_for_status()
         return response.json()  # type: ignore[no-any-return]
 
+    def _post_event(self, body: dict[str, Any]) -> dict[str, Any]:
+        if self._socket is not None:
+            return self._socket.request({"type": "event", "event": body})
+        return self._post("/v1/events", body)
+
+    def _next_command(self, kind: str) -> dict[str, Any]:
+        if self._socket is not None:
+            return self._socket.next_command(kind)
+        while True:
+            commands = self._get(
+                "/v1/commands/listen",
+                params={"timeout": _POLL_TIMEOUT_SECONDS},
+                timeout=float(_POLL_TIMEOUT_SECONDS + 10),
+            )
+            for cmd in commands:
+                if cmd.get("kind") == kind and cmd.get("status") == "pending":
+                    return cmd
+
     def log(
         self,
         message: str,
         cost: float = 0.0,
         type: str = "action",  # noqa: A002
         completed_actions: list[str] | None = None,
-    ) -> str:
+    ) -> str | None:
         """
-        Log an event to the dashboard. Returns the event ID.
+        Log an event to the dashboard. Returns the event ID, or None when the
+        event was buffered (background mode) or spooled for later delivery.
 
         Parameters
         ----------
@@ -113,14 +503,28 @@ class JarvisAgent:
         completed_actions:
             Optional list of previously completed steps for context.
         """
-        data = self._post("/v1/events", {
+        body = {
             "type": type,
             "message": message,
             "cost": cost,
             "requiresApproval": False,
             "completedActions": completed_actions or [],
-        })
-        return str(data["event"]["id"])
+        }
+        if self._logger is not None:
+            self._logger.put(body)
+            return None
+        if self._spool is None:
+            data = self._post_event(body)
+            return str(data["event"]["id"])
+        if not len(self._spool):
+            try:
+                data = self._post_event(body)
+                return str(data["event"]["id"])
+            except _SEND_ERRORS as exc:
+                if not is_retryable(exc):
+                    raise
+        _spool_events(self._spool, self._replayer, [body])
+        return None
 
     def checkpoint(
         self,
@@ -146,7 +550,9 @@ class JarvisAgent:
         completed_actions:
             Optional list of already-completed steps shown for context.
         """
-        data = self._post("/v1/events", {
+        # Keep the feed in order: buffered log() events land before the request.
+        self.flush()
+        data = self._post_event({
             "type": "approval_request",
             "message": message,
             "cost": cost,
@@ -163,24 +569,17 @@ class JarvisAgent:
         """
         Block until a human approves or rejects in the dashboard.
 
-        Uses long polling — no wasted requests while waiting.
+        Uses long polling (or the pushed commands of the WebSocket transport) —
+        no wasted requests while waiting.
         Automatically acknowledges the command before returning.
 
         Returns the decision payload, e.g.:
             {"decision": "approved", "comment": "Go ahead"}
             {"decision": "rejected", "comment": "Too risky"}
         """
-        _poll_timeout = 30
-        while True:
-            commands = self._get(
-                "/v1/commands/listen",
-                params={"timeout": _poll_timeout},
-                timeout=float(_poll_timeout + 10),
-            )
-            for cmd in commands:
-                if cmd.get("kind") == "approval_decision" and cmd.get("status") == "pending":
-                    self.ack(cmd["id"])
-                    return cmd.get("payload", {})  # type: ignore[return-value]
+        cmd = self._next_command("approval_decision")
+        self.ack(cmd["id"])
+        return cmd.get("payload", {})  # type: ignore[no-any-return]
 
     def ack(self, command_id: str) -> dict[str, Any]:
         """
@@ -191,6 +590,8 @@ class JarvisAgent:
         command_id:
             The UUID of the command to acknowledge.
         """
+        if self._socket is not None:
+            return self._socket.request({"type": "ack", "commandId": command_id})["command"]  # type: ignore[no-any-return]
         return self._post(f"/v1/commands/{command_id}/ack", {})
 
     # ── Comms Hub helpers ─────────────────────────────────────────────────────
@@ -217,23 +618,16 @@ class JarvisAgent:
         """
         Block until a human sends a message from the Comms Hub.
 
-        Uses long polling — no wasted requests while waiting.
+        Uses long polling (or the pushed commands of the WebSocket transport) —
+        no wasted requests while waiting.
         Automatically acknowledges the command before returning.
 
         Returns the message payload:
             {"messageId": "<uuid>", "content": "the human's message"}
         """
-        _poll_timeout = 30
-        while True:
-            commands = self._get(
-                "/v1/commands/listen",
-                params={"timeout": _poll_timeout},
-                timeout=float(_poll_timeout + 10),
-            )
-            for cmd in commands:
-                if cmd.get("kind") == "human_message" and cmd.get("status") == "pending":
-                    self.ack(cmd["id"])
-                    return cmd.get("payload", {})  # type: ignore[return-value]
+        cmd = self._next_command("human_message")
+        self.ack(cmd["id"])
+        return cmd.get("payload", {})  # type: ignore[no-any-return]
 
     def typing(self, is_typing: bool = True) -> None:
         """
@@ -248,6 +642,9 @@ class JarvisAgent:
         is_typing:
             True to show the typing indicator, False to hide it.
         """
+        if self._socket is not None:
+            self._socket.send({"type": "typing", "isTyping": is_typing})
+            return
         self._post("/v1/comms/typing", {"isTyping": is_typing})
 
     def stream_chunk(self, content: str) -> None:
@@ -255,7 +652,8 @@ class JarvisAgent:
         Stream a token chunk to the Comms Hub in real-time.
 
         Call this in a loop as tokens arrive from the model. The dashboard
-        renders chunks as they come in. Finish by calling reply() with the
+        renders chunks as they come in. With transport="websocket" each
+        chunk is a single frame that does not wait for an answer. Finish by calling reply() with the
         full response, which stores it in the DB and clears the stream.
 
         Example::
@@ -271,6 +669,9 @@ class JarvisAgent:
         content:
             The token or partial text to stream.
         """
+        if self._socket is not None:
+            self._socket.send({"type": "chunk", "content": content})
+            return
         self._post("/v1/comms/stream", {"content": content})
 
     def reply(
@@ -404,8 +805,14 @@ class AnthropicJarvis:
             messages=[{"role": "user", "content": "Summarize this..."}],
         )
 
-    All keyword arguments (except jarvis_token, jarvis_url, jarvis_timeout)
-    are forwarded to anthropic.Anthropic.__init__.
+    Calls are logged through a background-batching JarvisAgent, so Claude
+    requests never wait on Jarvis; pass jarvis_background=False to log
+    synchronously. Call close() to drain it; interpreter exit only waits
+    a few seconds (see JarvisAgent's exit_timeout).
+    Pass jarvis_spool_path to keep cost events through dashboard outages.
+
+    All keyword arguments (except the jarvis_* ones) are forwarded to
+    anthropic.Anthropic.__init__.
 
     Requires: pip install jarvis-mc[anthropic]
     """
@@ -416,6 +823,8 @@ class AnthropicJarvis:
         jarvis_token: str,
         jarvis_url: str = _DEFAULT_BASE_URL,
         jarvis_timeout: float = 30.0,
+        jarvis_background: bool = True,
+        jarvis_spool_path: str | None = None,
         **kwargs: Any,
     ) -> None:
         try:
@@ -430,10 +839,21 @@ class AnthropicJarvis:
             token=jarvis_token,
             base_url=jarvis_url,
             timeout=jarvis_timeout,
+            background=jarvis_background,
+            spool_path=jarvis_spool_path,
         )
         self._client = _anthropic.Anthropic(*args, **kwargs)
         self.messages = _JarvisMessages(self._client.messages, self._jarvis)
 
+    @property
+    def jarvis(self) -> JarvisAgent:
+        """The underlying JarvisAgent, e.g. for checkpoint() or flush()."""
+        return self._jarvis
+
+    def close(self) -> None:
+        """Flush pending Jarvis events and release HTTP resources."""
+        self._jarvis.close()
+
 
 class _JarvisMessages:
     """Proxy for anthropic.messages that auto-logs every call to Jarvis."""
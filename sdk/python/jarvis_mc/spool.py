@@ -0,0 +1,217 @@
+"""
+Disk-backed spool for events the dashboard could not accept.
+
+Events are appended to a local SQLite database (WAL mode) and replayed in
+order by a background thread once the API is reachable again, so an API
+deploy or network blip costs neither data nor agent latency. The spool is
+capped by event count and payload bytes; past a cap the oldest events are
+discarded. Spooled events survive process restarts and are replayed by the
+next JarvisAgent opened on the same path.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+from typing import Any, Callable
+
+import requests
+
+from .ws import JarvisSocketError
+
+logger = logging.getLogger("jarvis_mc")
+
+_MIN_RETRY_SECONDS = 1.0
+_MAX_RETRY_SECONDS = 60.0
+
+
+class PartialDelivery(Exception):
+    """A send that failed part-way through; *remaining* are the events not yet delivered.
+
+    The failure itself is the ``__cause__``.
+    """
+
+    def __init__(self, remaining: list[dict[str, Any]]) -> None:
+        super().__init__(f"{len(remaining)} event(s) not delivered")
+        self.remaining = remaining
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """True for failures worth spooling: network errors, timeouts, 429 and 5xx."""
+    if isinstance(exc, PartialDelivery):
+        return exc.__cause__ is not None and is_retryable(exc.__cause__)
+    if isinstance(exc, (requests.ConnectionError, requests.Timeout, ConnectionError)):
+        return True
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        return exc.response.status_code == 429 or exc.response.status_code >= 500
+    if isinstance(exc, JarvisSocketError):
+        return exc.status_code == 429 or exc.status_code >= 500
+    return False
+
+
+class EventSpool:
+    """
+    Append-only, size-capped FIFO of event bodies in a SQLite file.
+
+    Parameters
+    ----------
+    path:
+        SQLite file to use; parent directories are created.
+    max_events:
+        Maximum number of spooled events. Defaults to 100,000.
+    max_bytes:
+        Maximum total size of spooled event bodies. Defaults to 50 MB.
+    """
+
+    def __init__(self, path: str, max_events: int = 100_000, max_bytes: int = 50 * 1024 * 1024) -> None:
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._max_events = max_events
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        # auto_vacuum only takes effect before the first table exists.
+        self._conn.execute("pragma auto_vacuum = incremental")
+        self._conn.execute("pragma journal_mode = wal")
+        self._conn.execute("pragma synchronous = normal")
+        self._conn.execute(
+            "create table if not exists spool (seq integer primary key autoincrement, body text not null)"
+        )
+        count, size = self._conn.execute(
+            "select count(*), coalesce(sum(length(body)), 0) from spool"
+        ).fetchone()
+        self._count: int = count
+        self._bytes: int = size
+        self.discarded = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, events: list[dict[str, Any]]) -> None:
+        bodies = [json.dumps(event, separators=(",", ":")) for event in events]
+        with self._lock:
+            self._conn.execute("begin immediate")
+            try:
+                self._conn.executemany("insert into spool (body) values (?)", [(b,) for b in bodies])
+                self._count += len(bodies)
+                self._bytes += sum(len(b) for b in bodies)
+                self._enforce_caps()
+                self._conn.execute("commit")
+            except BaseException:
+                self._conn.execute("rollback")
+                raise
+
+    def peek(self, limit: int) -> list[tuple[int, dict[str, Any]]]:
+        """Return up to *limit* of the oldest events as (seq, body) pairs without removing them."""
+        with self._lock:
+            rows = self._conn.execute(
+                "select seq, body from spool order by seq limit ?", (limit,)
+            ).fetchall()
+        return [(seq, json.loads(body)) for seq, body in rows]
+
+    def ack(self, through_seq: int) -> None:
+        """Remove every event up to and including *through_seq*."""
+        with self._lock:
+            count, size = self._conn.execute(
+                "select count(*), coalesce(sum(length(body)), 0) from spool where seq <= ?",
+                (through_seq,),
+            ).fetchone()
+            self._conn.execute("delete from spool where seq <= ?", (through_seq,))
+            self._count -= count
+            self._bytes -= size
+
+    def compact(self) -> None:
+        """Return freed pages to the filesystem and truncate the WAL."""
+        with self._lock:
+            self._conn.execute("pragma incremental_vacuum")
+            self._conn.execute("pragma wal_checkpoint(truncate)")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _enforce_caps(self) -> None:
+        while self._count > self._max_events or (self._bytes > self._max_bytes and self._count > 1):
+            excess = max(self._count - self._max_events, 1)
+            count, size = self._conn.execute(
+                "select count(*), coalesce(sum(length(body)), 0) from "
+                "(select body from spool order by seq limit ?)",
+                (excess,),
+            ).fetchone()
+            self._conn.execute(
+                "delete from spool where seq in (select seq from spool order by seq limit ?)",
+                (excess,),
+            )
+            self._count -= count
+            self._bytes -= size
+            self.discarded += count
+            logger.warning("Jarvis spool full; discarded %d oldest event(s).", count)
+
+
+class SpoolReplayer:
+    """
+    Daemon thread that drains an EventSpool in order through *send*.
+
+    Retryable failures back off exponentially (1s up to 60s). Anything else is
+    logged and the batch discarded so one bad event cannot wedge the spool;
+    after a PartialDelivery only its undelivered remainder is retried or
+    discarded.
+    """
+
+    def __init__(
+        self,
+        spool: EventSpool,
+        send: Callable[[list[dict[str, Any]]], None],
+        batch_size: int,
+    ) -> None:
+        self._spool = spool
+        self._send = send
+        self._batch_size = batch_size
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="jarvis-mc-spool", daemon=True)
+        self._thread.start()
+
+    def notify(self) -> None:
+        self._wake.set()
+
+    def close(self, timeout: float | None = None) -> None:
+        self._stopping.set()
+        self._wake.set()
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        delay = _MIN_RETRY_SECONDS
+        while not self._stopping.is_set():
+            if not len(self._spool):
+                self._wake.wait()
+                self._wake.clear()
+                continue
+            if self._drain():
+                delay = _MIN_RETRY_SECONDS
+                self._spool.compact()
+            else:
+                self._wake.clear()
+                self._stopping.wait(delay)
+                delay = min(delay * 2, _MAX_RETRY_SECONDS)
+
+    def _drain(self) -> bool:
+        """Replay until the spool is empty; False if the API is still unreachable."""
+        while not self._stopping.is_set():
+            batch = self._spool.peek(self._batch_size)
+            if not batch:
+                return True
+            try:
+                self._send([body for _, body in batch])
+            except Exception as exc:  # noqa: BLE001
+                if isinstance(exc, PartialDelivery):
+                    delivered = len(batch) - len(exc.remaining)
+                    if delivered:
+                        self._spool.ack(batch[delivered - 1][0])
+                if is_retryable(exc):
+                    return False
+                logger.warning("Jarvis rejected spooled event(s); discarding: %s", exc)
+            self._spool.ack(batch[-1][0])
+        return False
@@ -0,0 +1,385 @@
+"""
+WebSocket transport for Jarvis agents (``transport="websocket"``).
+
+One persistent, once-authenticated /v1/agent/ws connection carries events,
+comms chunks, typing signals and command acks as JSON frames, and the
+server pushes commands as soon as they are created instead of answering
+long-polls. Streaming a reply token by token costs one frame per chunk
+rather than one HTTP request.
+
+Frames that expect an answer carry an ``id``; the server replies with
+``{"type": "ok", "id": ...}`` or ``{"type": "error", "id": ..., "status": ...,
+"detail": ...}``. Chunks and typing signals are fire-and-forget: failures
+come back without an id and are logged.
+
+Requires: pip install jarvis-mc[websocket]
+"""
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import itertools
+import json
+import logging
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any
+
+logger = logging.getLogger("jarvis_mc")
+
+_WS_PATH = "/v1/agent/ws"
+_MAX_BUFFERED_COMMANDS = 1000
+_POLICY_VIOLATION = 1008  # close code for a rejected agent token
+
+
+class JarvisSocketError(Exception):
+    """The server rejected a WebSocket frame; *status_code* mirrors the HTTP API."""
+
+    def __init__(self, status_code: int, detail: Any) -> None:
+        super().__init__(f"Jarvis API error {status_code}: {detail}")
+        self.status_code = status_code
+        self.detail = detail
+
+
+def _ws_url(base_url: str) -> str:
+    if base_url.startswith("https://"):
+        return "wss://" + base_url[len("https://"):] + _WS_PATH
+    if base_url.startswith("http://"):
+        return "ws://" + base_url[len("http://"):] + _WS_PATH
+    return base_url + _WS_PATH
+
+
+def _require_websockets() -> None:
+    if importlib.util.find_spec("websockets") is None:
+        raise ImportError(
+            "The 'websockets' package is required for transport='websocket'.\n"
+            "Install it with: pip install jarvis-mc[websocket]"
+        )
+
+
+def _error_from_frame(frame: dict[str, Any]) -> JarvisSocketError:
+    return JarvisSocketError(int(frame.get("status") or 500), frame.get("detail"))
+
+
+def _handshake_error(exc: BaseException, url: str) -> Exception:
+    from websockets.exceptions import ConnectionClosed
+
+    if isinstance(exc, ConnectionClosed) and exc.rcvd is not None and exc.rcvd.code == _POLICY_VIOLATION:
+        return JarvisSocketError(401, exc.rcvd.reason or "Invalid or revoked agent token.")
+    return ConnectionError(f"Could not connect to {url}: {exc}")
+
+
+class _CommandBuffer:
+    """
+    Pushed commands not yet taken, deduplicated by id.
+
+    The server pushes every pending command again on each (re)connect, so
+    ids already buffered or handed out are remembered (the most recent
+    _MAX_BUFFERED_COMMANDS of them) and their repeats dropped.
+    """
+
+    def __init__(self) -> None:
+        self._commands: deque[dict[str, Any]] = deque(maxlen=_MAX_BUFFERED_COMMANDS)
+        self._seen: OrderedDict[Any, None] = OrderedDict()
+
+    def add(self, command: dict[str, Any]) -> bool:
+        command_id = command.get("id")
+        if command_id in self._seen:
+            return False
+        self._seen[command_id] = None
+        if len(self._seen) > _MAX_BUFFERED_COMMANDS:
+            self._seen.popitem(last=False)
+        self._commands.append(command)
+        return True
+
+    def take(self, kind: str) -> dict[str, Any] | None:
+        for command in self._commands:
+            if command.get("kind") == kind and command.get("status") == "pending":
+                self._commands.remove(command)
+                return command
+        return None
+
+
+class AgentSocket:
+    """
+    Blocking /v1/agent/ws client used by JarvisAgent.
+
+    Connects on first use and again on the next call after the connection
+    drops; calls in flight when it drops raise ConnectionError. A daemon
+    thread reads frames, resolving replies and buffering pushed commands.
+    Safe to share between threads.
+    """
+
+    def __init__(self, base_url: str, token: str, timeout: float, user_agent: str) -> None:
+        _require_websockets()
+        self._url = _ws_url(base_url)
+        self._token = token
+        self._timeout = timeout
+        self._user_agent = user_agent
+        self._lock = threading.Lock()  # connecting and sending
+        self._cond = threading.Condition()  # pending replies and buffered commands
+        self._conn: Any = None
+        self._ids = itertools.count(1)
+        self._pending: dict[int, tuple[Any, Future[dict[str, Any]]]] = {}
+        self._commands = _CommandBuffer()
+        self._closed = False
+
+    def _connection(self) -> Any:
+        from websockets.exceptions import WebSocketException
+        from websockets.sync.client import connect
+
+        with self._lock:
+            if self._conn is not None:
+                return self._conn
+            if self._closed:
+                raise RuntimeError("JarvisAgent has been closed.")
+            try:
+                conn = connect(
+                    self._url,
+                    additional_headers={"X-Agent-Token": self._token},
+                    user_agent_header=self._user_agent,
+                    open_timeout=self._timeout,
+                )
+            except (OSError, WebSocketException) as exc:
+                raise _handshake_error(exc, self._url) from exc
+            try:
+                ready = json.loads(conn.recv(timeout=self._timeout))
+            except (OSError, ValueError, WebSocketException) as exc:
+                conn.close()
+                raise _handshake_error(exc, self._url) from exc
+            if ready.get("type") != "ready":
+                conn.close()
+                raise ConnectionError(f"Unexpected handshake from {self._url}: {ready!r}")
+            self._conn = conn
+            threading.Thread(target=self._read, args=(conn,), name="jarvis-mc-socket", daemon=True).start()
+            return conn
+
+    def _send(self, frame: dict[str, Any]) -> None:
+        from websockets.exceptions import WebSocketException
+
+        conn = self._connection()
+        try:
+            with self._lock:
+                conn.send(json.dumps(frame))
+        except (OSError, WebSocketException) as exc:
+            raise ConnectionError(f"Jarvis WebSocket closed: {exc}") from exc
+
+    def request(self, frame: dict[str, Any]) -> dict[str, Any]:
+        """Send *frame* and wait for the server's answer; raises JarvisSocketError on an error frame."""
+        conn = self._connection()
+        request_id = next(self._ids)
+        future: Future[dict[str, Any]] = Future()
+        with self._cond:
+            self._pending[request_id] = (conn, future)
+        try:
+            self._send({**frame, "id": request_id})
+            return future.result(timeout=self._timeout)
+        except FutureTimeoutError as exc:
+            raise ConnectionError(f"No answer from {self._url} within {self._timeout}s.") from exc
+        finally:
+            with self._cond:
+                self._pending.pop(request_id, None)
+
+    def send(self, frame: dict[str, Any]) -> None:
+        """Send *frame* without waiting for an answer."""
+        self._send(frame)
+
+    def next_command(self, kind: str) -> dict[str, Any]:
+        """Block until the server pushes a pending command of *kind*, then return it."""
+        while True:
+            self._connection()
+            with self._cond:
+                command = self._commands.take(kind)
+                if command is not None:
+                    return command
+                self._cond.wait(self._timeout)
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            conn, self._conn = self._conn, None
+        if conn is not None:
+            conn.close()
+
+    def _read(self, conn: Any) -> None:
+        from websockets.exceptions import WebSocketException
+
+        try:
+            for message in conn:
+                try:
+                    frame = json.loads(message)
+                except ValueError:
+                    continue
+                self._dispatch(frame)
+        except WebSocketException as exc:
+            logger.warning("Jarvis: WebSocket connection lost: %s", exc)
+        finally:
+            with self._lock:
+                if self._conn is conn:
+                    self._conn = None
+            with self._cond:
+                for pending_conn, future in self._pending.values():
+                    if pending_conn is conn and not future.done():
+                        future.set_exception(ConnectionError("Jarvis WebSocket closed."))
+                self._cond.notify_all()
+
+    def _dispatch(self, frame: dict[str, Any]) -> None:
+        with self._cond:
+            if frame.get("type") == "command":
+                if self._commands.add(frame["command"]):
+                    self._cond.notify_all()
+                return
+            entry = self._pending.get(frame.get("id"))  # type: ignore[arg-type]
+        if entry is None:
+            if frame.get("type") == "error":
+                logger.warning("Jarvis: %s", _error_from_frame(frame))
+            return
+        future = entry[1]
+        if future.done():
+            return
+        if frame.get("type") == "error":
+            future.set_exception(_error_from_frame(frame))
+        else:
+            future.set_result(frame)
+
+
+class AsyncAgentSocket:
+    """
+    Asyncio /v1/agent/ws client used by AsyncJarvisAgent.
+
+    Same behaviour as AgentSocket; the reader is a task on the running loop.
+    """
+
+    def __init__(self, base_url: str, token: str, timeout: float, user_agent: str) -> None:
+        _require_websockets()
+        self._url = _ws_url(base_url)
+        self._token = token
+        self._timeout = timeout
+        self._user_agent = user_agent
+        self._connect_lock = asyncio.Lock()
+        self._conn: Any = None
+        self._reader: asyncio.Task[None] | None = None
+        self._ids = itertools.count(1)
+        self._pending: dict[int, tuple[Any, asyncio.Future[dict[str, Any]]]] = {}
+        self._commands = _CommandBuffer()
+        self._command_arrived = asyncio.Event()
+        self._closed = False
+
+    async def _connection(self) -> Any:
+        from websockets.asyncio.client import connect
+        from websockets.exceptions import WebSocketException
+
+        async with self._connect_lock:
+            if self._conn is not None:
+                return self._conn
+            if self._closed:
+                raise RuntimeError("AsyncJarvisAgent has been closed.")
+            try:
+                conn = await connect(
+                    self._url,
+                    additional_headers={"X-Agent-Token": self._token},
+                    user_agent_header=self._user_agent,
+                    open_timeout=self._timeout,
+                )
+            except (OSError, asyncio.TimeoutError, WebSocketException) as exc:
+                raise _handshake_error(exc, self._url) from exc
+            try:
+                ready = json.loads(await asyncio.wait_for(conn.recv(), timeout=self._timeout))
+            except (OSError, ValueError, asyncio.TimeoutError, WebSocketException) as exc:
+                await conn.close()
+                raise _handshake_error(exc, self._url) from exc
+            if ready.get("type") != "ready":
+                await conn.close()
+                raise ConnectionError(f"Unexpected handshake from {self._url}: {ready!r}")
+            self._conn = conn
+            self._reader = asyncio.create_task(self._read(conn), name="jarvis-mc-socket")
+            return conn
+
+    async def _send(self, frame: dict[str, Any]) -> None:
+        from websockets.exceptions import WebSocketException
+
+        conn = await self._connection()
+        try:
+            await conn.send(json.dumps(frame))
+        except (OSError, WebSocketException) as exc:
+            raise ConnectionError(f"Jarvis WebSocket closed: {exc}") from exc
+
+    async def request(self, frame: dict[str, Any]) -> dict[str, Any]:
+        """Send *frame* and await the server's answer; raises JarvisSocketError on an error frame."""
+        conn = await self._connection()
+        request_id = next(self._ids)
+        future: asyncio.Future[dict[str, Any]] = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = (conn, future)
+        try:
+            await self._send({**frame, "id": request_id})
+            return await asyncio.wait_for(future, timeout=self._timeout)
+        except asyncio.TimeoutError as exc:
+            raise ConnectionError(f"No answer from {self._url} within {self._timeout}s.") from exc
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def send(self, frame: dict[str, Any]) -> None:
+        """Send *frame* without waiting for an answer."""
+        await self._send(frame)
+
+    async def next_command(self, kind: str) -> dict[str, Any]:
+        """Wait until the server pushes a pending command of *kind*, then return it. Safe to cancel."""
+        while True:
+            await self._connection()
+            command = self._commands.take(kind)
+            if command is not None:
+                return command
+            self._command_arrived.clear()
+            try:
+                await asyncio.wait_for(self._command_arrived.wait(), timeout=self._timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def aclose(self) -> None:
+        self._closed = True
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            await conn.close()
+        if self._reader is not None:
+            await asyncio.gather(self._reader, return_exceptions=True)
+            self._reader = None
+
+    async def _read(self, conn: Any) -> None:
+        from websockets.exceptions import WebSocketException
+
+        try:
+            async for message in conn:
+                try:
+                    frame = json.loads(message)
+                except ValueError:
+                    continue
+                self._dispatch(frame)
+        except WebSocketException as exc:
+            logger.warning("Jarvis: WebSocket connection lost: %s", exc)
+        finally:
+            if self._conn is conn:
+                self._conn = None
+            for pending_conn, future in self._pending.values():
+                if pending_conn is conn and not future.done():
+                    future.set_exception(ConnectionError("Jarvis WebSocket closed."))
+            self._command_arrived.set()
+
+    def _dispatch(self, frame: dict[str, Any]) -> None:
+        if frame.get("type") == "command":
+            if self._commands.add(frame["command"]):
+                self._command_arrived.set()
+            return
+        entry = self._pending.get(frame.get("id"))  # type: ignore[arg-type]
+        if entry is None:
+            if frame.get("type") == "error":
+                logger.warning("Jarvis: %s", _error_from_frame(frame))
+            return
+        future = entry[1]
+        if future.done():
+            return
+        if frame.get("type") == "error":
+            future.set_exception(_error_from_frame(frame))
+        else:
+            future.set_result(frame)
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import gc
+import logging
+import threading
+import time
+import weakref
+from typing import Any
+
+import pytest
+
+from jarvis_mc import client
+from jarvis_mc.client import JarvisAgent, _BackgroundLogger
+
+
+class _Recorder:
+    def __init__(self) -> None:
+        self.batches: list[list[dict[str, Any]]] = []
+        self.gate = threading.Event()
+        self.gate.set()
+        self.fail = False
+
+    def __call__(self, events: list[dict[str, Any]]) -> None:
+        self.gate.wait(5)
+        if self.fail:
+            raise RuntimeError("boom")
+        self.batches.append(events)
+
+
+def _events(count: int) -> list[dict[str, Any]]:
+    return [{"message": f"e{i}"} for i in range(count)]
+
+
+def _logger(send: _Recorder, **overrides: Any) -> _BackgroundLogger:
+    options: dict[str, Any] = {"max_buffer": 100, "batch_size": 3, "flush_interval": 60.0, "on_full": "drop"}
+    options.update(overrides)
+    return _BackgroundLogger(send, **options)
+
+
+def test_full_batches_go_out_without_waiting_for_the_interval() -> None:
+    send = _Recorder()
+    bg = _logger(send)
+    for event in _events(6):
+        assert bg.put(event)
+    assert bg.flush(timeout=5)
+    assert send.batches == [_events(6)[:3], _events(6)[3:]]
+    bg.close(timeout=5)
+
+
+def test_flush_sends_a_partial_batch_and_close_drains() -> None:
+    send = _Recorder()
+    bg = _logger(send)
+    bg.put({"message": "first"})
+    assert bg.flush(timeout=5)
+    assert send.batches == [[{"message": "first"}]]
+    bg.put({"message": "last"})
+    bg.close(timeout=5)
+    assert send.batches[-1] == [{"message": "last"}]
+    with pytest.raises(RuntimeError):
+        bg.put({"message": "late"})
+
+
+def test_flush_times_out_while_the_sender_is_stuck() -> None:
+    send = _Recorder()
+    send.gate.clear()
+    bg = _logger(send)
+    bg.put({"message": "stuck"})
+    assert not bg.flush(timeout=0.05)
+    send.gate.set()
+    assert bg.flush(timeout=5)
+    bg.close(timeout=5)
+
+
+def test_drop_policy_counts_overflow() -> None:
+    send = _Recorder()
+    send.gate.clear()
+    bg = _logger(send, max_buffer=2, batch_size=1)
+    accepted = [bg.put(event) for event in _events(6)]
+    # One batch is in flight, two wait in the buffer, the rest are dropped.
+    assert accepted.count(True) in (2, 3)
+    assert bg.dropped == accepted.count(False)
+    send.gate.set()
+    bg.close(timeout=5)
+
+
+def test_block_policy_waits_for_room() -> None:
+    send = _Recorder()
+    send.gate.clear()
+    bg = _logger(send, max_buffer=1, batch_size=1, on_full="block")
+    done = threading.Event()
+
+    def produce() -> None:
+        for event in _events(4):
+            bg.put(event)
+        done.set()
+
+    threading.Thread(target=produce, daemon=True).start()
+    assert not done.wait(0.1)
+    send.gate.set()
+    assert done.wait(5)
+    bg.close(timeout=5)
+    assert [e for batch in send.batches for e in batch] == _events(4)
+
+
+def test_failed_batches_still_count_as_flushed() -> None:
+    send = _Recorder()
+    send.fail = True
+    bg = _logger(send)
+    bg.put({"message": "lost"})
+    assert bg.flush(timeout=5)
+    bg.close(timeout=5)
+
+
+def test_rejects_unknown_policy() -> None:
+    with pytest.raises(ValueError):
+        _BackgroundLogger(_Recorder(), max_buffer=1, batch_size=1, flush_interval=1.0, on_full="spill")
+
+
+def test_exit_drain_is_bounded_and_reports_what_is_lost(
+    monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+) -> None:
+    send = _Recorder()
+    send.gate.clear()  # dashboard unreachable: the first batch hangs
+    bg = _logger(send, batch_size=1, exit_timeout=0.1)
+    monkeypatch.setattr(client, "_live_loggers", weakref.WeakSet([bg]))
+    for event in _events(3):
+        bg.put(event)
+    started = time.monotonic()
+    with caplog.at_level(logging.WARNING, logger="jarvis_mc"):
+        client._drain_at_exit()
+    assert time.monotonic() - started < 2
+    assert "exiting with 3 undelivered event(s)" in caplog.text
+    send.gate.set()
+    bg.close(timeout=5)
+
+
+def test_unclosed_agents_are_collected_and_their_logger_drains(monkeypatch: pytest.MonkeyPatch) -> None:
+    send = _Recorder()
+    monkeypatch.setattr(JarvisAgent, "_batch_sender", lambda self: send)
+    agent = JarvisAgent(token="t", background=True, flush_interval=60.0)
+    agent.log("before the agent goes away")
+    bg = agent._logger
+    assert bg is not None
+    agent_ref = weakref.ref(agent)
+    del agent
+    gc.collect()
+    assert agent_ref() is None
+    bg._thread.join(5)
+    assert not bg._thread.is_alive()
+    assert [e["message"] for batch in send.batches for e in batch] == ["before the agent goes away"]
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any
+
+import pytest
+import requests
+
+from jarvis_mc import spool as spool_module
+from jarvis_mc.client import JarvisAgent
+from jarvis_mc.spool import EventSpool, SpoolReplayer, is_retryable
+from jarvis_mc.ws import JarvisSocketError
+
+
+def _http_error(status: int) -> requests.HTTPError:
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(response=response)
+
+
+@pytest.mark.parametrize(
+    "exc, retryable",
+    [
+        (requests.ConnectionError(), True),
+        (requests.Timeout(), True),
+        (ConnectionError(), True),
+        (_http_error(429), True),
+        (_http_error(503), True),
+        (_http_error(402), False),
+        (_http_error(422), False),
+        (JarvisSocketError(500, "oops"), True),
+        (JarvisSocketError(401, "revoked"), False),
+        (ValueError(), False),
+    ],
+)
+def test_is_retryable(exc: BaseException, retryable: bool) -> None:
+    assert is_retryable(exc) is retryable
+
+
+def test_spool_survives_reopen_in_order(tmp_path) -> None:
+    path = str(tmp_path / "nested" / "spool.db")
+    spool = EventSpool(path)
+    spool.append([{"n": 1}, {"n": 2}])
+    spool.append([{"n": 3}])
+    first = spool.peek(2)
+    spool.ack(first[-1][0])
+    spool.close()
+
+    reopened = EventSpool(path)
+    assert len(reopened) == 1
+    assert [body for _, body in reopened.peek(10)] == [{"n": 3}]
+    reopened.close()
+
+
+def test_spool_caps_discard_the_oldest(tmp_path) -> None:
+    spool = EventSpool(str(tmp_path / "spool.db"), max_events=3)
+    spool.append([{"n": n} for n in range(5)])
+    assert len(spool) == 3
+    assert spool.discarded == 2
+    assert [body["n"] for _, body in spool.peek(10)] == [2, 3, 4]
+    spool.close()
+
+    by_size = EventSpool(str(tmp_path / "bytes.db"), max_bytes=30)
+    by_size.append([{"payload": "x" * 10} for _ in range(3)])
+    assert len(by_size) == 1
+    by_size.close()
+
+
+class _FlakyServer:
+    """Batch sender that fails with *error* while down and records what it accepts."""
+
+    def __init__(self, error: BaseException | None = None) -> None:
+        self.received: list[dict[str, Any]] = []
+        self.error = error
+        self.lock = threading.Lock()
+
+    def send(self, events: list[dict[str, Any]]) -> None:
+        with self.lock:
+            if self.error is not None:
+                raise self.error
+            self.received.extend(events)
+
+
+def _wait_for(predicate, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_replayer_retries_then_drains_in_order(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(spool_module, "_MIN_RETRY_SECONDS", 0.01)
+    server = _FlakyServer(requests.ConnectionError())
+    spool = EventSpool(str(tmp_path / "spool.db"))
+    spool.append([{"n": n} for n in range(5)])
+    replayer = SpoolReplayer(spool, server.send, batch_size=2)
+    replayer.notify()
+    time.sleep(0.05)
+    assert server.received == [] and len(spool) == 5
+    server.error = None
+    _wait_for(lambda: len(spool) == 0)
+    replayer.close(timeout=5)
+    assert server.received == [{"n": n} for n in range(5)]
+
+
+def test_replayer_discards_rejected_batches(tmp_path) -> None:
+    server = _FlakyServer(_http_error(422))
+    spool = EventSpool(str(tmp_path / "spool.db"))
+    spool.append([{"n": 1}])
+    replayer = SpoolReplayer(spool, server.send, batch_size=10)
+    replayer.notify()
+    _wait_for(lambda: len(spool) == 0)
+    replayer.close(timeout=5)
+    assert server.received == []
+
+
+def test_background_logger_round_trips_through_the_spool(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(spool_module, "_MIN_RETRY_SECONDS", 0.01)
+    server = _FlakyServer(requests.ConnectionError())
+    monkeypatch.setattr(JarvisAgent, "_batch_sender", lambda self: server.send)
+    path = str(tmp_path / "spool.db")
+
+    agent = JarvisAgent(token="t", background=True, batch_size=2, flush_interval=0.01, spool_path=path)
+    for n in range(3):
+        agent.log(f"down {n}")
+    assert agent.flush(timeout=5)
+    assert server.received == []
+    # Back up: the spooled events go first, then the new ones, in order.
+    server.error = None
+    for n in range(2):
+        agent.log(f"up {n}")
+    assert agent.flush(timeout=5)
+    _wait_for(lambda: len(server.received) == 5)
+    agent.close(timeout=5)
+    assert [event["message"] for event in server.received] == [
+        "down 0", "down 1", "down 2", "up 0", "up 1",
+    ]
+    reopened = EventSpool(path)
+    assert len(reopened) == 0
+    reopened.close()
+
+
+def test_events_spooled_by_a_dead_process_are_replayed_on_start(tmp_path, monkeypatch) -> None:
+    path = str(tmp_path / "spool.db")
+    leftover = EventSpool(path)
+    leftover.append([{"type": "action", "message": "from last run"}])
+    leftover.close()
+    server = _FlakyServer()
+    monkeypatch.setattr(JarvisAgent, "_batch_sender", lambda self: server.send)
+    agent = JarvisAgent(token="t", spool_path=path)
+    _wait_for(lambda: len(server.received) == 1)
+    agent.close(timeout=5)
+    assert server.received[0]["message"] == "from last run"
+
+
+class _FakeHTTP:
+    """Session stand-in: the batch endpoint is all-or-nothing, costed events hit the budget cap.
+
+    Messages in *fail_once* drop the connection the first time they are posted on their own.
+    """
+
+    def __init__(self) -> None:
+        self.accepted: list[str] = []
+        self.posts: list[str] = []
+        self.fail_once: set[str] = set()
+
+    def _response(self, status: int) -> requests.Response:
+        response = requests.Response()
+        response.status_code = status
+        return response
+
+    def post(self, url: str, json: dict[str, Any], timeout: float) -> requests.Response:
+        self.posts.append(url.rsplit("/v1/", 1)[1])
+        events = json["events"] if url.endswith("/batch") else [json]
+        for event in events if not url.endswith("/batch") else []:
+            if event["message"] in self.fail_once:
+                self.fail_once.discard(event["message"])
+                raise requests.ConnectionError("reset")
+        if any(event["cost"] > 0 for event in events):
+            return self._response(402)
+        self.accepted.extend(event["message"] for event in events)
+        return self._response(201)
+
+    def close(self) -> None:
+        pass
+
+
+def _event(message: str, cost: float = 0.0) -> dict[str, Any]:
+    return {"type": "action", "message": message, "cost": cost, "requiresApproval": False, "completedActions": []}
+
+
+def test_rejected_batches_fall_back_to_single_events(monkeypatch) -> None:
+    http = _FakeHTTP()
+    monkeypatch.setattr(JarvisAgent, "_new_session", lambda self: http)
+    agent = JarvisAgent(token="t", background=True, flush_interval=0.01)
+    agent.log("step 1")
+    agent.log("paid step", cost=0.5)
+    agent.log("error", type="error")
+    assert agent.flush(timeout=5)
+    agent.close(timeout=5)
+    assert http.posts == ["events/batch", "events", "events", "events"]
+    assert http.accepted == ["step 1", "error"]
+
+
+def test_spool_replay_resumes_after_a_partial_fallback(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(spool_module, "_MIN_RETRY_SECONDS", 0.01)
+    http = _FakeHTTP()
+    http.fail_once.add("b")
+    monkeypatch.setattr(JarvisAgent, "_new_session", lambda self: http)
+    path = str(tmp_path / "spool.db")
+    leftover = EventSpool(path)
+    leftover.append([_event("a"), _event("paid", cost=1.0), _event("b"), _event("c")])
+    leftover.close()
+
+    agent = JarvisAgent(token="t", spool_path=path)
+    _wait_for(lambda: len(http.accepted) == 3)
+    # "a" went through before the connection dropped on "b"; it is not resent.
+    assert http.accepted == ["a", "b", "c"]
+    assert http.posts == ["events/batch", "events", "events", "events", "events/batch"]
+    agent.close(timeout=5)
+    reopened = EventSpool(path)
+    assert len(reopened) == 0
+    reopened.close()
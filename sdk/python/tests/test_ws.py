@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import Future
+
+from jarvis_mc.ws import AgentSocket, AsyncAgentSocket
+
+
+def _command(command_id: str, kind: str = "human_message") -> dict:
+    return {"type": "command", "command": {"id": command_id, "kind": kind, "status": "pending", "payload": {}}}
+
+
+def test_repushed_commands_are_buffered_once() -> None:
+    socket = AgentSocket("http://localhost:8000", "token", 1.0, "test")
+    socket._dispatch(_command("a"))
+    socket._dispatch(_command("b", kind="approval_decision"))
+    # Reconnect: the server pushes everything still pending again.
+    socket._dispatch(_command("a"))
+    socket._dispatch(_command("b", kind="approval_decision"))
+
+    assert socket._commands.take("human_message")["id"] == "a"
+    assert socket._commands.take("human_message") is None
+    # Handed out but not acked yet: a later re-push is still dropped.
+    socket._dispatch(_command("a"))
+    assert socket._commands.take("human_message") is None
+    assert socket._commands.take("approval_decision")["id"] == "b"
+
+
+def test_async_repushed_commands_are_buffered_once() -> None:
+    async def scenario() -> None:
+        socket = AsyncAgentSocket("http://localhost:8000", "token", 1.0, "test")
+        socket._dispatch(_command("a"))
+        socket._command_arrived.clear()
+        socket._dispatch(_command("a"))
+        assert not socket._command_arrived.is_set()
+        assert socket._commands.take("human_message")["id"] == "a"
+        assert socket._commands.take("human_message") is None
+
+    asyncio.run(scenario())
+
+
+def test_replies_resolve_pending_requests() -> None:
+    socket = AgentSocket("http://localhost:8000", "token", 1.0, "test")
+    ok: Future = Future()
+    failed: Future = Future()
+    socket._pending[1] = (None, ok)
+    socket._pending[2] = (None, failed)
+    socket._dispatch({"type": "ok", "id": 1, "event": {"id": "e1"}})
+    socket._dispatch({"type": "error", "id": 2, "status": 402, "detail": "Budget exceeded."})
+    assert ok.result()["event"] == {"id": "e1"}
+    error = failed.exception()
+    assert getattr(error, "status_code", None) == 402